@@ -0,0 +1,210 @@
+"""
+Benchmarks for the AI chat path, run against the fake Ollama server so no model is needed.
+
+    python ai_benchmark.py                              # print a table
+    python ai_benchmark.py --latency 0.2 --rate 50      # slower fake model
+    python ai_benchmark.py --output ai.json --compare old_ai.json
+
+Answers go through AiWorker and are shown in the bottom panel's chat display,
+like in the IDE. The size in a result's name is the number of tokens per answer,
+or for the queue benchmark the number of requests submitted at once.
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import PySide6
+from PySide6.QtCore import QEventLoop, QObject, QTimer
+from PySide6.QtWidgets import QApplication
+
+from ai_config import AiWorker
+from benchmark import BenchmarkResult, compare, format_result, git_commit
+from bottom_tabs import BottomTabsWidget
+from fake_ollama import FakeOllamaServer
+
+BENCHMARKS = ("latency", "streaming", "queue")
+TIMER_INTERVAL_MS = 10 # Tick of the timer that measures event loop stalls while streaming
+TIMEOUT_SECONDS = 120  # Give up on a request that never finishes
+
+
+class ChatProbe(QObject):
+    """Shows worker signals in the chat display and records when they reached the UI thread."""
+    def __init__(self, tabs):
+        super().__init__()
+        self.tabs = tabs
+        self.submitted = {}    # Request id -> submit time
+        self.first_token = {}  # Request id -> time the first piece was shown
+        self.finished = {}     # Request id -> time the full answer was shown
+        self.errors = []
+
+    def submit(self, worker, prompt):
+        request_id = worker.submit(prompt)
+        self.submitted[request_id] = time.perf_counter()
+        return request_id
+
+    def on_started(self, request_id):
+        self.tabs.start_ai_answer()
+
+    def on_partial(self, request_id, text):
+        self.tabs.append_ai_text(text)
+        self.first_token.setdefault(request_id, time.perf_counter())
+
+    def on_response(self, request_id, text):
+        self.finished[request_id] = time.perf_counter()
+
+    def on_error(self, request_id, message):
+        self.errors.append(message)
+        self.finished[request_id] = time.perf_counter()
+
+    def connect(self, worker):
+        worker.request_started.connect(self.on_started)
+        worker.partial_response.connect(self.on_partial)
+        worker.response_ready.connect(self.on_response)
+        worker.error_occurred.connect(self.on_error)
+
+
+def _wait_until(app, condition):
+    # A timer keeps waking the loop so the deadline is checked even if no signal arrives
+    wake = QTimer()
+    wake.start(50)
+    deadline = time.perf_counter() + TIMEOUT_SECONDS
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("the fake server did not answer in time")
+        app.processEvents(QEventLoop.WaitForMoreEvents)
+    wake.stop()
+
+
+def _setup(server):
+    tabs = BottomTabsWidget()
+    tabs.resize(900, 300)
+    tabs.show()
+    worker = AiWorker(url=server.url)
+    probe = ChatProbe(tabs)
+    probe.connect(worker)
+    worker.start()
+    return tabs, worker, probe
+
+
+def _teardown(tabs, worker, probe):
+    worker.stop()
+    worker.wait()
+    tabs.close()
+    if probe.errors:
+        raise RuntimeError(probe.errors[0])
+
+
+def bench_latency(app, server, repeat):
+    """Time from submitting a question to its first and its last token being shown, one request at a time."""
+    tabs, worker, probe = _setup(server)
+    first_samples = []
+    total_samples = []
+    for index in range(repeat):
+        request_id = probe.submit(worker, f"Question {index}: how do I speed up range sum queries?")
+        _wait_until(app, lambda: request_id in probe.finished)
+        start = probe.submitted[request_id]
+        first_samples.append((probe.first_token[request_id] - start) * 1000)
+        total_samples.append((probe.finished[request_id] - start) * 1000)
+    _teardown(tabs, worker, probe)
+    return [BenchmarkResult("first_token", server.answer_tokens, "ms", first_samples),
+            BenchmarkResult("answer", server.answer_tokens, "ms", total_samples)]
+
+
+def bench_streaming(app, server, repeat):
+    """How late a UI timer fires while answers stream into the chat display."""
+    tabs, worker, probe = _setup(server)
+    samples = []
+    last_tick = [None]
+
+    def tick():
+        now = time.perf_counter()
+        if last_tick[0] is not None:
+            samples.append(max(0.0, (now - last_tick[0]) * 1000 - TIMER_INTERVAL_MS))
+        last_tick[0] = now
+
+    timer = QTimer()
+    timer.timeout.connect(tick)
+    for index in range(repeat):
+        request_id = probe.submit(worker, f"Question {index}: explain lazy propagation.")
+        _wait_until(app, lambda: request_id in probe.first_token)
+        last_tick[0] = None
+        timer.start(TIMER_INTERVAL_MS)
+        _wait_until(app, lambda: request_id in probe.finished)
+        timer.stop()
+    _teardown(tabs, worker, probe)
+    return [BenchmarkResult("streaming_lag", server.answer_tokens, "ms", samples or [0.0])]
+
+
+def bench_queue(app, server, repeat, queued):
+    """Answers per second when `queued` questions are submitted at once."""
+    tabs, worker, probe = _setup(server)
+    samples = []
+    for index in range(repeat):
+        start = time.perf_counter()
+        request_ids = [probe.submit(worker, f"Question {index}.{n}: why is my solution slow?") for n in range(queued)]
+        _wait_until(app, lambda: all(request_id in probe.finished for request_id in request_ids))
+        samples.append(queued / (time.perf_counter() - start))
+    _teardown(tabs, worker, probe)
+    return [BenchmarkResult("queue", queued, "answers/s", samples)]
+
+
+def run_benchmarks(names, server, repeat, queued):
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = []
+    for name in names:
+        if name == "latency":
+            batch = bench_latency(app, server, repeat)
+        elif name == "streaming":
+            batch = bench_streaming(app, server, repeat)
+        else:
+            batch = bench_queue(app, server, repeat, queued)
+        for result in batch:
+            print(format_result(result), flush=True)
+        results.extend(batch)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FeatherIDE AI chat benchmarks against a fake Ollama server")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="benchmarks to run")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model's seconds before the first token")
+    parser.add_argument("--rate", type=float, default=200.0, help="fake model's tokens per second")
+    parser.add_argument("--tokens", type=int, default=200, help="tokens per answer")
+    parser.add_argument("--queued", type=int, default=8, help="requests submitted at once by the queue benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions per benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    # Port 0 picks a free port, so a real Ollama on 11434 can keep running
+    server = FakeOllamaServer(port=0, first_token_latency=args.latency, tokens_per_second=args.rate,
+                              answer_tokens=args.tokens).start()
+    try:
+        results = run_benchmarks(args.only, server, args.repeat, args.queued)
+    finally:
+        server.stop()
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pyside6": PySide6.__version__,
+            "platform": platform.platform(),
+            "server": {"latency": args.latency, "rate": args.rate, "tokens": args.tokens},
+            "repeat": args.repeat,
+            "results": [result.to_dict() for result in results],
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,470 @@
+import hashlib
+import itertools
+import os
+import queue
+import threading
+import zlib
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
 from PySide6.QtCore import QThread, Signal
 import json
+import time
 
-# Thread for Ollama API calls
-class OllamaThread(QThread):
-    response_ready = Signal(str)
-    error_occurred = Signal(str)
-    
-    def __init__(self, prompt, model_name="openchat"):
-        super().__init__()
+from paths import app_data_dir
+
+
+class AiResponseStats:
+    def __init__(self, time_to_first_token, tokens, generation_time, total_time, cached=False, context_tokens=None):
+        self.time_to_first_token = time_to_first_token # Seconds from sending the request to the first token
+        self.tokens = tokens                           # Tokens generated
+        self.generation_time = generation_time         # Seconds spent generating them
+        self.total_time = total_time                   # Seconds from sending the request to the last token
+        self.cached = cached                           # Answered from the AiResponseCache
+        self.context_tokens = context_tokens           # Estimated tokens of the prompt sent, history included
+
+    @property
+    def tokens_per_second(self):
+        return self.tokens / self.generation_time if self.generation_time > 0 else 0.0
+
+    def summary(self):
+        if self.cached:
+            text = f"cached answer ({self.tokens} tokens when generated), {self.total_time * 1000:.1f} ms"
+        else:
+            first = f"{self.time_to_first_token:.2f} s" if self.time_to_first_token is not None else "n/a"
+            text = (f"first token after {first}, {self.tokens} tokens at "
+                    f"{self.tokens_per_second:.1f} tokens/s, {self.total_time:.1f} s total")
+        if self.context_tokens is not None:
+            text += f", context ~{self.context_tokens} tokens"
+        return text
+
+
+# Lower numbers are answered first; requests with equal priority keep their order
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+OLLAMA_URL = "http://localhost:11434/api/chat" # Ollama API endpoint
+
+DEFAULT_CONTEXT_TOKENS = 2048 # History budget of a Conversation, in estimated tokens
+MESSAGE_OVERHEAD_TOKENS = 4   # Role markers and separators added per message
+SUMMARY_QUESTION_CHARS = 120  # Characters of each dropped question kept in the summary
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class OllamaError(Exception):
+    pass
+
+
+def default_response_cache_dir():
+    return app_data_dir("ai_cache")
+
+
+class AiResponseCache:
+    """
+    Cache of finished AI answers, keyed on the model and the messages sent (which
+    carry the attached code). Recent answers stay in an in-memory LRU; every
+    answer is also written zlib-compressed to disk, where the least recently used
+    files are evicted once the store grows past max_bytes.
+    """
+    def __init__(self, cache_dir=None, max_bytes=16 * 1024 * 1024, memory_entries=64):
+        self.cache_dir = cache_dir or default_response_cache_dir()
+        self.max_bytes = max_bytes           # Upper bound on the size of the on-disk store
+        self.memory_entries = memory_entries # Answers kept in memory
+        self._memory = OrderedDict()         # Key -> (answer, tokens), most recently used last
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, model_name, messages):
+        """The attached code is part of the last message, so it is hashed along with it."""
+        digest = hashlib.sha256(model_name.encode())
+        digest.update(b"\0" + json.dumps(messages, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".z")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def fetch(self, key):
+        """Returns (answer, tokens) for key, or None on a miss."""
+        entry = self._memory.get(key)
+        if entry is None:
+            path = self._entry_path(key)
+            try:
+                with open(path, "rb") as f:
+                    data = json.loads(zlib.decompress(f.read()))
+                entry = (data["answer"], data.get("tokens", 0))
+                os.utime(path) # Mark as recently used
+            except (OSError, ValueError, KeyError, zlib.error):
+                self.misses += 1
+                return None
+        self._remember(key, entry)
+        self.hits += 1
+        return entry
+
+    def store(self, key, answer, tokens):
+        self._remember(key, (answer, tokens))
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._entry_path(key)
+            with open(path + ".tmp", "wb") as f:
+                f.write(zlib.compress(json.dumps({"answer": answer, "tokens": tokens}).encode()))
+            os.replace(path + ".tmp", path)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used files until the store fits in max_bytes."""
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        self._memory.clear()
+        try:
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+
+def estimate_tokens(text):
+    """Rough token count for English text and code (about four characters per token)."""
+    return (len(text) + 3) // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+class Conversation:
+    """
+    Multi-turn chat history sent along with each question. Recent exchanges are
+    sent verbatim as long as they fit in context_tokens; older ones are folded into
+    a short summary of what was asked, so the prompt (and the time the model spends
+    reading it) stays bounded however long the chat gets.
+    """
+    def __init__(self, context_tokens=DEFAULT_CONTEXT_TOKENS, summary_share=0.2):
+        self.context_tokens = context_tokens # Budget for history, summary and the new question
+        self.summary_share = summary_share   # Part of the budget the summary may use
+        self.exchanges = []                  # (question, answer, estimated tokens), oldest first
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.exchanges = []
+
+    def add_exchange(self, question, answer):
+        with self._lock:
+            self.exchanges.append((question, answer, estimate_tokens(question) + estimate_tokens(answer)))
+
+    def context_messages(self, question):
+        """Messages for the next request: summary, recent exchanges and the question."""
+        with self._lock:
+            exchanges = list(self.exchanges)
+        summary_budget = int(self.context_tokens * self.summary_share)
+        budget = self.context_tokens - estimate_tokens(question) - summary_budget
+
+        # Newest exchanges first, until the next one no longer fits
+        kept = 0
+        for _, _, tokens in reversed(exchanges):
+            if tokens > budget:
+                break
+            budget -= tokens
+            kept += 1
+        older = exchanges[:len(exchanges) - kept]
+        recent = exchanges[len(exchanges) - kept:]
+
+        messages = []
+        summary = self._summarize(older, summary_budget + max(budget, 0))
+        if summary:
+            messages.append({"role": "system", "content": summary})
+        for earlier_question, answer, _ in recent:
+            messages.append({"role": "user", "content": earlier_question})
+            messages.append({"role": "assistant", "content": answer})
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def _summarize(self, exchanges, budget):
+        """One line per dropped question, newest kept first, within budget tokens."""
+        if not exchanges:
+            return ""
+        header = "Earlier in this conversation the user asked about:"
+        budget -= estimate_tokens(header)
+        lines = []
+        for question, _, _ in reversed(exchanges):
+            line = "- " + " ".join(question.split())[:SUMMARY_QUESTION_CHARS]
+            cost = estimate_tokens(line) - MESSAGE_OVERHEAD_TOKENS
+            if cost > budget:
+                break
+            budget -= cost
+            lines.append(line)
+        if not lines:
+            return ""
+        return header + "\n" + "\n".join(reversed(lines))
+
+
+class AiRequest:
+    def __init__(self, request_id, prompt, model_name, priority, key=None, code=None, use_cache=True,
+                 conversation=None):
+        self.request_id = request_id # Identifies the request in the worker's signals
         self.prompt = prompt
         self.model_name = model_name
-        self.url = "http://localhost:11434/api/chat" # Ollama API endpoint
+        self.priority = priority     # PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        self.key = key               # A newer request with the same key makes this one stale
+        self.code = code             # Source code attached to the question, if any
+        self.use_cache = use_cache   # False to ask the model even if the answer is cached; the new answer replaces it
+        self.conversation = conversation # Conversation the question belongs to, or None for a one-off question
+        self.cancelled = False
+
+    def question(self):
+        content = self.prompt
+        if self.code:
+            content += "\n\n```cpp\n" + self.code + "\n```"
+        return content
+
+    def messages(self):
+        """Built when the request starts, so queued follow-ups see the answers before them."""
+        if self.conversation is not None:
+            return self.conversation.context_messages(self.question())
+        return [{"role": "user", "content": self.question()}]
+
+
+# Long-lived thread for Ollama API calls
+class AiWorker(QThread):
+    """
+    Answers AiRequests one at a time, highest priority first, over one pooled
+    HTTP connection to the Ollama server. Requests can be queued while an answer
+    is still streaming, and queued or running requests can be cancelled.
+    """
+    request_started = Signal(int)          # Request id
+    partial_response = Signal(int, str)    # Request id, next piece of the answer
+    response_ready = Signal(int, str)      # Request id, the complete answer
+    stats_ready = Signal(int, object)      # Request id, AiResponseStats
+    error_occurred = Signal(int, str)      # Request id, error message
+    request_cancelled = Signal(int)        # Request id
+    queue_changed = Signal(int)            # Requests waiting behind the current one
+
+    def __init__(self, url=OLLAMA_URL, cache=None, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.cache = cache # AiResponseCache, or None to always ask the model
+        self.session = requests.Session()
+        # Keep-alive connections to the local server instead of a new one per message
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("http://", adapter)
+
+        self._queue = queue.PriorityQueue()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._pending = {}             # Request id -> queued AiRequest
+        self._current = None           # AiRequest being answered
+        self._current_response = None  # Its streaming HTTP response
+        self._next_id = 1
+
+    def submit(self, prompt, model_name="openchat", priority=PRIORITY_NORMAL, key=None, code=None, use_cache=True,
+               conversation=None):
+        """Queues a request and returns its id. Requests with the same key are cancelled first."""
+        with self._lock:
+            request = AiRequest(self._next_id, prompt, model_name, priority, key, code, use_cache, conversation)
+            self._next_id += 1
+            if key is not None:
+                stale = [queued for queued in self._pending.values() if queued.key == key]
+                if self._current is not None and self._current.key == key:
+                    stale.append(self._current)
+                for old in stale:
+                    self._cancel_locked(old)
+            self._pending[request.request_id] = request
+            self._queue.put((priority, next(self._sequence), request))
+            waiting = len(self._pending)
+        self.queue_changed.emit(waiting)
+        return request.request_id
+
+    def queued_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def is_busy(self):
+        with self._lock:
+            return self._current is not None or bool(self._pending)
+
+    def cancel(self, request_id):
+        with self._lock:
+            request = self._pending.get(request_id)
+            if request is None and self._current is not None and self._current.request_id == request_id:
+                request = self._current
+            if request is not None:
+                self._cancel_locked(request)
+
+    def cancel_current(self):
+        with self._lock:
+            if self._current is not None:
+                self._cancel_locked(self._current)
+
+    def cancel_all(self):
+        with self._lock:
+            for request in list(self._pending.values()):
+                self._cancel_locked(request)
+            if self._current is not None:
+                self._cancel_locked(self._current)
+
+    def _cancel_locked(self, request):
+        request.cancelled = True
+        if request is self._current and self._current_response is not None:
+            # Unblocks the worker if it is still waiting for the next streamed line
+            self._current_response.close()
+
+    def stop(self):
+        """Cancels everything and ends the thread once the current request has stopped."""
+        self.cancel_all()
+        self._queue.put((-1, -1, None))
 
     def run(self):
+        while True:
+            _, _, request = self._queue.get()
+            if request is None:
+                break
+            with self._lock:
+                self._pending.pop(request.request_id, None)
+                waiting = len(self._pending)
+                if not request.cancelled:
+                    self._current = request
+            self.queue_changed.emit(waiting)
+            if request.cancelled:
+                self.request_cancelled.emit(request.request_id)
+                continue
+
+            self.request_started.emit(request.request_id)
+            try:
+                self._answer(request)
+            except RequestCancelled:
+                self.request_cancelled.emit(request.request_id)
+            except Exception as e:
+                if request.cancelled:
+                    # Closing the response from cancel() surfaces as a connection error
+                    self.request_cancelled.emit(request.request_id)
+                else:
+                    self.error_occurred.emit(request.request_id, describe_error(e))
+            finally:
+                with self._lock:
+                    self._current = None
+                    self._current_response = None
+        self.session.close()
+
+    def _answer(self, request):
+        start = time.perf_counter()
+        messages = request.messages()
+        context_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key_for(request.model_name, messages)
+        if cache_key is not None and request.use_cache:
+            cached = self.cache.fetch(cache_key)
+            if cached is not None:
+                answer, tokens = cached
+                self.partial_response.emit(request.request_id, answer)
+                self.response_ready.emit(request.request_id, answer)
+                if request.conversation is not None:
+                    request.conversation.add_exchange(request.question(), answer)
+                elapsed = time.perf_counter() - start
+                self.stats_ready.emit(request.request_id, AiResponseStats(elapsed, tokens, 0.0, elapsed, cached=True,
+                                                                          context_tokens=context_tokens))
+                return
+
         payload = {
-            "model": self.model_name,
-            "messages": [
-                {"role": "user", "content": self.prompt}
-            ],
-            "stream": False # Set to False for a single response; True for streaming
+            "model": request.model_name,
+            "messages": messages,
+            "stream": True # Ollama sends one JSON object per line while generating
         }
-        
-        try:
-            # Make a synchronous request. If you want streaming, this part
-            # would need a more complex loop to read chunks.
-            response = requests.post(self.url, json=payload, timeout=300) # Added timeout
-            response.raise_for_status() # Raise an exception for bad status codes
-
-            data = response.json()
-            # Ollama's /api/chat endpoint returns a 'message' dictionary
-            # within the top-level JSON object.
-            ai_content = data.get("message", {}).get("content", "AI response not available.")
-            
-            self.response_ready.emit(ai_content)
-
-        except requests.exceptions.ConnectionError:
-            self.error_occurred.emit("Could not connect to Ollama server. Please ensure Ollama is running and the model is downloaded.")
-        except requests.exceptions.Timeout:
-            self.error_occurred.emit("Ollama request timed out. The model might be taking too long to respond.")
-        except requests.exceptions.HTTPError as e:
-            self.error_occurred.emit(f"Ollama HTTP error: {e.response.status_code} - {e.response.text}")
-        except requests.exceptions.RequestException as e:
-            self.error_occurred.emit(f"An unexpected error occurred with Ollama: {str(e)}")
-        except json.JSONDecodeError:
-            self.error_occurred.emit("Failed to decode JSON response from Ollama. Invalid response format.")
-        except Exception as e:
-            self.error_occurred.emit(f"An unknown error occurred in OllamaThread: {str(e)}")
+        # Connect timeout, then the longest wait allowed between two streamed lines
+        response = self.session.post(self.url, json=payload, stream=True, timeout=(10, 300))
+        with self._lock:
+            self._current_response = response
+        if request.cancelled:
+            response.close()
+            raise RequestCancelled()
+        response.raise_for_status() # Raise an exception for bad status codes
+
+        pieces = []
+        first_token_at = None
+        chunks = 0
+        final = {}
+        with response:
+            for line in response.iter_lines():
+                if request.cancelled:
+                    raise RequestCancelled()
+                if not line:
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise OllamaError(data["error"])
+                # Each line carries the next piece of the 'message' content
+                content = data.get("message", {}).get("content", "")
+                if content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    chunks += 1
+                    pieces.append(content)
+                    self.partial_response.emit(request.request_id, content)
+                if data.get("done"):
+                    # Keep reading to the end of the body so the connection goes back to the pool
+                    final = data
+        if request.cancelled:
+            raise RequestCancelled()
+        end = time.perf_counter()
+
+        ai_content = "".join(pieces) or "AI response not available."
+        self.response_ready.emit(request.request_id, ai_content)
+        if request.conversation is not None and pieces:
+            request.conversation.add_exchange(request.question(), ai_content)
+
+        # Prefer Ollama's own counters (durations in nanoseconds); fall back to client-side timing
+        if final.get("eval_count") and final.get("eval_duration"):
+            tokens, generation_time = final["eval_count"], final["eval_duration"] / 1e9
+        else:
+            tokens, generation_time = chunks, end - (first_token_at or end)
+        if cache_key is not None and pieces:
+            self.cache.store(cache_key, ai_content, tokens)
+        time_to_first_token = first_token_at - start if first_token_at is not None else None
+        self.stats_ready.emit(request.request_id, AiResponseStats(time_to_first_token, tokens, generation_time, end - start,
+                                                                  context_tokens=context_tokens))
+
+
+def describe_error(error):
+    """User-facing message for an exception raised while talking to Ollama."""
+    if isinstance(error, OllamaError):
+        return f"Ollama error: {error}"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "Could not connect to Ollama server. Please ensure Ollama is running and the model is downloaded."
+    if isinstance(error, requests.exceptions.Timeout):
+        return "Ollama request timed out. The model might be taking too long to respond."
+    if isinstance(error, requests.exceptions.HTTPError):
+        return f"Ollama HTTP error: {error.response.status_code} - {error.response.text}"
+    if isinstance(error, requests.exceptions.RequestException):
+        return f"An unexpected error occurred with Ollama: {str(error)}"
+    if isinstance(error, json.JSONDecodeError):
+        return "Failed to decode JSON response from Ollama. Invalid response format."
+    return f"An unknown error occurred in AiWorker: {str(error)}"
 
 
 # Fallback function if Ollama is not active or fails
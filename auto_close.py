@@ -1,15 +1,27 @@
 import sys
-from PySide6.QtWidgets import QTextEdit, QApplication, QCompleter
+import time
+from PySide6.QtWidgets import QTextEdit, QPlainTextEdit, QApplication, QCompleter
 from PySide6.QtGui import QKeyEvent, QTextCursor
-from PySide6.QtCore import Qt, QStringListModel, QRect
+from PySide6.QtCore import Qt, QStringListModel, QRect, QTimer
 
-class CustomTextEdit(QTextEdit):
+from completion_index import INDEX_SLICE_SECONDS, MAX_CANDIDATES, CompletionStats, IdentifierIndex, ProjectScanThread
+from stdlib_symbols import DECLARATION_WINDOW_CHARS, StdlibSymbols, completion_context
+
+class CodeEditorMixin:
+    """
+    Auto-closing brackets and quotes, Tab as four spaces and completion of keywords,
+    standard library names and the identifiers used in the document and its project
+    folder. Members are offered after '.', '->' and '::', and candidates you accept
+    often or recently are listed first. Shared by the rich-text and the plain-text
+    editor; list it before the Qt base class.
+    """
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setTabStopDistance(4 * self.fontMetrics().horizontalAdvance(' ')) 
 
         self.completer = None
         self.setup_completer()
+        self._scan_threads = {} # Running ProjectScanThread -> IdentifierIndex its result goes to
 
     def setup_completer(self):
         self.cpp_keywords = [
@@ -37,14 +49,80 @@ class CustomTextEdit(QTextEdit):
             "cin.clear()", "cin.ignore()", "getline(cin, )", "for (int i = 0; i < N; ++i)"
         ]
 
+        # The index does the prefix matching; the completer only shows its candidates
+        self.identifier_index = self.new_identifier_index()
+        self.stdlib_symbols = StdlibSymbols() # Read on the first completion
+        self._member_type = (None, None, None) # (position after '.', variable, its type) of the last member completion
+        self.completion_stats = CompletionStats() # Accepted completions, for ranking
+        self._stats_timer = QTimer(self)          # Saves the stats a little after a completion
+        self._stats_timer.setSingleShot(True)
+        self._stats_timer.setInterval(5000)
+        self._stats_timer.timeout.connect(self.completion_stats.save)
+        self.latency_probe = None # KeystrokeLatencyProbe while keystroke latency is being measured
+        self.document().contentsChange.connect(self._on_contents_change)
+        # A freshly loaded document is indexed in slices whenever the event loop is idle
+        self._index_timer = QTimer(self)
+        self._index_timer.setSingleShot(True)
+        self._index_timer.setInterval(0)
+        self._index_timer.timeout.connect(self._index_next_slice)
+
         self.completer = QCompleter(self)
-        model = QStringListModel(self.cpp_keywords)
-        self.completer.setModel(model)
+        self.completion_model = QStringListModel()
+        self.completer.setModel(self.completion_model)
         self.completer.setWidget(self)
-        self.completer.setCompletionMode(QCompleter.PopupCompletion)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
         self.completer.setCaseSensitivity(Qt.CaseInsensitive)
         self.completer.activated.connect(self.insert_completion)
 
+    def new_identifier_index(self):
+        """An empty index for another document, knowing the keywords and snippets."""
+        return IdentifierIndex(self.cpp_keywords)
+
+    def set_code_document(self, document, identifier_index):
+        """Shows another document, completing from the index that tracks it."""
+        tab_stop = self.tabStopDistance() # Kept in the document's text option, not in the editor
+        self.document().contentsChange.disconnect(self._on_contents_change)
+        if self.completer.popup().isVisible():
+            self.completer.popup().hide()
+        if document.defaultFont() != self.font():
+            document.setDefaultFont(self.font()) # Zoomed while another tab was shown; relayouts the document
+        # Showing a document doesn't change its text, so textChanged must not mark it unsaved
+        self.blockSignals(True)
+        try:
+            self.setDocument(document)
+        finally:
+            self.blockSignals(False)
+        self.setTabStopDistance(tab_stop)
+        document.contentsChange.connect(self._on_contents_change)
+        self.identifier_index = identifier_index
+        self._member_type = (None, None, None)
+        if identifier_index.has_pending() and not self._index_timer.isActive():
+            self._index_timer.start()
+
+    def _on_contents_change(self, position, removed, added):
+        self.identifier_index.update_blocks(self.document(), position, added)
+        if self.identifier_index.has_pending() and not self._index_timer.isActive():
+            self._index_timer.start()
+
+    def _index_next_slice(self):
+        if self.identifier_index.index_pending(INDEX_SLICE_SECONDS):
+            self._index_timer.start()
+
+    def set_project_folder(self, folder, current_file=None, identifier_index=None):
+        """Indexes the identifiers of the source files in folder in the background."""
+        identifier_index = identifier_index or self.identifier_index
+        identifier_index.project_folder = folder
+        scan_thread = ProjectScanThread(folder, current_file, identifier_index.known_files())
+        scan_thread.scan_finished.connect(self._on_project_scanned)
+        self._scan_threads[scan_thread] = identifier_index
+        scan_thread.start()
+
+    def _on_project_scanned(self, folder, scanned, present):
+        # The index of the document the scan was started for, which may no longer be shown
+        identifier_index = self._scan_threads.pop(self.sender(), None)
+        if identifier_index is not None:
+            identifier_index.update_files(folder, scanned, present)
+
     def insert_completion(self, completion):
         if self.completer.widget() != self:
             return
@@ -56,25 +134,124 @@ class CustomTextEdit(QTextEdit):
         start_of_word = current_pos
         while start_of_word > 0:
             char_before = self.document().characterAt(start_of_word - 1)
-            # Use Python's built-in isalnum() for string checks
-            if isinstance(char_before, str) and char_before.isalnum():
+            # Use Python's built-in isalnum() for string checks; identifiers may contain '_'
+            if isinstance(char_before, str) and (char_before.isalnum() or char_before == '_'):
                 start_of_word -= 1
             else:
                 break
         
+        tc.setPosition(start_of_word)
+        tc.setPosition(current_pos, QTextCursor.KeepAnchor)
+        typed_prefix = tc.selectedText()
         tc.setPosition(start_of_word)
         tc.movePosition(QTextCursor.EndOfWord, QTextCursor.KeepAnchor)
         tc.removeSelectedText()
         
         tc.insertText(completion)
         self.setTextCursor(tc)
+        self.completion_stats.record(completion, typed_prefix)
+        self._stats_timer.start()
 
     def text_under_cursor(self):
         tc = self.textCursor()
         tc.select(QTextCursor.WordUnderCursor)
         return tc.selectedText()
 
+    def completions(self, prefix):
+        """
+        Candidates for the word being typed, depending on what is in front of it. Each
+        source gives at most MAX_CANDIDATES names in alphabetical order, so names accepted
+        before are added even when they sort past that cut; the caller ranks and truncates.
+        """
+        cursor = self.textCursor()
+        before_word = cursor.block().text()[:max(0, cursor.positionInBlock() - len(prefix))]
+        kind, target = completion_context(before_word)
+        symbols = self.stdlib_symbols
+        with_identifiers = bool(prefix)
+        if kind == "member":
+            type_name = self._declared_type(target, cursor.position() - len(prefix))
+            if type_name is not None:
+                lookup = lambda text, limit: symbols.members(type_name, text, limit)
+                with_identifiers = False
+            else:
+                # Unknown type: any standard member, or a field of the project's own structs once typing starts
+                lookup = lambda text, limit: symbols.members(None, text, limit)
+        elif kind == "scope":
+            lookup = lambda text, limit: symbols.scope_members(target, text, limit)
+            with_identifiers = with_identifiers and target != "std"
+        else:
+            if not prefix:
+                return []
+            lookup = symbols.names
+        candidates = set(lookup(prefix, MAX_CANDIDATES))
+        if with_identifiers:
+            candidates.update(self.identifier_index.complete(prefix))
+        for name in self.completion_stats.matching(prefix):
+            if name in candidates:
+                continue
+            # Looking the name itself up lists its case variants first, so a few results are enough
+            if (with_identifiers and name != prefix and name in self.identifier_index) or name in lookup(name, 8):
+                candidates.add(name)
+        return sorted(candidates, key=str.lower)
+
+    def _declared_type(self, variable, member_start):
+        # Typing the member name keeps the same '.', so its variable is only looked up once
+        position, cached_variable, type_name = self._member_type
+        if position == member_start and cached_variable == variable:
+            return type_name
+        # Only the document before the cursor is searched for the variable's declaration
+        window = QTextCursor(self.document())
+        window.setPosition(max(0, member_start - DECLARATION_WINDOW_CHARS))
+        window.setPosition(member_start, QTextCursor.KeepAnchor)
+        type_name = self.stdlib_symbols.declared_type(variable, window.selectedText())
+        self._member_type = (member_start, variable, type_name)
+        return type_name
+
+    def _update_completer(self, prefix):
+        """Shows the completion popup for prefix, or hides it if nothing matches."""
+        if self.latency_probe is not None:
+            start = time.perf_counter()
+            self._show_completions(prefix)
+            self.latency_probe.add_completion(time.perf_counter() - start)
+        else:
+            self._show_completions(prefix)
+
+    def _show_completions(self, prefix):
+        candidates = self.completion_stats.rank(self.completions(prefix), prefix)[:MAX_CANDIDATES]
+        self.completion_model.setStringList(candidates)
+        self.completer.setCompletionPrefix(prefix)
+        if candidates:
+            if not self.completer.popup().isVisible():
+                self.completer.popup().show()
+            # Position the completer popup
+            cr = self.cursorRect()
+            cr.setWidth(self.completer.popup().sizeHint().width())
+            self.completer.complete(cr) # popup it
+            # The best-ranked candidate is preselected, so Enter accepts it
+            self.completer.popup().setCurrentIndex(self.completer.completionModel().index(0, 0))
+        elif self.completer.popup().isVisible():
+            self.completer.popup().hide()
+
     def keyPressEvent(self, event: QKeyEvent):
+        probe = self.latency_probe
+        if probe is None:
+            self._handle_key_press(event)
+            return
+        probe.key_started()
+        try:
+            self._handle_key_press(event)
+        finally:
+            probe.key_finished()
+
+    def paintEvent(self, event):
+        probe = self.latency_probe
+        if probe is not None:
+            probe.paint_started()
+        super().paintEvent(event)
+        if probe is not None:
+            probe.paint_finished()
+
+    def _handle_key_press(self, event):
         if self.completer and self.completer.popup().isVisible():
             # Allow Tab, Enter, Return to accept completion
             if event.key() in (Qt.Key_Enter, Qt.Key_Return):
@@ -124,21 +301,13 @@ class CustomTextEdit(QTextEdit):
         
         super().keyPressEvent(event)
 
-        if event.text().isalnum() or event.key() == Qt.Key_Backspace: # Check for alphanumeric or backspace
+        if self.completer and event.text() in ('.', '>', ':'):
+            # Members right after "v.", "p->" and "std::"; nothing for other uses of these characters
+            self._update_completer("")
+        elif event.text().isalnum() or event.text() == '_' or event.key() == Qt.Key_Backspace: # Check for identifier characters or backspace
             prefix = self.text_under_cursor()
             if self.completer and prefix:
-                self.completer.setCompletionPrefix(prefix)
-                # If there are completions available for the prefix and popup not visible
-                if self.completer.completionModel().rowCount() > 0:
-                    if not self.completer.popup().isVisible():
-                        self.completer.popup().show()
-                    # Position the completer popup
-                    cr = self.cursorRect()
-                    cr.setWidth(self.completer.popup().sizeHint().width())
-                    self.completer.complete(cr) # popup it
-                elif self.completer.popup().isVisible():
-                    # If no completions or prefix is empty, hide popup
-                    self.completer.popup().hide()
+                self._update_completer(prefix)
             elif self.completer and self.completer.popup().isVisible():
                 # If there's no prefix (e.g., deleted character), hide completer
                 self.completer.popup().hide()
@@ -146,10 +315,23 @@ class CustomTextEdit(QTextEdit):
             self.completer.popup().hide()
 
 
+class CustomTextEdit(CodeEditorMixin, QTextEdit):
+    """
+    Code editor on top of the rich-text QTextEdit. Every edit relayouts the whole
+    document, so it only suits small sources; the IDE uses CustomPlainTextEdit.
+    """
+
+
+class CustomPlainTextEdit(CodeEditorMixin, QPlainTextEdit):
+    """
+    Code editor on top of QPlainTextEdit, whose layout only touches the blocks that
+    changed. Scrolling, typing and toPlainText() stay fast on very large files.
+    """
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
-    editor = CustomTextEdit()
+    editor = CustomPlainTextEdit()
     editor.setWindowTitle("Custom C++ Editor with Autocomplete")
     editor.resize(800, 600)
     editor.show()
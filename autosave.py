@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from PySide6.QtCore import QThread, Signal
+
+from paths import app_data_dir
+
+JOURNAL_DELAY_MS = 1500  # Longest a change waits before it is journaled; at most this much work is lost in a crash
+SAVE_WAIT_SECONDS = 5.0  # How long a build waits for a queued save to reach the disk
+
+
+def default_recovery_dir():
+    return app_data_dir("recovery")
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _temp_path(path, temp_dir):
+    """Where write_atomic writes before renaming: in temp_dir if a rename from there stays on one file system."""
+    folder = os.path.dirname(os.path.abspath(path))
+    if temp_dir:
+        try:
+            os.makedirs(temp_dir, exist_ok=True)
+            if os.stat(temp_dir).st_dev == os.stat(folder).st_dev:
+                name = hashlib.sha1(os.path.abspath(path).encode("utf-8", "surrogatepass")).hexdigest()[:16]
+                return os.path.join(temp_dir, name + ".tmp")
+        except OSError:
+            pass
+    return path + ".tmp"
+
+
+def write_atomic(path, text, durable=True, temp_dir=None):
+    """
+    Writes text to a temporary file and renames it into place, so a crash leaves either
+    the old or the new file, never half of one. Keeps the file's permissions. The
+    temporary file goes to temp_dir when given, so none shows up next to the user's
+    sources, unless that folder is on another file system.
+    """
+    temp_path = _temp_path(path, temp_dir)
+    with open(temp_path, "w") as f:
+        f.write(text)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    if os.path.exists(path):
+        try:
+            shutil.copymode(path, temp_path)
+        except OSError:
+            pass
+    os.replace(temp_path, path)
+
+
+class RecoveryEntry:
+    def __init__(self, journal_path, path, title, text, saved_at, document_id=None):
+        self.journal_path = journal_path # The journal file this was read from
+        self.path = path                 # File the text belongs to, None for an untitled file
+        self.document_id = document_id   # Journal key of an untitled file, reused when it is restored
+        self.title = title               # File name shown to the user
+        self.text = text                 # Editor content at the last snapshot
+        self.saved_at = saved_at         # time.time() of the snapshot
+
+
+def find_recovery_entries(recovery_dir=None):
+    """
+    Journals left behind by a session that ended with unsaved changes, newest first.
+    Journals whose text is already what the file holds on disk are deleted instead.
+    """
+    recovery_dir = recovery_dir or default_recovery_dir()
+    try:
+        names = [name for name in os.listdir(recovery_dir) if name.endswith(".json")]
+    except OSError:
+        return []
+    entries = []
+    for name in names:
+        journal_path = os.path.join(recovery_dir, name)
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entry = RecoveryEntry(journal_path, data.get("path"), data["title"], data["text"], data["time"],
+                                  data.get("id"))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            continue # Not one of ours, or unreadable; leave it alone
+        if entry.path:
+            try:
+                with open(entry.path, "r") as f:
+                    on_disk = f.read()
+            except (OSError, ValueError):
+                on_disk = None
+            if on_disk == entry.text:
+                discard_journal_file(journal_path)
+                continue
+        entries.append(entry)
+    entries.sort(key=lambda entry: entry.saved_at, reverse=True)
+    return entries
+
+
+def discard_journal_file(journal_path):
+    try:
+        os.remove(journal_path)
+    except OSError:
+        pass
+
+
+class AutosaveWorker(QThread):
+    """
+    Writes files and recovery journals on a background thread, so neither Ctrl+S nor the
+    periodic snapshots stop the editor. Jobs run in the order they were queued. Content
+    that hashes the same as what was last written for a path is not written again.
+    """
+    save_finished = Signal(int, str, bool)  # Save id, path, False if the file already held this content
+    save_failed = Signal(int, str, str)     # Save id, path, error message
+
+    def __init__(self, recovery_dir=None, parent=None):
+        super().__init__(parent)
+        self.recovery_dir = recovery_dir or default_recovery_dir()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._saves_pending = 0  # Saves queued or being written
+        self._next_id = 1
+        self._journal_latest = {} # Journal path -> sequence of its newest snapshot; older queued ones are skipped
+        self._journal_sequence = 0
+        self._saved_hashes = {}   # File path -> (content hash, file_stamp) after we last read or wrote it
+        self._journal_hashes = {} # Journal path -> hash of the text it holds
+
+    def journal_path(self, path, document_id=None):
+        """Journal file of a document: by path, or by document_id while it is untitled (path None)."""
+        key = os.path.normcase(os.path.abspath(path)) if path else "untitled:" + (document_id or "")
+        return os.path.join(self.recovery_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".json")
+
+    def save(self, path, text):
+        """Queues writing text to path and returns the save id reported by save_finished or save_failed."""
+        with self._lock:
+            save_id = self._next_id
+            self._next_id += 1
+            self._saves_pending += 1
+        self._queue.put(("save", save_id, path, text))
+        return save_id
+
+    def journal(self, path, title, text, document_id=None):
+        """Queues a recovery snapshot of an unsaved document."""
+        journal_path = self.journal_path(path, document_id)
+        with self._lock:
+            self._journal_sequence += 1
+            self._journal_latest[journal_path] = self._journal_sequence
+            sequence = self._journal_sequence
+        self._queue.put(("journal", sequence, path, (title, text, document_id)))
+
+    def discard_journal(self, path, document_id=None):
+        """Queues removing the snapshot of a document whose changes were saved or thrown away."""
+        self._queue.put(("discard", 0, path, document_id))
+
+    def remember(self, path, text):
+        """Tells the worker what a file holds after it was opened, so saving it unchanged writes nothing."""
+        self._queue.put(("remember", 0, path, text))
+
+    def wait_until_saved(self, timeout=SAVE_WAIT_SECONDS):
+        """Blocks until every queued save is on disk; False if that took longer than timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._saves_pending == 0, timeout)
+
+    def stop(self):
+        """Ends the thread once everything queued so far has been written."""
+        self._queue.put((None, 0, None, None))
+
+    def run(self):
+        while True:
+            kind, number, path, payload = self._queue.get()
+            if kind is None:
+                break
+            if kind == "save":
+                self._save(number, path, payload)
+            elif kind == "journal":
+                self._journal(number, path, *payload)
+            elif kind == "discard":
+                self._discard(path, payload)
+            elif kind == "remember":
+                self._saved_hashes[path] = (content_hash(payload), file_stamp(path))
+
+    def _save(self, save_id, path, text):
+        try:
+            digest = content_hash(text)
+            # Written unless the file still holds exactly this text and nobody touched it since
+            written = self._saved_hashes.get(path) != (digest, file_stamp(path))
+            if written:
+                write_atomic(path, text, temp_dir=self.recovery_dir)
+                self._saved_hashes[path] = (digest, file_stamp(path))
+            self._discard(path)
+        except Exception as e:
+            self._saved_hashes.pop(path, None)
+            self.save_failed.emit(save_id, path, str(e))
+        else:
+            self.save_finished.emit(save_id, path, written)
+        finally:
+            with self._idle:
+                self._saves_pending -= 1
+                self._idle.notify_all()
+
+    def _journal(self, sequence, path, title, text, document_id):
+        journal_path = self.journal_path(path, document_id)
+        with self._lock:
+            if self._journal_latest.get(journal_path) != sequence:
+                return # A newer snapshot of the same document is queued behind this one
+        digest = content_hash(text)
+        if self._journal_hashes.get(journal_path) == digest:
+            return
+        data = {"path": path, "id": document_id, "title": title, "time": time.time(), "text": text}
+        try:
+            os.makedirs(self.recovery_dir, exist_ok=True)
+            write_atomic(journal_path, json.dumps(data))
+            self._journal_hashes[journal_path] = digest
+        except (OSError, ValueError):
+            pass # The next snapshot tries again
+
+    def _discard(self, path, document_id=None):
+        journal_path = self.journal_path(path, document_id)
+        self._journal_hashes.pop(journal_path, None)
+        discard_journal_file(journal_path)
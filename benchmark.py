@@ -0,0 +1,280 @@
+"""
+Headless micro-benchmarks for the editor's hot paths.
+
+    python benchmark.py                          # print a table
+    python benchmark.py --output results.json    # also save the results
+    python benchmark.py --compare results.json   # compare with a saved run
+
+Runs on the offscreen Qt platform, so no display is needed. Results are saved as
+JSON together with the git commit they were measured on.
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import PySide6
+from PySide6.QtCore import QEvent, Qt
+from PySide6.QtGui import QKeyEvent, QTextCursor, QTextDocument
+from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QTreeView
+
+from auto_close import CustomPlainTextEdit, CustomTextEdit
+from document_tabs import DocumentTabs
+from project_tree import ProjectTreeModel
+from file_manager import FileManager
+from syntax_highlighter import CppSyntaxHighlighter
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+BENCHMARKS = ("highlight", "keypress", "load", "save")
+EDITORS = {"plain": CustomPlainTextEdit, "rich": CustomTextEdit}
+
+# Typed into the editor by the keypress benchmark; identifiers keep the completer busy
+TYPED_TEXT = "vector<int> values; for (int index = 0; index < count; index++) values.push_back(index); "
+
+# Lines the synthetic sources are built from, covering every token kind the highlighter knows
+SOURCE_TEMPLATE = [
+    '#include <bits/stdc++.h>',
+    '#define MAXN 200005 // upper bound',
+    'using namespace std;',
+    '/* segment tree over the input array,',
+    '   rebuilt for every "query" block */',
+    'struct Node{n} {{',
+    '    long long sum = 0, lazy = 0x1F; // packed',
+    '    vector<int> children;',
+    '}};',
+    'static const char* NAME_{n} = "node \\"{n}\\" (leaf) // not a comment";',
+    'auto pattern_{n} = R"re(\\d+ ( ) "quoted")re";',
+    'int solve_{n}(int n, const vector<int>& a) {{',
+    '    int64_t best = 1.5e-9 + 1\'000\'000;',
+    '    for (int i = 0; i < n; ++i) best = max(best, (int64_t)a[i] * {n});',
+    '    if (best < 0) return -1; else return (int)(best % 1000000007);',
+    '}}',
+]
+
+
+class BenchmarkResult:
+    def __init__(self, name, size, unit, samples):
+        self.name = name       # Benchmark name, e.g. "highlight"
+        self.size = size       # Lines in the document the benchmark ran on
+        self.unit = unit       # Unit of the samples
+        self.samples = samples # One measurement per repetition (or per key press)
+
+    @property
+    def median(self):
+        return statistics.median(self.samples)
+
+    @property
+    def p99(self):
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    def key(self):
+        return f"{self.name}[{self.size}]"
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "size": self.size,
+            "unit": self.unit,
+            "median": self.median,
+            "min": min(self.samples),
+            "max": max(self.samples),
+            "p99": self.p99,
+            "samples": self.samples,
+        }
+
+
+def synthetic_source(lines):
+    """Returns a C++ source of exactly `lines` lines."""
+    result = []
+    n = 0
+    while len(result) < lines:
+        result.extend(line.format(n=n) for line in SOURCE_TEMPLATE)
+        n += 1
+    return "\n".join(result[:lines])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_highlight(app, editor_class, size, repeat):
+    """Full rehighlight of a document, i.e. highlightBlock on every block."""
+    document = QTextDocument()
+    document.setPlainText(synthetic_source(size))
+    highlighter = CppSyntaxHighlighter(document)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        highlighter.rehighlight()
+        samples.append(time.perf_counter() - start)
+    # Reported as throughput so sizes can be compared with each other
+    return BenchmarkResult("highlight", size, "lines/s", [size / sample for sample in samples])
+
+
+def bench_keypress(app, editor_class, size, repeat):
+    """keyPressEvent latency while typing identifiers in the middle of a document, completer active."""
+    editor = editor_class()
+    CppSyntaxHighlighter(editor.document()).watch_viewport(editor)
+    editor.resize(1000, 700)
+    editor.show()
+    editor.setPlainText(synthetic_source(size))
+    app.processEvents()
+
+    cursor = editor.textCursor()
+    cursor.setPosition(editor.document().findBlockByNumber(size // 2).position())
+    editor.setTextCursor(cursor)
+    samples = []
+    for _ in range(repeat):
+        for char in TYPED_TEXT:
+            key = ord(char.upper()) if char.isalnum() else Qt.Key_unknown
+            event = QKeyEvent(QEvent.KeyPress, key, Qt.NoModifier, char)
+            start = time.perf_counter()
+            editor.keyPressEvent(event)
+            samples.append((time.perf_counter() - start) * 1000)
+            app.processEvents()
+    editor.completer.popup().hide()
+    editor.close()
+    return BenchmarkResult("keypress", size, "ms", samples)
+
+
+def _file_manager(editor_class):
+    window = QMainWindow()
+    editor = editor_class()
+    document_tabs = DocumentTabs(editor) # Gives every opened document its highlighter
+    window.setCentralWidget(editor)
+    model = ProjectTreeModel()
+    tree_view = QTreeView()
+    tree_view.setModel(model)
+    manager = FileManager(window, editor, model, tree_view, lambda: None, document_tabs)
+    # Answer any dialog straight away
+    manager._show_message_box = lambda *args, **kwargs: QMessageBox.Ok
+    manager.autosave.start()
+    return window, manager
+
+
+def _close_file_manager(window, manager):
+    manager.shutdown()
+    window.close()
+
+
+def bench_load(app, editor_class, size, repeat):
+    """FileManager._load_file_into_editor on a file of `size` lines."""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "solution.cpp")
+        with open(path, "w") as f:
+            f.write(synthetic_source(size))
+        window, manager = _file_manager(editor_class)
+        samples = []
+        for _ in range(repeat):
+            open_document = manager.document_tabs.find(path)
+            if open_document is not None:
+                manager.document_tabs.remove(open_document) # Otherwise loading only shows its tab again
+            start = time.perf_counter()
+            manager._load_file_into_editor(path)
+            samples.append(time.perf_counter() - start)
+            app.processEvents()
+        _close_file_manager(window, manager)
+    return BenchmarkResult("load", size, "s", samples)
+
+
+def bench_save(app, editor_class, size, repeat):
+    """How long FileManager.save_note holds up the editor for a `size`-line document; the write is in the background."""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "solution.cpp")
+        window, manager = _file_manager(editor_class)
+        manager.editor.setPlainText(synthetic_source(size))
+        manager.file_path = path
+        manager.file_name = "solution.cpp"
+        samples = []
+        for number in range(repeat):
+            manager.editor.moveCursor(QTextCursor.End)
+            manager.editor.insertPlainText(f"// {number}\n") # Unchanged content would not be written at all
+            manager.is_unsaved = True
+            start = time.perf_counter()
+            manager.save_note()
+            samples.append(time.perf_counter() - start)
+            manager.autosave.wait_until_saved()
+        _close_file_manager(window, manager)
+    return BenchmarkResult("save", size, "s", samples)
+
+
+def run_benchmarks(names, sizes, repeat, editor_class=CustomPlainTextEdit):
+    app = QApplication.instance() or QApplication(sys.argv)
+    functions = {"highlight": bench_highlight, "keypress": bench_keypress, "load": bench_load, "save": bench_save}
+    results = []
+    for name in names:
+        for size in sizes:
+            result = functions[name](app, editor_class, size, repeat)
+            print(format_result(result), flush=True)
+            results.append(result)
+    return results
+
+
+def format_result(result):
+    return f"{result.key():<20} median {result.median:>12.4f} {result.unit:<8} p99 {result.p99:>12.4f}"
+
+
+def compare(results, baseline_path):
+    """Prints the change of every median relative to a saved run."""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    previous = {f"{entry['name']}[{entry['size']}]": entry for entry in baseline["results"]}
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for result in results:
+        entry = previous.get(result.key())
+        if entry is None:
+            print(f"{result.key():<20} (not in baseline)")
+            continue
+        change = (result.median - entry["median"]) / entry["median"] * 100 if entry["median"] else 0.0
+        # Throughput gets better as it grows, latencies as they shrink
+        better = change > 0 if result.unit.endswith("/s") else change < 0
+        verdict = "better" if better else "worse"
+        print(f"{result.key():<20} {entry['median']:>12.4f} -> {result.median:>12.4f} {result.unit:<8} "
+              f"{change:+7.1f}% ({verdict})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FeatherIDE editor micro-benchmarks")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="benchmarks to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="document sizes in lines")
+    parser.add_argument("--editor", choices=sorted(EDITORS), default="plain",
+                        help="editor widget used by the keypress, load and save benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per benchmark")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.sizes, args.repeat, EDITORS[args.editor])
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pyside6": PySide6.__version__,
+            "platform": platform.platform(),
+            "editor": args.editor,
+            "repeat": args.repeat,
+            "results": [result.to_dict() for result in results],
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,36 @@
+import html
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QTabWidget, QTextEdit, QLineEdit, QPushButton, QHBoxLayout
+    QWidget, QVBoxLayout, QTabWidget, QTextEdit, QLineEdit, QPushButton, QHBoxLayout,
+    QTableWidget, QTableWidgetItem, QHeaderView, QLabel, QCheckBox
 )
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QTextCharFormat, QTextCursor
+
+from execution import format_memory, format_seconds, format_usage
+
+VERDICT_COLORS = {
+    "AC": "#4caf50",
+    "WA": "#f44336",
+    "TLE": "#ff9800",
+    "MLE": "#ff5722",
+    "OLE": "#795548",
+    "RE": "#9c27b0",
+}
+
+
+def append_plain_text(text_edit, text):
+    """
+    Appends a paragraph as plain text. QTextEdit.append guesses whether text is HTML,
+    so program output such as <vector> or a<b>c would be parsed instead of shown.
+    """
+    scroll_bar = text_edit.verticalScrollBar()
+    at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+    text_edit.append("")
+    cursor = text_edit.textCursor()
+    cursor.movePosition(QTextCursor.End)
+    cursor.insertText(text, QTextCharFormat())
+    if at_bottom:
+        scroll_bar.setValue(scroll_bar.maximum())
 
 
 class BottomTabsWidget(QTabWidget):
@@ -14,6 +43,42 @@ class BottomTabsWidget(QTabWidget):
         self.build_output.setPlaceholderText("Build messages will appear here...")
         self.addTab(self.build_output, "Build Output")
 
+        # === Tests Tab ===
+        self.tests_widget = QWidget()
+        self.tests_layout = QVBoxLayout(self.tests_widget)
+
+        self.tests_summary = QLabel("Run tests from the Build menu to check the solution against .in/.out files.")
+        self.tests_table = QTableWidget(0, 6)
+        self.tests_table.setHorizontalHeaderLabels(["Test", "Verdict", "Wall", "CPU (user+sys)", "Memory", "Details"])
+        self.tests_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
+        self.tests_table.verticalHeader().setVisible(False)
+        self.tests_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self._test_rows = {} # Test name -> table row
+
+        self.tests_layout.addWidget(self.tests_summary)
+        self.tests_layout.addWidget(self.tests_table)
+
+        self.addTab(self.tests_widget, "Tests")
+
+        # === Stress Test Tab ===
+        self.stress_widget = QWidget()
+        self.stress_layout = QVBoxLayout(self.stress_widget)
+
+        self.stress_status = QLabel("Stress testing compares the solution against brute.cpp on inputs from gen.cpp.")
+        self.stop_stress_button = QPushButton("Stop")
+        self.stop_stress_button.setEnabled(False)
+        self.stress_log = QTextEdit()
+        self.stress_log.setReadOnly(True)
+
+        stress_status_layout = QHBoxLayout()
+        stress_status_layout.addWidget(self.stress_status, 1)
+        stress_status_layout.addWidget(self.stop_stress_button)
+
+        self.stress_layout.addLayout(stress_status_layout)
+        self.stress_layout.addWidget(self.stress_log)
+
+        self.addTab(self.stress_widget, "Stress Test")
+
         # === AI Chat Tab ===
         self.chat_widget = QWidget()
         self.chat_layout = QVBoxLayout(self.chat_widget)
@@ -25,10 +90,22 @@ class BottomTabsWidget(QTabWidget):
         self.chat_input = QLineEdit()
         self.chat_input.setPlaceholderText("Type your message to the AI...")
         self.send_chat_button = QPushButton("Send")
+        self.stop_ai_button = QPushButton("Stop")
+        self.stop_ai_button.setToolTip("Stop the answer that is streaming; queued questions still run")
+        self.new_chat_button = QPushButton("New Chat")
+        self.new_chat_button.setToolTip("Forget the conversation so far")
+        self.ai_queue_label = QLabel("")
+        self.ai_cache_checkbox = QCheckBox("Cached answers")
+        self.ai_cache_checkbox.setChecked(True)
+        self.ai_cache_checkbox.setToolTip("Answer repeated questions from the cache; uncheck to ask the model again")
 
         chat_input_layout = QHBoxLayout()
         chat_input_layout.addWidget(self.chat_input)
+        chat_input_layout.addWidget(self.ai_queue_label)
+        chat_input_layout.addWidget(self.ai_cache_checkbox)
         chat_input_layout.addWidget(self.send_chat_button)
+        chat_input_layout.addWidget(self.stop_ai_button)
+        chat_input_layout.addWidget(self.new_chat_button)
 
         self.chat_layout.addWidget(self.chat_display)
         self.chat_layout.addLayout(chat_input_layout)
@@ -46,3 +123,114 @@ class BottomTabsWidget(QTabWidget):
         self.notes_widget.setLayout(self.notes_layout)
 
         self.addTab(self.notes_widget, "Notes")
+
+    def reset_tests(self, cases):
+        """Fills the tests table with one pending row per test case."""
+        self.tests_table.setRowCount(len(cases))
+        self._test_rows = {}
+        for row, case in enumerate(cases):
+            self._test_rows[case.name] = row
+            self.tests_table.setItem(row, 0, QTableWidgetItem(case.name))
+            for column in range(1, self.tests_table.columnCount()):
+                self.tests_table.setItem(row, column, QTableWidgetItem(""))
+            self.tests_table.item(row, 1).setText("...")
+
+    def show_test_result(self, result):
+        """Updates the row of a finished test with its verdict."""
+        row = self._test_rows.get(result.case.name)
+        if row is None:
+            return
+        verdict_item = QTableWidgetItem(result.verdict)
+        verdict_item.setForeground(QColor(VERDICT_COLORS.get(result.verdict, "#cccccc")))
+        self.tests_table.setItem(row, 1, verdict_item)
+        self.tests_table.setItem(row, 2, QTableWidgetItem(format_seconds(result.duration)))
+        outcome = result.outcome
+        if outcome is not None and outcome.cpu_time is not None:
+            cpu_text = f"{format_seconds(outcome.cpu_time)} ({format_seconds(outcome.user_time)} + {format_seconds(outcome.sys_time)})"
+            self.tests_table.setItem(row, 3, QTableWidgetItem(cpu_text))
+            self.tests_table.setItem(row, 4, QTableWidgetItem(format_memory(outcome.peak_rss)))
+        self.tests_table.setItem(row, 5, QTableWidgetItem(result.detail))
+
+    def show_tests_summary(self, results, elapsed):
+        """Shows the pass count once every test has finished."""
+        passed = sum(1 for result in results if result.verdict == "AC")
+        summary = f"{passed}/{len(results)} passed in {elapsed:.2f} s"
+        outcomes = [result.outcome for result in results if result.outcome is not None and result.outcome.cpu_time is not None]
+        if outcomes:
+            slowest = max(outcome.cpu_time for outcome in outcomes)
+            heaviest = max(outcome.peak_rss for outcome in outcomes)
+            summary += f" | max CPU {format_seconds(slowest)}, max memory {format_memory(heaviest)}"
+        self.tests_summary.setText(summary)
+
+    def show_program_run(self, outcome):
+        """Appends the output and resource usage of a Build and Run to the build output."""
+        if outcome.error is not None:
+            self.append_build_output(f"Could not run program: {outcome.error}")
+            return
+        text = outcome.stdout.decode(errors="replace")
+        if len(text) > 20000:
+            text = text[:20000] + "\n... (output truncated)"
+        if text:
+            self.append_build_output(text)
+
+        if outcome.timed_out:
+            status = "Program stopped: time limit exceeded"
+        elif outcome.output_exceeded:
+            status = "Program stopped: output limit exceeded"
+        elif outcome.memory_exceeded:
+            status = f"Program stopped: memory limit exceeded ({outcome.exit_description()})"
+        else:
+            status = f"Program exited: {outcome.exit_description()}"
+        self.append_build_output(f"{status} | {format_usage(outcome)}")
+
+    def show_stress_progress(self, done, rate):
+        self.stress_status.setText(f"{done} iterations, {rate:.1f} it/s")
+
+    def show_stress_failure(self, failure):
+        """Reports the first input on which the solution disagrees with the brute force."""
+        # Program output and file names may contain < and &, so only the verdict is markup
+        self.stress_log.append(f"<b>{html.escape(failure.verdict)}</b> on seed {failure.seed}: "
+                               f"{html.escape(failure.detail)}")
+        if failure.usage:
+            append_plain_text(self.stress_log, f"Solution run: {failure.usage}")
+        if failure.saved_input_path:
+            append_plain_text(self.stress_log, f"Failing input saved to {failure.saved_input_path}")
+        preview = failure.input_data.decode(errors="replace")
+        if len(preview) > 2000:
+            preview = preview[:2000] + "\n..."
+        append_plain_text(self.stress_log, "Input:")
+        append_plain_text(self.stress_log, preview)
+        append_plain_text(self.stress_log, "Expected (brute force):")
+        append_plain_text(self.stress_log, failure.expected.decode(errors="replace")[:2000])
+        append_plain_text(self.stress_log, "Got:")
+        append_plain_text(self.stress_log, failure.actual.decode(errors="replace")[:2000])
+
+    def append_build_output(self, text):
+        append_plain_text(self.build_output, text)
+
+    def show_stress_error(self, message):
+        self.stress_log.append(f"<i style='color: red;'>{html.escape(message)}</i>")
+
+    def show_stress_finished(self, done, elapsed):
+        rate = done / elapsed if elapsed > 0 else 0.0
+        self.stress_status.setText(f"Finished: {done} iterations in {elapsed:.2f} s ({rate:.1f} it/s)")
+        self.stress_log.append(f"Stress test stopped after {done} passing iterations.")
+        self.stop_stress_button.setEnabled(False)
+
+    def start_ai_answer(self):
+        """Starts the 'AI:' paragraph that streamed text is appended to."""
+        self.chat_display.append("<b>AI:</b> ")
+
+    def append_ai_text(self, text):
+        """Appends streamed answer text as plain text, so code with < and > shows as written."""
+        cursor = self.chat_display.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text, QTextCharFormat())
+        scroll_bar = self.chat_display.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+
+    def show_ai_stats(self, stats):
+        self.chat_display.append(f"<i style='color: gray;'>{stats.summary()}</i>")
+
+    def show_ai_queue(self, waiting):
+        self.ai_queue_label.setText(f"{waiting} queued" if waiting else "")
@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+from PySide6.QtCore import QObject, QProcess, Signal
+
+
+def executable_path_for(output_path):
+    """Returns the path g++ actually writes for the given -o argument."""
+    if sys.platform == "win32" and not output_path.lower().endswith(".exe"):
+        return output_path + ".exe"
+    return output_path
+
+
+class BuildResult:
+    """
+    Structured outcome of a single compiler run.
+    """
+    def __init__(self, source_path, artifact_path, command, exit_code, duration, cancelled=False, cached=False):
+        self.source_path = source_path     # The .cpp file that was compiled
+        self.artifact_path = artifact_path # The executable produced (may not exist on failure)
+        self.command = command             # The command line, for display purposes
+        self.exit_code = exit_code         # Compiler exit code (-1 if it never ran or crashed)
+        self.duration = duration           # Wall-clock seconds spent compiling
+        self.cancelled = cancelled         # True if the user stopped the build
+        self.cached = cached               # True if the executable came from the compile cache
+
+    @property
+    def success(self):
+        return not self.cancelled and self.exit_code == 0
+
+    def summary(self):
+        """One-line description used at the end of the build output."""
+        if self.cancelled:
+            return f"Build cancelled after {self.duration:.2f} s."
+        if self.cached:
+            return f"Build successful! (cached, {self.duration * 1000:.0f} ms)"
+        if self.success:
+            return f"Build successful! ({self.duration:.2f} s)"
+        return f"Build failed! (exit code {self.exit_code}, {self.duration:.2f} s)"
+
+
+class BuildEngine(QObject):
+    """
+    Runs the compiler in a QProcess so the GUI thread never waits on g++.
+    Compiler output is streamed line by line through output_line, and a
+    BuildResult is delivered through build_finished once the process exits.
+    If a CompileCache is given, unchanged sources are served from it without
+    running the compiler at all; if a PchManager is given, the include prologue
+    is precompiled and reused across builds.
+    """
+    build_started = Signal(str)      # Command line being executed
+    output_line = Signal(str, bool)  # Line of compiler output, True if it came from stderr
+    build_finished = Signal(object)  # BuildResult
+
+    def __init__(self, compiler="g++", flags=None, cache=None, pch=None, parent=None):
+        super().__init__(parent)
+        self.compiler = compiler         # Compiler executable, looked up on PATH
+        self.flags = list(flags or [])   # Extra compiler flags, e.g. ["-O2", "-std=c++17"]
+        self.cache = cache               # Optional CompileCache
+        self.pch = pch                   # Optional PchManager
+        if self.pch is not None:
+            self.pch.message.connect(lambda text: self.output_line.emit(text, False))
+
+        self._process = None
+        self._source_path = None
+        self._artifact_path = None
+        self._command = ""
+        self._start_time = 0.0
+        self._cancelled = False
+        self._buffers = {False: "", True: ""}
+        self._cache_key = None
+        self._pch_entry = None
+        self._pch_flags = []
+
+    def is_running(self):
+        return self._process is not None
+
+    def build_command(self, source_path, output_path):
+        """Returns the argument list passed to the compiler (without the compiler itself)."""
+        return [source_path, "-o", output_path] + self.flags
+
+    def start(self, source_path, output_path):
+        """
+        Starts compiling source_path into output_path.
+        Returns False if another build is still running.
+        """
+        if self.is_running():
+            return False
+
+        self._source_path = source_path
+        self._artifact_path = executable_path_for(output_path)
+        self._command = self._format_command(self.build_command(source_path, output_path))
+        self._cancelled = False
+        self._buffers = {False: "", True: ""}
+        self._cache_key = None
+        self._start_time = time.perf_counter()
+
+        if self.cache is not None:
+            self._cache_key = self.cache.key_for(source_path, self.compiler, self.flags)
+            if self._cache_key and self.cache.fetch(self._cache_key, self._artifact_path):
+                self.build_started.emit(self._command)
+                self.output_line.emit(f"Compile cache hit: source unchanged, g++ skipped ({self.cache.stats_text()})", False)
+                result = BuildResult(
+                    source_path,
+                    self._artifact_path,
+                    self._command,
+                    0,
+                    time.perf_counter() - self._start_time,
+                    cached=True,
+                )
+                self._cache_key = None
+                self._pch_entry = None
+                self._pch_flags = []
+                self.build_finished.emit(result) # Last: a handler may start the next build right away
+                return True
+
+        self._pch_entry = None
+        self._pch_flags = []
+        if self.pch is not None:
+            self._pch_entry = self.pch.entry_for(source_path, self.compiler, self.flags)
+            self._pch_flags = self.pch.flags_for(self._pch_entry)
+        args = self.build_command(source_path, output_path) + self._pch_flags
+        self._command = self._format_command(args)
+
+        self._process = QProcess(self)
+        self._process.setWorkingDirectory(os.path.dirname(source_path))
+        self._process.readyReadStandardOutput.connect(lambda: self._read_channel(False))
+        self._process.readyReadStandardError.connect(lambda: self._read_channel(True))
+        self._process.finished.connect(self._on_finished)
+        self._process.errorOccurred.connect(self._on_error)
+
+        self.build_started.emit(self._command)
+        if self._cache_key:
+            self.output_line.emit(f"Compile cache miss ({self.cache.stats_text()})", False)
+        self._start_time = time.perf_counter()
+        self._process.start(self.compiler, args)
+        return True
+
+    def _format_command(self, args):
+        return " ".join([self.compiler] + [f"\"{a}\"" if " " in a else a for a in args])
+
+    def cancel(self):
+        """Kills the running compiler, if any. build_finished is still emitted."""
+        if self._process is not None:
+            self._cancelled = True
+            self._process.kill()
+
+    def _read_channel(self, is_error):
+        if self._process is None:
+            return
+        if is_error:
+            data = self._process.readAllStandardError()
+        else:
+            data = self._process.readAllStandardOutput()
+        text = self._buffers[is_error] + bytes(data).decode(errors="replace")
+
+        # Only emit complete lines; keep the trailing fragment for the next chunk
+        lines = text.split("\n")
+        self._buffers[is_error] = lines.pop()
+        for line in lines:
+            self.output_line.emit(line.rstrip("\r"), is_error)
+
+    def _flush_buffers(self):
+        for is_error in (False, True):
+            if self._buffers[is_error]:
+                self.output_line.emit(self._buffers[is_error].rstrip("\r"), is_error)
+                self._buffers[is_error] = ""
+
+    def _on_error(self, error):
+        # FailedToStart never reaches finished(), so finish the build here
+        if error == QProcess.FailedToStart and self._process is not None:
+            self.output_line.emit(f"Could not start '{self.compiler}': {self._process.errorString()}", True)
+            self._finish(-1)
+
+    def _on_finished(self, exit_code, exit_status):
+        self._read_channel(False)
+        self._read_channel(True)
+        if exit_status == QProcess.CrashExit:
+            exit_code = -1
+        self._finish(exit_code)
+
+    def _finish(self, exit_code):
+        if self._process is None:
+            return
+        self._flush_buffers()
+        duration = time.perf_counter() - self._start_time
+        process = self._process
+        self._process = None
+        process.deleteLater()
+
+        result = BuildResult(
+            self._source_path,
+            self._artifact_path,
+            self._command,
+            exit_code,
+            duration,
+            cancelled=self._cancelled,
+        )
+        # build_finished handlers may start the next build, which replaces the state
+        # of this one, so all bookkeeping happens before it is emitted
+        cache_key, pch_entry, pch_flags = self._cache_key, self._pch_entry, self._pch_flags
+        self._cache_key = None
+        self._pch_entry = None
+        self._pch_flags = []
+        if result.success and cache_key and os.path.isfile(result.artifact_path):
+            self.cache.store(cache_key, result.artifact_path)
+        if result.success and pch_entry is not None:
+            comparison = self.pch.record_build(pch_entry, duration, bool(pch_flags))
+            if comparison:
+                self.output_line.emit(comparison, False)
+            if not pch_flags:
+                # Generate the .gch after the first plain build so the next one can use it
+                self.pch.build(pch_entry, self.compiler, self.flags)
+        self.build_finished.emit(result)
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+from PySide6.QtCore import QStandardPaths
+
+# Matches #include "local.h" so edits to project headers also change the cache key
+LOCAL_INCLUDE_RE = re.compile(r'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
+
+_compiler_versions = {}
+
+
+def cache_root():
+    """Per-user FeatherIDE cache directory."""
+    base = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "FeatherIDE")
+
+
+def default_cache_dir():
+    """Per-user cache directory for compiled executables."""
+    return os.path.join(cache_root(), "compile")
+
+
+def compiler_version(compiler):
+    """Returns the first line of `<compiler> --version`, cached per process."""
+    if compiler not in _compiler_versions:
+        try:
+            out = subprocess.run([compiler, "--version"], capture_output=True, text=True, timeout=10)
+            _compiler_versions[compiler] = out.stdout.splitlines()[0] if out.stdout else ""
+        except (OSError, subprocess.SubprocessError):
+            _compiler_versions[compiler] = ""
+    return _compiler_versions[compiler]
+
+
+class CompileCache:
+    """
+    Content-addressed store of compiled executables.
+    Entries are keyed on the source text, the locally included headers, the compiler
+    version and the flags; the least recently used entries are evicted once the
+    cache grows past max_bytes.
+    """
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes # Upper bound on the total size of cached executables
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, source_path, compiler, flags):
+        """Computes the cache key for a build, or None if the source can't be read."""
+        try:
+            with open(source_path, "rb") as f:
+                source = f.read()
+        except OSError:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(compiler_version(compiler).encode())
+        digest.update(b"\0" + "\0".join(flags).encode())
+        digest.update(b"\0" + sys.platform.encode())
+        digest.update(b"\0" + source)
+
+        # Local headers are part of the translation unit too
+        source_dir = os.path.dirname(source_path)
+        for header in LOCAL_INCLUDE_RE.findall(source.decode(errors="replace")):
+            header_path = os.path.join(source_dir, header)
+            try:
+                with open(header_path, "rb") as f:
+                    digest.update(b"\0" + header.encode() + b"\0" + f.read())
+            except OSError:
+                digest.update(b"\0" + header.encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        suffix = ".exe" if sys.platform == "win32" else ""
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def fetch(self, key, artifact_path):
+        """
+        Copies the cached executable for key to artifact_path.
+        Returns True on a hit; hit/miss counters are updated either way.
+        """
+        entry = self._entry_path(key)
+        if os.path.isfile(entry):
+            try:
+                shutil.copy2(entry, artifact_path)
+                os.utime(entry) # Mark as recently used
+                self.hits += 1
+                return True
+            except OSError:
+                pass
+        self.misses += 1
+        return False
+
+    def store(self, key, artifact_path):
+        """Adds a freshly built executable to the cache and enforces the size limit."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry = self._entry_path(key)
+            temp_entry = entry + ".tmp"
+            shutil.copy2(artifact_path, temp_entry)
+            os.replace(temp_entry, entry)
+            os.utime(entry)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats_text(self):
+        return f"{self.hits} hit(s), {self.misses} miss(es) this session"
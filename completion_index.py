@@ -0,0 +1,313 @@
+import json
+import math
+import os
+import re
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+from PySide6.QtCore import QThread, Signal
+
+from paths import app_data_dir
+
+# Identifiers of three or more characters; shorter names are quicker to type than to pick
+IDENTIFIER_RE = re.compile(r"(?<![A-Za-z0-9_])[A-Za-z_][A-Za-z0-9_]{2,}")
+MAX_CANDIDATES = 200        # Most names shown in the completion popup
+BULK_MERGE_NAMES = 64       # Above this many new names, merge them in with one sort instead of one insort each
+SCAN_BATCH_LINES = 256      # Lines scanned between two deadline checks of index_pending
+INDEX_SLICE_SECONDS = 0.01  # Time spent indexing per idle-time slice after a file is loaded
+
+# Files next to the open one whose identifiers are offered too
+PROJECT_EXTENSIONS = (".cpp", ".cc", ".cxx", ".c", ".h", ".hpp", ".hh")
+MAX_PROJECT_FILE_BYTES = 1024 * 1024
+MAX_PROJECT_FILES = 200
+
+# Ranking of the candidates by how often and how recently they were accepted
+RECENCY_HALF_LIFE_SECONDS = 24 * 3600
+MAX_STATS_NAMES = 2000      # Least useful names are dropped from the stats file beyond this
+
+
+def scan_identifiers(text):
+    """Identifiers in a piece of source, with repetitions."""
+    return IDENTIFIER_RE.findall(text)
+
+
+def prefix_matches(entries, prefix, limit=MAX_CANDIDATES, skip=None):
+    """Names starting with prefix (case-insensitive) from a sorted list of (name.lower(), name)."""
+    key = prefix.lower()
+    index = bisect_left(entries, (key,))
+    matches = []
+    while index < len(entries) and len(matches) < limit:
+        lower, name = entries[index]
+        if not lower.startswith(key):
+            break
+        if skip is None or not skip(name):
+            matches.append(name)
+        index += 1
+    return matches
+
+
+class IdentifierIndex:
+    """
+    Identifiers of the open document and of the project files around it, plus a
+    fixed list of keywords and snippets. Names are reference counted and kept in
+    a list sorted by lowercase name, so a prefix lookup is one bisect.
+
+    The document is tracked per block: update_blocks rescans only the blocks a
+    contentsChange touched and swaps their names in and out. After a whole-document
+    change the blocks are only split into lines; index_pending scans them in slices.
+    """
+    def __init__(self, static_words=()):
+        self.counts = Counter()  # Name -> occurrences over all sources
+        self._entries = []       # Sorted (name.lower(), name) of every counted name
+        self._block_names = []   # Per block: its list of identifiers, or its text while not scanned yet
+        self._scan_from = 0      # No block before this one is waiting to be scanned
+        self._files = {}         # Project file path -> (mtime, Counter of its identifiers)
+        self.project_folder = None
+        self._add(static_words)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, name):
+        return self.counts[name] > 0
+
+    def _add(self, names):
+        new_names = []
+        counts = self.counts
+        for name in names:
+            if not counts[name]:
+                new_names.append(name)
+            counts[name] += 1
+        if len(new_names) > BULK_MERGE_NAMES:
+            # Two sorted runs: list.sort merges them in linear time
+            self._entries.extend(sorted((name.lower(), name) for name in new_names))
+            self._entries.sort()
+        else:
+            for name in new_names:
+                insort(self._entries, (name.lower(), name))
+
+    def _remove(self, names):
+        counts = self.counts
+        for name in names:
+            counts[name] -= 1
+            if counts[name] <= 0:
+                del counts[name]
+                del self._entries[bisect_left(self._entries, (name.lower(), name))]
+
+    # --- open document ---
+
+    def reset_document(self, document):
+        """Forgets the document's identifiers; its lines are scanned by index_pending."""
+        self.counts.subtract(Counter(chain.from_iterable(
+            names for names in self._block_names if isinstance(names, list))))
+        self.counts = +self.counts # Drops the names that are gone
+        self._entries = sorted((name.lower(), name) for name in self.counts)
+        self._block_names = document.toPlainText().split("\n")
+        self._scan_from = 0
+
+    def has_pending(self):
+        return self._scan_from < len(self._block_names)
+
+    def index_pending(self, seconds):
+        """Scans not yet indexed lines for about `seconds`. Returns True if some are left."""
+        blocks = self._block_names
+        deadline = time.perf_counter() + seconds
+        found = []
+        index = self._scan_from
+        while index < len(blocks) and time.perf_counter() < deadline:
+            for index in range(index, min(index + SCAN_BATCH_LINES, len(blocks))):
+                if isinstance(blocks[index], str):
+                    blocks[index] = scan_identifiers(blocks[index])
+                    found.extend(blocks[index])
+            index += 1
+        self._scan_from = index
+        self._add(found)
+        return self.has_pending()
+
+    def update_blocks(self, document, position, added):
+        """Rescans the blocks touched by a contentsChange(position, removed, added)."""
+        block_count = document.blockCount()
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(position + added).blockNumber()
+        if last < 0:
+            last = block_count - 1
+        # Blocks first..old_last were replaced by blocks first..last
+        old_last = last - (block_count - len(self._block_names))
+        if first < 0 or old_last < first - 1 or old_last >= len(self._block_names) or (
+                first == 0 and last == block_count - 1):
+            self.reset_document(document) # setPlainText, select all + paste, or lost track
+            return
+
+        block = document.findBlockByNumber(first)
+        fresh = []
+        for _ in range(last - first + 1):
+            fresh.append(scan_identifiers(block.text()))
+            block = block.next()
+        for names in self._block_names[first:old_last + 1]:
+            if isinstance(names, list):
+                self._remove(names)
+        self._block_names[first:old_last + 1] = fresh
+        # Unscanned lines may have shifted in front of the scan position
+        self._scan_from = min(self._scan_from, first)
+        for names in fresh:
+            self._add(names)
+
+    # --- project files ---
+
+    def known_files(self):
+        """Project file path -> mtime, as seen by the last scan."""
+        return {path: mtime for path, (mtime, _) in self._files.items()}
+
+    def update_files(self, folder, scanned, present):
+        """
+        Applies a ProjectScanThread result: `scanned` maps the files that changed to
+        (mtime, Counter), `present` lists every file still in the folder.
+        """
+        if folder != self.project_folder:
+            return # A newer folder was opened while this one was scanned
+        for path in [path for path in self._files if path not in present or path in scanned]:
+            _, names = self._files.pop(path)
+            self._remove(names.elements())
+        for path, (mtime, names) in scanned.items():
+            self._files[path] = (mtime, names)
+            self._add(names.elements())
+
+    # --- lookups ---
+
+    def complete(self, prefix, limit=MAX_CANDIDATES):
+        """Names starting with prefix (case-insensitive), in alphabetical order."""
+        # The word being typed is in the document too; only offer it if it occurs elsewhere
+        return prefix_matches(self._entries, prefix, limit,
+                              skip=lambda name: name == prefix and self.counts[name] <= 1)
+
+
+class ProjectScanThread(QThread):
+    """Collects the identifiers of the source files in one folder, skipping files that haven't changed."""
+    scan_finished = Signal(str, object, object) # Folder, {path: (mtime, Counter)} of changed files, set of present paths
+
+    def __init__(self, folder, exclude_path, known):
+        super().__init__()
+        self.folder = folder
+        # The open file, which is indexed from the editor instead
+        self.exclude_path = os.path.normcase(os.path.normpath(exclude_path)) if exclude_path else None
+        self.known = known # Path -> mtime from the previous scan
+
+    def run(self):
+        scanned = {}
+        present = set()
+        try:
+            entries = sorted(os.scandir(self.folder), key=lambda entry: entry.name)
+        except OSError:
+            entries = []
+        for entry in entries:
+            if len(present) >= MAX_PROJECT_FILES:
+                break
+            if not entry.name.lower().endswith(PROJECT_EXTENSIONS):
+                continue
+            if os.path.normcase(os.path.normpath(entry.path)) == self.exclude_path:
+                continue
+            try:
+                stat = entry.stat()
+                if not entry.is_file() or stat.st_size > MAX_PROJECT_FILE_BYTES:
+                    continue
+                present.add(entry.path)
+                if self.known.get(entry.path) == stat.st_mtime:
+                    continue
+                with open(entry.path, "r", errors="replace") as f:
+                    scanned[entry.path] = (stat.st_mtime, Counter(scan_identifiers(f.read())))
+            except OSError:
+                present.discard(entry.path)
+        self.scan_finished.emit(self.folder, scanned, present)
+
+
+def default_stats_path():
+    return app_data_dir("completion_stats.json")
+
+
+class CompletionStats:
+    """
+    How often and how recently each completion was accepted, kept in a small JSON
+    file. rank() orders candidates by match quality plus a usage score, so the
+    names you actually pick move to the top of the popup.
+    """
+    def __init__(self, path=None):
+        self.path = path or default_stats_path()
+        self.names = None     # Name -> [times accepted, time last accepted]; read on first use
+        self.accepted = 0     # Completions accepted, for keystrokes-per-completion figures
+        self.typed_chars = 0  # Characters typed before those completions were accepted
+        self.dirty = False
+
+    def _ensure_loaded(self):
+        if self.names is not None:
+            return
+        self.names = {}
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.names = {name: list(entry) for name, entry in data.get("names", {}).items()}
+            self.accepted = data.get("accepted", 0)
+            self.typed_chars = data.get("typed_chars", 0)
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass # Missing or damaged file: start from scratch
+
+    def record(self, name, typed_prefix):
+        """Counts an accepted completion of name after typing typed_prefix."""
+        self._ensure_loaded()
+        entry = self.names.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] = time.time()
+        self.accepted += 1
+        self.typed_chars += len(typed_prefix)
+        self.dirty = True
+
+    def average_typed_chars(self):
+        """Characters typed per accepted completion; lower means the ranking saves more typing."""
+        return self.typed_chars / self.accepted if self.accepted else 0.0
+
+    def matching(self, prefix):
+        """Accepted names starting with prefix (case-insensitive)."""
+        self._ensure_loaded()
+        key = prefix.lower()
+        return [name for name in self.names if name.lower().startswith(key)]
+
+    def usage_score(self, name, now):
+        entry = self.names.get(name)
+        if entry is None:
+            return 0.0
+        count, last_used = entry
+        return math.log2(1 + count) + 4.0 * 0.5 ** ((now - last_used) / RECENCY_HALF_LIFE_SECONDS)
+
+    def rank(self, candidates, prefix):
+        """Sorts candidates best first: usage, then exact-case prefix match, then shorter names."""
+        self._ensure_loaded()
+        now = time.time()
+        names = self.names
+        usage = self.usage_score
+
+        def key(name):
+            score = usage(name, now) if name in names else 0.0
+            if name.startswith(prefix):
+                score += 1.0 # Case matches what was typed
+            return (-score, len(name), name.lower())
+        return sorted(candidates, key=key)
+
+    def save(self):
+        """Writes the stats if they changed, keeping the most useful names."""
+        if not self.dirty:
+            return
+        now = time.time()
+        names = self.names
+        if len(names) > MAX_STATS_NAMES:
+            keep = sorted(names, key=lambda name: self.usage_score(name, now), reverse=True)[:MAX_STATS_NAMES]
+            names = {name: names[name] for name in keep}
+            self.names = names
+        data = {"names": names, "accepted": self.accepted, "typed_chars": self.typed_chars}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w") as f:
+                json.dump(data, f)
+            os.replace(self.path + ".tmp", self.path)
+            self.dirty = False
+        except OSError:
+            pass # Ranking still works for this session
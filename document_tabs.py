@@ -0,0 +1,202 @@
+import os
+import time
+import uuid
+import zlib
+from PySide6.QtCore import Signal
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QPlainTextDocumentLayout, QPlainTextEdit, QTabBar
+
+from syntax_highlighter import CppSyntaxHighlighter
+
+DEFAULT_MEMORY_MB = 256 # Loaded documents beyond this are unloaded, least recently used first
+
+# Rough cost of a loaded document, measured on a 100k-line source: the text and its
+# layout take about 6 bytes per character, highlight formats about 500 bytes per block
+DOCUMENT_BYTES_PER_CHAR = 6
+HIGHLIGHT_BYTES_PER_BLOCK = 500
+
+
+class OpenDocument:
+    """One tab: a file (or an untitled buffer) and everything kept while it is open."""
+    def __init__(self, path, name):
+        self.path = path              # File path, None until an untitled buffer is saved
+        self.name = name              # Shown in the tab and the window title
+        self.is_unsaved = False
+        self.document = None          # QTextDocument while loaded
+        self.highlighter = None       # CppSyntaxHighlighter, created the first time the tab is shown
+        self.identifier_index = None  # IdentifierIndex of the editor's completer, while loaded
+        self.compressed = None        # zlib-compressed text while unloaded
+        self.cursor_position = 0      # Restored when the tab is shown again
+        self.scroll_value = 0
+        self.last_used = 0.0          # time.monotonic() when the tab was last left or shown
+        self.journal_id = uuid.uuid4().hex # Names the recovery journal while the document is untitled
+
+    @property
+    def is_loaded(self):
+        return self.document is not None
+
+    def text(self):
+        if self.document is not None:
+            return self.document.toPlainText()
+        return zlib.decompress(self.compressed).decode("utf-8", "surrogatepass")
+
+    def estimated_bytes(self):
+        if self.document is None:
+            return len(self.compressed or b"")
+        size = self.document.characterCount() * DOCUMENT_BYTES_PER_CHAR
+        if self.highlighter is not None:
+            size += self.document.blockCount() * HIGHLIGHT_BYTES_PER_BLOCK
+        return size
+
+
+class DocumentTabs(QTabBar):
+    """
+    Tabs over one shared editor. Every open file keeps its own QTextDocument, undo
+    history, highlighting and completion index, and switching tabs only swaps the
+    document shown. When the loaded documents outgrow the memory budget, the least
+    recently used background ones are unloaded to their compressed text and are
+    rebuilt the next time their tab is shown.
+    """
+    document_activated = Signal(object)   # OpenDocument now shown in the editor
+    document_deactivated = Signal(object) # OpenDocument about to be replaced in the editor
+
+    def __init__(self, editor, memory_budget_mb=DEFAULT_MEMORY_MB, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._current = None
+        self.setTabsClosable(True)
+        self.setMovable(True)
+        self.setDocumentMode(True)
+        self.setExpanding(False)
+        self.currentChanged.connect(self._on_current_changed)
+        self.open_document(None, "Untitled", "")
+
+    def current_document(self):
+        return self._current
+
+    def documents(self):
+        return [self.tabData(index) for index in range(self.count())]
+
+    def find(self, path):
+        key = os.path.normcase(os.path.abspath(path))
+        for document in self.documents():
+            if document.path and os.path.normcase(os.path.abspath(document.path)) == key:
+                return document
+        return None
+
+    def open_document(self, path, name, text):
+        """Adds a tab for text and shows it. A blank untitled tab is replaced instead of kept."""
+        blank = self._current
+        if blank is not None and (blank.path or blank.is_unsaved or not blank.document.isEmpty()):
+            blank = None
+        document = OpenDocument(path, name)
+        self._build(document, text)
+        index = self.addTab(name)
+        self.setTabData(index, document)
+        self.setTabToolTip(index, path or name)
+        self.setCurrentIndex(index)
+        if self._current is not document:
+            self._activate(document) # The first tab is current before its data is set
+        if blank is not None:
+            self.remove(blank)
+        return document
+
+    def activate(self, document):
+        self.setCurrentIndex(self._index_of(document))
+
+    def remove(self, document):
+        """Closes a tab without asking; an empty untitled tab replaces the last one."""
+        if self.count() == 1:
+            self.open_document(None, "Untitled", "")
+            if self.count() == 1:
+                return # document was that blank tab and has just been replaced
+        self.removeTab(self._index_of(document)) # Shows a neighbour first if it was current
+        self._unload(document, keep_text=False)
+
+    def refresh_tab(self, document):
+        index = self._index_of(document)
+        if index >= 0:
+            self.setTabText(index, document.name + ("*" if document.is_unsaved else ""))
+            self.setTabToolTip(index, document.path or document.name)
+
+    def set_memory_budget(self, memory_budget_mb):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._enforce_budget()
+
+    def _index_of(self, document):
+        for index in range(self.count()):
+            if self.tabData(index) is document:
+                return index
+        return -1
+
+    def _build(self, document, text):
+        """Creates the QTextDocument of a new or unloaded tab."""
+        qt_document = QTextDocument(self)
+        if isinstance(self.editor, QPlainTextEdit):
+            qt_document.setDocumentLayout(QPlainTextDocumentLayout(qt_document))
+        qt_document.setPlainText(text)
+        qt_document.setModified(False)
+        document.document = qt_document
+        document.compressed = None
+        document.identifier_index = self.editor.new_identifier_index()
+        document.identifier_index.reset_document(qt_document)
+        if document.path:
+            # Offer identifiers from the neighbouring sources too
+            self.editor.set_project_folder(os.path.dirname(document.path), document.path,
+                                           document.identifier_index)
+
+    def _unload(self, document, keep_text=True):
+        """Drops the QTextDocument of a background tab, keeping only its compressed text."""
+        if document.document is None:
+            return
+        if keep_text:
+            document.compressed = zlib.compress(document.text().encode("utf-8", "surrogatepass"), 1)
+        document.document.deleteLater() # The highlighter is its child and goes with it
+        document.document = None
+        document.highlighter = None
+        document.identifier_index = None
+
+    def _on_current_changed(self, index):
+        document = self.tabData(index) if index >= 0 else None
+        if document is not None and document is not self._current:
+            self._activate(document)
+
+    def _activate(self, document):
+        previous = self._current
+        if previous is not None:
+            self.document_deactivated.emit(previous)
+            previous.cursor_position = self.editor.textCursor().position()
+            previous.scroll_value = self.editor.verticalScrollBar().value()
+            previous.last_used = time.monotonic()
+            if previous.highlighter is not None:
+                previous.highlighter.unwatch_viewport()
+                previous.highlighter.latency_probe = None
+        if not document.is_loaded:
+            self._build(document, document.text())
+
+        self._current = document
+        self.editor.set_code_document(document.document, document.identifier_index)
+        if document.highlighter is None:
+            # Only tabs that are actually looked at pay for highlighting
+            document.highlighter = CppSyntaxHighlighter(document.document)
+        document.highlighter.watch_viewport(self.editor)
+        document.highlighter.latency_probe = self.editor.latency_probe
+        cursor = QTextCursor(document.document)
+        cursor.setPosition(min(document.cursor_position, document.document.characterCount() - 1))
+        self.editor.setTextCursor(cursor)
+        self.editor.verticalScrollBar().setValue(document.scroll_value)
+        document.last_used = time.monotonic()
+        self._enforce_budget()
+        self.document_activated.emit(document)
+
+    def _enforce_budget(self):
+        loaded = [document for document in self.documents() if document.is_loaded]
+        total = sum(document.estimated_bytes() for document in loaded)
+        for document in sorted(loaded, key=lambda document: document.last_used):
+            if total <= self.memory_budget:
+                break
+            if document is self._current:
+                continue
+            total -= document.estimated_bytes()
+            self._unload(document)
@@ -0,0 +1,462 @@
+import hashlib
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from PySide6.QtCore import QThread, Signal
+
+from compile_cache import cache_root
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# What libstdc++ prints before aborting when operator new is refused memory under RLIMIT_AS
+_BAD_ALLOC_MESSAGE = b"std::bad_alloc"
+STDERR_TAIL_BYTES = 4096 # Only the end of the program's stderr is kept, to look for that message
+
+# Programs are started through this small launcher instead of being forked from the IDE
+# directly: a child forked from the IDE inherits its ~50 MB resident set, which the kernel
+# then reports as the program's peak memory. The launcher forks from a tiny process, applies
+# the resource limits, enforces the wall-clock limit, kills whatever the program left behind in
+# its process group and writes the exact wait4() resource usage to a pipe. Popen's preexec_fn
+# with resource.setrlimit and os.wait4 would still fork from the IDE, and preexec_fn isn't safe
+# while other threads run, which they do whenever tests run in parallel.
+_LAUNCHER_SOURCE = r"""
+#include <errno.h>
+#include <fcntl.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/resource.h>
+#include <sys/time.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static volatile pid_t child_pid = 0;
+static volatile sig_atomic_t stop_reason = 0; // 1 = wall-clock limit, 2 = stopped by the IDE
+
+static void on_signal(int sig) {
+    stop_reason = sig == SIGALRM ? 1 : 2;
+    if (child_pid > 0) kill(-child_pid, SIGKILL);
+}
+
+static void set_limit(int resource, rlim_t value) {
+    if (value == 0) return;
+    struct rlimit limit;
+    getrlimit(resource, &limit);
+    if (limit.rlim_max != RLIM_INFINITY && value > limit.rlim_max) value = limit.rlim_max;
+    limit.rlim_cur = value;
+    if (resource == RLIMIT_CPU) {
+        // Soft limit sends SIGXCPU, the hard limit one second later is a SIGKILL
+        if (limit.rlim_max == RLIM_INFINITY || value + 1 <= limit.rlim_max) limit.rlim_max = value + 1;
+    } else if (resource != RLIMIT_STACK) {
+        limit.rlim_max = value;
+    }
+    setrlimit(resource, &limit);
+}
+
+// Usage: launcher <report_fd> <wall_ms> <cpu_s> <address_space_bytes> <file_size_bytes> <stack_bytes> <program> [args...]
+// A limit of 0 means unlimited.
+int main(int argc, char** argv) {
+    if (argc < 8) return 127;
+    int report_fd = atoi(argv[1]);
+    long wall_limit_ms = atol(argv[2]);
+    fcntl(report_fd, F_SETFD, FD_CLOEXEC);
+
+    struct sigaction action;
+    memset(&action, 0, sizeof(action));
+    action.sa_handler = on_signal;
+    sigaction(SIGALRM, &action, NULL);
+    sigaction(SIGTERM, &action, NULL);
+
+    pid_t pid = fork();
+    if (pid < 0) return 127;
+    if (pid == 0) {
+        setpgid(0, 0); // Own process group, so everything it spawns can be killed together
+        set_limit(RLIMIT_CPU, strtoull(argv[3], NULL, 10));
+        set_limit(RLIMIT_AS, strtoull(argv[4], NULL, 10));
+        set_limit(RLIMIT_FSIZE, strtoull(argv[5], NULL, 10));
+        set_limit(RLIMIT_STACK, strtoull(argv[6], NULL, 10));
+        execvp(argv[7], argv + 7);
+        dprintf(report_fd, "E %d\n", errno);
+        _exit(127);
+    }
+    setpgid(pid, pid);
+    child_pid = pid;
+
+    if (wall_limit_ms > 0) {
+        struct itimerval timer;
+        memset(&timer, 0, sizeof(timer));
+        timer.it_value.tv_sec = wall_limit_ms / 1000;
+        timer.it_value.tv_usec = (wall_limit_ms % 1000) * 1000;
+        setitimer(ITIMER_REAL, &timer, NULL);
+    }
+
+    // Wait for the exit without reaping, so the group id can't be reused before the cleanup
+    siginfo_t info;
+    while (waitid(P_PID, pid, &info, WEXITED | WNOWAIT) < 0) {
+        if (errno != EINTR) return 127;
+    }
+    kill(-pid, SIGKILL);
+
+    int status = 0;
+    struct rusage usage;
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR) return 127;
+    }
+    int code = WIFEXITED(status) ? WEXITSTATUS(status) : -WTERMSIG(status);
+    dprintf(report_fd, "R %d %d %ld.%06ld %ld.%06ld %ld\n", code, (int)stop_reason,
+            (long)usage.ru_utime.tv_sec, (long)usage.ru_utime.tv_usec,
+            (long)usage.ru_stime.tv_sec, (long)usage.ru_stime.tv_usec, (long)usage.ru_maxrss);
+    return 0;
+}
+"""
+
+PROJECT_LIMITS_FILE = ".featheride.json"
+
+
+class RunLimits:
+    """
+    Judge-style limits applied to every run of a user program.
+    Limits of None are not enforced.
+    """
+    def __init__(self, time_limit=2.0, wall_time_limit=None, memory_limit_mb=256, output_limit_mb=64):
+        self.time_limit = time_limit                 # CPU seconds
+        self.wall_time_limit = wall_time_limit       # Wall-clock seconds, defaults to a multiple of time_limit
+        self.memory_limit_mb = memory_limit_mb       # Address-space limit
+        self.output_limit_mb = output_limit_mb       # Cap on stdout and on files the program writes
+
+    @property
+    def wall_limit(self):
+        if self.wall_time_limit is not None:
+            return self.wall_time_limit
+        return self.time_limit * 3 + 1.0 if self.time_limit else None
+
+    @property
+    def memory_limit_bytes(self):
+        return int(self.memory_limit_mb * 1024 * 1024) if self.memory_limit_mb else None
+
+    @property
+    def output_limit_bytes(self):
+        return int(self.output_limit_mb * 1024 * 1024) if self.output_limit_mb else None
+
+    def scaled(self, factor):
+        """Same limits with more time, e.g. for a brute-force reference solution."""
+        return RunLimits(
+            self.time_limit * factor if self.time_limit else None,
+            self.wall_time_limit * factor if self.wall_time_limit else None,
+            self.memory_limit_mb,
+            self.output_limit_mb,
+        )
+
+    @classmethod
+    def load_for_project(cls, folder):
+        """
+        Reads the "limits" section of .featheride.json in the project folder, e.g.
+        {"limits": {"time_limit": 1.0, "memory_limit_mb": 256, "output_limit_mb": 64}}
+        """
+        limits = cls()
+        try:
+            with open(os.path.join(folder, PROJECT_LIMITS_FILE), "r") as f:
+                data = json.load(f).get("limits", {})
+        except (OSError, ValueError, AttributeError):
+            return limits
+        for name in ("time_limit", "wall_time_limit", "memory_limit_mb", "output_limit_mb"):
+            if name in data and (data[name] is None or isinstance(data[name], (int, float))):
+                setattr(limits, name, data[name])
+        return limits
+
+
+_launcher_lock = threading.Lock()
+_launcher_paths = {}
+
+
+class RunOutcome:
+    """
+    What happened when a program was run once, including the resources it used
+    and whether it was stopped for exceeding a limit.
+    CPU times and peak memory are None where they can't be measured (Windows).
+    """
+    def __init__(self, returncode, stdout, duration, timed_out=False, error=None,
+                 user_time=None, sys_time=None, peak_rss=None, output_exceeded=False, memory_exceeded=False):
+        self.returncode = returncode # Exit code, negative signal number if killed (None if it never started)
+        self.stdout = stdout         # Captured standard output, as bytes
+        self.duration = duration     # Wall-clock seconds
+        self.timed_out = timed_out   # True if the time limit was hit and the program was killed
+        self.error = error           # Error message if the program could not be started
+        self.user_time = user_time   # User-mode CPU seconds
+        self.sys_time = sys_time     # Kernel-mode CPU seconds
+        self.peak_rss = peak_rss     # Maximum resident set size, in bytes
+        self.output_exceeded = output_exceeded # True if the program was stopped for writing too much
+        self.memory_exceeded = memory_exceeded # True if the program ran into the memory limit
+
+    @property
+    def cpu_time(self):
+        if self.user_time is None:
+            return None
+        return self.user_time + self.sys_time
+
+    def exit_description(self):
+        """Human-readable reason for a non-zero exit."""
+        if self.returncode is not None and self.returncode < 0:
+            try:
+                return f"Killed by {signal.Signals(-self.returncode).name}"
+            except ValueError:
+                return f"Killed by signal {-self.returncode}"
+        return f"Exit code {self.returncode}"
+
+
+def format_memory(num_bytes):
+    if num_bytes is None:
+        return "-"
+    return f"{num_bytes / (1024 * 1024):.1f} MB"
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.0f} ms"
+
+
+def format_usage(outcome):
+    """One-line resource summary, e.g. 'wall 120 ms, cpu 110 ms (user 100 ms, sys 10 ms), 3.4 MB'."""
+    text = f"wall {format_seconds(outcome.duration)}"
+    if outcome.cpu_time is not None:
+        text += (f", cpu {format_seconds(outcome.cpu_time)} (user {format_seconds(outcome.user_time)}, "
+                 f"sys {format_seconds(outcome.sys_time)}), {format_memory(outcome.peak_rss)}")
+    return text
+
+
+def prepare_launcher(compiler="g++"):
+    """Builds the launcher on a background thread at startup, so the first run doesn't wait for g++."""
+    if os.name == "posix":
+        threading.Thread(target=launcher_path, args=(compiler,), daemon=True).start()
+
+
+def launcher_path(compiler="g++"):
+    """
+    Returns the path of the compiled launcher, building it on first use (or waiting for
+    prepare_launcher to finish). Returns None on Windows or if it can't be compiled.
+    """
+    if os.name != "posix":
+        return None
+    with _launcher_lock:
+        if compiler not in _launcher_paths:
+            source_hash = hashlib.sha256(_LAUNCHER_SOURCE.encode()).hexdigest()[:16]
+            directory = os.path.join(cache_root(), "launcher")
+            path = os.path.join(directory, f"launcher-{source_hash}")
+            if not os.path.isfile(path):
+                path = _build_launcher(compiler, directory, path)
+            _launcher_paths[compiler] = path
+        return _launcher_paths[compiler]
+
+
+def _build_launcher(compiler, directory, path):
+    try:
+        os.makedirs(directory, exist_ok=True)
+        source_path = path + ".cpp"
+        with open(source_path, "w") as f:
+            f.write(_LAUNCHER_SOURCE)
+        temp_path = path + f".{os.getpid()}.tmp"
+        built = subprocess.run([compiler, "-O2", source_path, "-o", temp_path],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+        if built.returncode != 0:
+            return None
+        os.replace(temp_path, path)
+        return path
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_program(args, cwd, limits, input_data=None, input_path=None):
+    """
+    Runs a program to completion under the given RunLimits and measures it.
+    Standard input comes from input_data (bytes) or the file at input_path.
+    """
+    launcher = launcher_path()
+    if launcher is None:
+        return _run_without_launcher(args, cwd, limits, input_data, input_path)
+
+    start = time.perf_counter()
+    report_read, report_write = os.pipe()
+    stdin_file = None
+    memory_limit = limits.memory_limit_bytes or 0
+    launcher_args = [
+        launcher,
+        str(report_write),
+        str(int(limits.wall_limit * 1000)) if limits.wall_limit else "0",
+        str(math.ceil(limits.time_limit)) if limits.time_limit else "0",
+        str(memory_limit),
+        str(limits.output_limit_bytes or 0),
+        str(memory_limit), # Stack may grow as far as the memory limit, like on most judges
+    ]
+    try:
+        stdin_file = open(input_path, "rb") if input_path is not None else None
+        process = subprocess.Popen(
+            launcher_args + list(args),
+            stdin=stdin_file if stdin_file is not None else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            pass_fds=(report_write,),
+            start_new_session=True,
+        )
+    except OSError as e:
+        os.close(report_read)
+        return RunOutcome(None, b"", time.perf_counter() - start, error=str(e))
+    finally:
+        os.close(report_write)
+        if stdin_file is not None:
+            stdin_file.close()
+
+    chunks = []
+    stderr_tail = bytearray()
+    output_exceeded = threading.Event()
+    output_limit = limits.output_limit_bytes
+
+    def read_stdout():
+        total = 0
+        while True:
+            chunk = process.stdout.read1(65536)
+            if not chunk:
+                return
+            total += len(chunk)
+            if output_limit and total > output_limit:
+                # Keep what fits, then have the launcher kill the program
+                chunks.append(chunk[:len(chunk) - (total - output_limit)])
+                output_exceeded.set()
+                try:
+                    process.terminate()
+                except OSError:
+                    pass
+                process.stdout.read() # Drain until the program is gone
+                return
+            chunks.append(chunk)
+
+    def read_stderr():
+        while True:
+            chunk = process.stderr.read1(65536)
+            if not chunk:
+                return
+            stderr_tail.extend(chunk)
+            del stderr_tail[:-STDERR_TAIL_BYTES]
+
+    def write_stdin():
+        try:
+            process.stdin.write(input_data or b"")
+        except OSError:
+            pass # The program exited without reading all of its input
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    helpers = [threading.Thread(target=read_stdout, daemon=True), threading.Thread(target=read_stderr, daemon=True)]
+    if input_path is None:
+        helpers.append(threading.Thread(target=write_stdin, daemon=True))
+    for helper in helpers:
+        helper.start()
+
+    try:
+        # The launcher enforces the limits itself; this is only a safety net
+        process.wait(timeout=(limits.wall_limit or 3600) + 2.0)
+    except subprocess.TimeoutExpired:
+        _kill_group(process)
+        process.wait()
+    duration = time.perf_counter() - start
+    for helper in helpers:
+        helper.join()
+    process.stdout.close()
+    process.stderr.close()
+
+    with os.fdopen(report_read, "r") as report_file:
+        report = report_file.read().split()
+    stdout = b"".join(chunks)
+
+    if len(report) >= 2 and report[0] == "E":
+        return RunOutcome(None, b"", duration, error=os.strerror(int(report[1])))
+    if len(report) < 6 or report[0] != "R":
+        return RunOutcome(None, stdout, duration, timed_out=True)
+
+    returncode = int(report[1])
+    user_time = float(report[3])
+    sys_time = float(report[4])
+    # Killed at the wall-clock limit, or by the kernel when the CPU limit ran out
+    timed_out = report[2] == "1" or returncode == -signal.SIGXCPU or (
+        limits.time_limit is not None
+        and returncode == -signal.SIGKILL
+        and user_time + sys_time >= limits.time_limit
+    )
+    # Under RLIMIT_AS a refused allocation makes operator new throw std::bad_alloc, which
+    # aborts the program with that message; a SIGKILL nobody asked for is the OOM killer.
+    # Peak RSS can't tell: the address space runs out long before the resident set does.
+    memory_exceeded = bool(memory_limit) and not timed_out and (
+        (returncode == -signal.SIGABRT and _BAD_ALLOC_MESSAGE in stderr_tail)
+        or (returncode == -signal.SIGKILL and report[2] == "0")
+    )
+    return RunOutcome(
+        None if timed_out or output_exceeded.is_set() else returncode,
+        stdout,
+        duration,
+        timed_out=timed_out,
+        user_time=user_time,
+        sys_time=sys_time,
+        peak_rss=int(report[5]) * _MAXRSS_UNIT,
+        output_exceeded=output_exceeded.is_set() or returncode == -signal.SIGXFSZ,
+        memory_exceeded=memory_exceeded,
+    )
+
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def _run_without_launcher(args, cwd, limits, input_data, input_path):
+    """
+    Fallback without the launcher (Windows, or no compiler): only the wall-clock and
+    output limits are enforced and only wall time is measured.
+    """
+    start = time.perf_counter()
+    wall_limit = limits.wall_limit
+    try:
+        if input_path is not None:
+            with open(input_path, "rb") as stdin:
+                process = subprocess.run(args, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                         cwd=cwd, timeout=wall_limit)
+        else:
+            process = subprocess.run(args, input=input_data or b"", stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                     cwd=cwd, timeout=wall_limit)
+    except subprocess.TimeoutExpired:
+        return RunOutcome(None, b"", time.perf_counter() - start, timed_out=True)
+    except OSError as e:
+        return RunOutcome(None, b"", time.perf_counter() - start, error=str(e))
+    duration = time.perf_counter() - start
+
+    output_limit = limits.output_limit_bytes
+    if output_limit and len(process.stdout) > output_limit:
+        return RunOutcome(None, process.stdout[:output_limit], duration, output_exceeded=True)
+    return RunOutcome(process.returncode, process.stdout, duration)
+
+
+class ProgramRunThread(QThread):
+    """Runs a program once under RunLimits without blocking the GUI thread."""
+    run_finished = Signal(object) # RunOutcome
+
+    def __init__(self, args, cwd, limits, input_path=None):
+        super().__init__()
+        self.args = args
+        self.cwd = cwd
+        self.limits = limits
+        self.input_path = input_path
+
+    def run(self):
+        self.run_finished.emit(run_program(self.args, self.cwd, self.limits, input_path=self.input_path))
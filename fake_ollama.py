@@ -0,0 +1,173 @@
+"""
+Stand-in for a local Ollama server, for working on the AI path without a model.
+
+    python fake_ollama.py --port 11434 --latency 0.8 --rate 15
+
+Implements /api/chat (streaming and non-streaming), /api/tags and /api/version.
+Answers are made-up text whose first token arrives after `latency` seconds and
+whose tokens then arrive at `rate` tokens per second.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("Use", "a", "segment", "tree", "with", "lazy", "propagation", "so", "each", "update",
+         "runs", "in", "O(log", "n)", "time", "and", "the", "answer", "fits", "in", "long", "long.")
+
+
+def make_answer(tokens):
+    """Made-up answer of `tokens` tokens (one word each)."""
+    return [WORDS[i % len(WORDS)] + " " for i in range(tokens)]
+
+
+class FakeOllamaServer:
+    """
+    Serves a fake Ollama API from a background thread. Use port 0 to pick a free port;
+    `url` gives the /api/chat endpoint once the server is started.
+    """
+    def __init__(self, host="127.0.0.1", port=11434, first_token_latency=0.5, tokens_per_second=20.0,
+                 answer_tokens=60, model_name="openchat"):
+        self.host = host
+        self.port = port
+        self.first_token_latency = first_token_latency # Seconds before the first token (prompt processing)
+        self.tokens_per_second = tokens_per_second     # Generation speed after the first token
+        self.answer_tokens = answer_tokens             # Tokens in every answer
+        self.model_name = model_name
+        self.requests_served = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/api/chat"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like the real server
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": server.model_name, "model": server.model_name}]})
+                elif self.path == "/api/version":
+                    self._send_json(200, {"version": "0.0.0-fake"})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                try:
+                    request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                except ValueError:
+                    self._send_json(400, {"error": "invalid JSON"})
+                    return
+                server.requests_served += 1
+                try:
+                    # Ollama streams unless told otherwise
+                    if request.get("stream", True):
+                        self._stream_answer(request)
+                    else:
+                        self._full_answer(request)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # The client cancelled
+
+            def _final_fields(self, request, start):
+                generation = server.answer_tokens / server.tokens_per_second
+                prompt_tokens = sum(len(m.get("content", "")) // 4 for m in request.get("messages", []))
+                return {
+                    "model": request.get("model", server.model_name),
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": int((time.perf_counter() - start) * 1e9),
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": int(server.first_token_latency * 1e9),
+                    "eval_count": server.answer_tokens,
+                    "eval_duration": int(generation * 1e9),
+                }
+
+            def _full_answer(self, request):
+                start = time.perf_counter()
+                time.sleep(server.first_token_latency + server.answer_tokens / server.tokens_per_second)
+                data = self._final_fields(request, start)
+                data["message"] = {"role": "assistant", "content": "".join(make_answer(server.answer_tokens))}
+                self._send_json(200, data)
+
+            def _write_chunk(self, data):
+                line = (json.dumps(data) + "\n").encode()
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+
+            def _stream_answer(self, request):
+                start = time.perf_counter()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                model = request.get("model", server.model_name)
+                next_token_at = start + server.first_token_latency
+                for piece in make_answer(server.answer_tokens):
+                    delay = next_token_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    self._write_chunk({"model": model, "message": {"role": "assistant", "content": piece}, "done": False})
+                    next_token_at += 1.0 / server.tokens_per_second
+                final = self._final_fields(request, start)
+                final["message"] = {"role": "assistant", "content": ""}
+                self._write_chunk(final)
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--rate", type=float, default=20.0, help="tokens per second after the first one")
+    parser.add_argument("--tokens", type=int, default=60, help="tokens per answer")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, args.latency, args.rate, args.tokens).start()
+    print(f"Fake Ollama listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
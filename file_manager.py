@@ -2,25 +2,83 @@ import subprocess
 import tempfile
 import sys
 import os
-from PySide6.QtWidgets import QFileDialog, QMessageBox
-from PySide6.QtCore import QModelIndex # Import QModelIndex for type hinting
+from PySide6.QtWidgets import QFileDialog, QMenu, QMessageBox
+from PySide6.QtCore import QModelIndex, QTimer # Import QModelIndex for type hinting
+from autosave import AutosaveWorker, JOURNAL_DELAY_MS, write_atomic
+from build_engine import BuildEngine
+from compile_cache import CompileCache
+from pch_manager import PchManager
+from test_runner import TestRunnerThread, find_test_cases
+from stress_tester import StressThread, GENERATOR_NAMES, BRUTE_NAMES
+from execution import ProgramRunThread, RunLimits, prepare_launcher
+from large_file_viewer import LargeFileViewer, should_use_viewer
+from project_tree import is_inside
 
 class FileManager:
     """
     Manages file operations such as creating new projects/files, opening, saving notes,
-    and tracking the unsaved status of the current file.
+    and tracking the unsaved status of the open files. file_name, file_path and
+    is_unsaved always refer to the document of the current tab.
     """
-    def __init__(self, parent, editor, model, tree_view, update_title_callback):
+    def __init__(self, parent, editor, model, tree_view, update_title_callback, document_tabs):
         self.parent = parent  # Reference to the MainWindow instance
-        self.editor = editor  # Reference to the QTextEdit (code editor)
-        self.model = model    # Reference to the QFileSystemModel
+        self.editor = editor  # Reference to the CustomPlainTextEdit (code editor)
+        self.model = model    # Reference to the ProjectTreeModel shown in the tree view
         self.tree_view = tree_view # Reference to the QTreeView
         self.update_title_callback = update_title_callback # Callback to update MainWindow title
+        self.document_tabs = document_tabs # DocumentTabs holding every open file
 
         self.file_filter = "C++ Files (*.cpp);;Text Files (*.txt);;All Files (*)"
-        self.file_name = "Untitled" # Default file name
-        self.file_path = None       # Current file path
-        self.is_unsaved = False     # Flag to track unsaved changes
+        self.document_tabs.document_activated.connect(self._on_document_activated)
+        self.document_tabs.document_deactivated.connect(self._on_document_deactivated)
+        self.document_tabs.tabCloseRequested.connect(self.close_tab)
+
+        # Background compiler; output is streamed into the build output tab
+        self.build_engine = BuildEngine(cache=CompileCache(), pch=PchManager(parent=parent), parent=parent)
+        self.build_engine.build_started.connect(self._on_build_started)
+        self.build_engine.output_line.connect(self._on_build_output)
+        self.build_engine.build_finished.connect(self._on_build_finished)
+        prepare_launcher() # Programs are run through it; compiled now rather than on the first run
+        self.after_build = None       # Callback run with the BuildResult of a successful build
+        self.last_build_result = None # BuildResult of the most recent build
+        self.test_thread = None       # TestRunnerThread while tests are running
+        self.stress_thread = None     # StressThread of the last stress test
+        self.run_thread = None        # ProgramRunThread of the last Build and Run
+        self.viewers = []             # Open LargeFileViewer windows
+
+        # Saves and crash-recovery snapshots are written on a background thread; MainWindow
+        # connects its save_finished/save_failed signals and starts it
+        self.autosave = AutosaveWorker(parent=parent)
+        self.journal_timer = QTimer(parent)
+        self.journal_timer.setSingleShot(True)
+        self.journal_timer.setInterval(JOURNAL_DELAY_MS)
+        self.journal_timer.timeout.connect(self.write_journal)
+        self._pending_saves = set()  # Ids of background saves not on disk yet
+        self._waiting_build = None   # (after_build, source_path) of a build that starts once they are
+
+    @property
+    def file_name(self):
+        return self.document_tabs.current_document().name
+
+    @file_name.setter
+    def file_name(self, name):
+        self.document_tabs.current_document().name = name
+
+    @property
+    def file_path(self):
+        return self.document_tabs.current_document().path
+
+    @file_path.setter
+    def file_path(self, path):
+        self.document_tabs.current_document().path = path
+
+    @property
+    def is_unsaved(self):
+        return self.document_tabs.current_document().is_unsaved
+
+    @is_unsaved.setter
+    def is_unsaved(self, unsaved):
+        self.document_tabs.current_document().is_unsaved = unsaved
 
     def _show_message_box(self, title, text, icon=QMessageBox.Information, buttons=QMessageBox.Ok):
         """Helper to show a custom message box instead of alert/confirm."""
@@ -42,18 +100,21 @@ class FileManager:
             )
             if reply == QMessageBox.Save:
                 self.save_note()
+                if self.is_unsaved:
+                    return False # Save As was cancelled
             elif reply == QMessageBox.Cancel:
                 return False # User cancelled the operation
+            else:
+                self.journal_timer.stop()
+                document = self.document_tabs.current_document()
+                self.autosave.discard_journal(document.path, document.journal_id)
         return True # No unsaved changes, or user chose to discard/saved
 
     def new_project(self):
         """
-        Handles creating a new project (a new directory with an initial file).
-        Prompts the user to save the current file if unsaved.
+        Handles creating a new project (a new directory with an initial file),
+        opened from the template in a new tab.
         """
-        if not self._prompt_save_if_unsaved():
-            return
-
         file_path, _ = QFileDialog.getSaveFileName(self.parent, "Create New Project File", "", self.file_filter)
         if not file_path:
             return # User cancelled file dialog
@@ -69,57 +130,29 @@ class FileManager:
         # Construct the full path for the new file inside the new folder
         full_file_path = os.path.join(new_folder_path, base_name)
         
-        try:
-            with open(full_file_path, 'w') as f:
-                f.write("") # Create an empty file
-        except IOError as e:
-            self._show_message_box("Error", f"Could not create project file: {e}", QMessageBox.Critical)
-            return
-
-        self.editor.setPlainText("") # Clear the editor initially
-        self.file_name = base_name
-        self.file_path = full_file_path
-        self.is_unsaved = False # Set unsaved to False after clearing editor
-
-        # Update the main window title before potentially loading template that triggers textChanged
-        self.update_title_callback() 
-        
-        # Update the file system model to show the new directory
-        self.model.setRootPath(new_folder_path)
-        self.tree_view.setRootIndex(self.model.index(new_folder_path))
-        self.tree_view.expandAll() # Expand the new folder in the tree view
-        self._show_message_box("New Project", f"New project '{name_without_ext}' created successfully.", QMessageBox.Information)
-        
         try:
             with open("Resources/template.cpp", "r") as template_file:
                 content = template_file.read()
         except FileNotFoundError:
             # QMessageBox.warning(createFile, "Error", "template.cpp file not found!")
             content = "" # Default to empty if template not found
-        
-        # Write the content to the new file AND update editor, then mark as not unsaved
+
+        # Write the template to the new file, then open it in its own tab
         try:
-            with open(self.file_path, "w") as new_file:
-                new_file.write(content)
-            
-            # Load the content into the editor, which will trigger textChanged
-            with open(self.file_path, "r") as new_file:
-                self.editor.setPlainText(new_file.read())
-            
-            self.is_unsaved = False # Crucially set to False *after* setPlainText
-            self.update_title_callback() # Update title again to remove asterisk if it appeared
-        except Exception as e:
-            self._show_message_box("Error", f"Could not write to new project file: {e}", QMessageBox.Critical)
+            with open(full_file_path, 'w') as f:
+                f.write(content)
+        except IOError as e:
+            self._show_message_box("Error", f"Could not create project file: {e}", QMessageBox.Critical)
             return
 
+        self.tree_view.setRootIndex(self.model.set_root_path(new_folder_path)) # The new project becomes the root
+        self._load_file_into_editor(full_file_path)
+        self._show_message_box("New Project", f"New project '{name_without_ext}' created successfully.", QMessageBox.Information)
+
     def new_file(self):
         """
-        Handles creating a new file within the current project/directory.
-        Prompts the user to save the current file if unsaved.
+        Handles creating a new file within the current project/directory, opened in a new tab.
         """
-        if not self._prompt_save_if_unsaved():
-            return
-
         # Determine the directory where the new file should be created
         target_dir = None
         if self.file_path:
@@ -127,7 +160,7 @@ class FileManager:
             target_dir = os.path.dirname(self.file_path)
         else:
             # If no file is open, use the current root of the file system model
-            target_dir = self.model.rootPath()
+            target_dir = self.model.root
             if not target_dir: # Fallback if root path is not set (shouldn't happen with initial setup)
                 target_dir = os.getcwd()
 
@@ -144,41 +177,30 @@ class FileManager:
             self._show_message_box("Error", f"Could not create file: {e}", QMessageBox.Critical)
             return
 
-        self.editor.setPlainText("") # Clear the editor, this triggers textChanged
-        self.file_name = base_name
-        self.file_path = file_path
-        self.is_unsaved = False # Set this to False *after* setPlainText
-        self.update_title_callback() # Update the main window title (should now be without asterisk)
-        
-        # Refresh the tree view to show the new file
-        # This is important if the new file is in a directory that's already visible
-        self.model.setRootPath(os.path.dirname(file_path)) # Ensure the model is rooted correctly
-        self.tree_view.setRootIndex(self.model.index(os.path.dirname(file_path)))
-        self.tree_view.expandAll() # Expand the directory to show the new file
-        self.tree_view.setCurrentIndex(self.model.index(file_path)) # Select the new file
+        # Opening it also roots the tree view at its folder and selects it
+        self._load_file_into_editor(file_path)
         self._show_message_box("New File", f"New file '{base_name}' created successfully.", QMessageBox.Information)
 
 
     def open_note(self):
-
-        if not self._prompt_save_if_unsaved():
-            return
-        
-        if hasattr(self.parent, 'highlighter'):
-            self.parent.highlighter.rehighlight()
+        # The file opens in its own tab, so the current one is kept as it is
         file_path, _ = QFileDialog.getOpenFileName(self.parent, "Open File", "", self.file_filter)
         if file_path:
-            self._load_file_into_editor(file_path)
+            if should_use_viewer(file_path):
+                self._open_in_viewer(file_path)
+            else:
+                self._load_file_into_editor(file_path)
 
     def open_file_from_tree_view(self, index: QModelIndex):
 
-        file_path = self.model.filePath(index)
+        file_path = self.model.file_path(index)
         
         # Check if the clicked item is a file and not a directory
         if os.path.isfile(file_path):
-            if not self._prompt_save_if_unsaved():
-                return # User cancelled opening the new file
-
+            if should_use_viewer(file_path):
+                # Huge data files are only viewed; the editor keeps its current file
+                self._open_in_viewer(file_path)
+                return
             self._load_file_into_editor(file_path)
         else:
             # If it's a directory, expand/collapse it
@@ -187,27 +209,46 @@ class FileManager:
             else:
                 self.tree_view.expand(index)
 
+    def _open_in_viewer(self, file_path):
+        """Opens a file that is too large for the editor in a read-only viewer window."""
+        try:
+            viewer = LargeFileViewer(file_path)
+        except OSError as e:
+            self._show_message_box("Error", f"Could not open file: {e}", QMessageBox.Critical)
+            return
+        self.viewers.append(viewer)
+        # The viewer deletes itself when closed; forget it before its wrapper goes stale
+        viewer.destroyed.connect(lambda: self.viewers.remove(viewer))
+        viewer.show()
+
+    def show_tree_menu(self, position):
+        """Context menu of the project tree: lists the test files a big folder leaves out."""
+        index = self.tree_view.indexAt(position)
+        if not index.isValid():
+            return
+        folder = self.model.file_path(index)
+        hidden = self.model.hidden_test_files(folder)
+        if not hidden:
+            return
+        menu = QMenu(self.tree_view)
+        show_all = menu.addAction(f"Show {hidden:,} More Test Files")
+        if menu.exec(self.tree_view.viewport().mapToGlobal(position)) is show_all:
+            self.model.reveal_test_files(folder)
+            self.tree_view.expand(index)
+
     def _load_file_into_editor(self, file_path):
         """
-        Internal helper to load file content into the editor and update state.
+        Internal helper to show a file in a new tab, or in the tab that already has it open.
         """
+        open_document = self.document_tabs.find(file_path)
+        if open_document is not None:
+            self.document_tabs.activate(open_document) # Keeps its edits; nothing is reread
+            return
         try:
             with open(file_path, 'r') as f:
-                self.editor.setPlainText(f.read()) # Load file content into editor
-            self.file_path = file_path
-            self.file_name = os.path.basename(file_path)
-            self.is_unsaved = False
-            self.update_title_callback() # Update the main window title
-            
-            # Set the tree view root to the directory of the opened file
-            dir_path = os.path.dirname(file_path)
-            self.model.setRootPath(dir_path)
-            self.tree_view.setRootIndex(self.model.index(dir_path))
-            self.tree_view.expandAll() # Expand the directory
-            
-            # Select the opened file in the tree view
-            index = self.model.index(file_path)
-            self.tree_view.setCurrentIndex(index)
+                content = f.read()
+            self.autosave.remember(file_path, content)
+            self.document_tabs.open_document(file_path, os.path.basename(file_path), content) # Selects it in the tree
         except IOError as e:
             self._show_message_box("Error", f"Could not open file: {e}", QMessageBox.Critical)
 
@@ -218,14 +259,17 @@ class FileManager:
         """
         if self.file_path:
             if self.is_unsaved:
-                try:
-                    with open(self.file_path, 'w') as f:
-                        f.write(self.editor.toPlainText()) # Write editor content to file
-                    self.is_unsaved = False
-                    self.update_title_callback() # Update the main window title
-                    self._show_message_box("Save", f"File '{self.file_name}' saved successfully.", QMessageBox.Information)
-                except IOError as e:
-                    self._show_message_box("Error", f"Could not save file: {e}", QMessageBox.Critical)
+                # Written in the background; MainWindow reports the result in the status bar.
+                # The snapshot queued first is only dropped once the save succeeds, so the edits
+                # survive a failed write even if the tab is closed meanwhile.
+                self.journal_timer.stop()
+                document = self.document_tabs.current_document()
+                text = document.text()
+                self.autosave.journal(document.path, document.name, text, document.journal_id)
+                self._pending_saves.add(self.autosave.save(document.path, text))
+                self.editor.document().setModified(False)
+                self.is_unsaved = False
+                self.update_title_callback() # Update the main window title
         else:
             # If no file path is set (e.g., brand new "Untitled" file), prompt for "Save As"
             self.save_as_note()
@@ -237,23 +281,21 @@ class FileManager:
         file_path, _ = QFileDialog.getSaveFileName(self.parent, "Save File As", "", self.file_filter)
         if file_path:
             try:
-                with open(file_path, 'w') as f:
-                    f.write(self.editor.toPlainText()) # Write editor content to new file
+                content = self.editor.toPlainText()
+                write_atomic(file_path, content, temp_dir=self.autosave.recovery_dir) # Written right away, the tree view selects it below
+                self.autosave.remember(file_path, content)
+                self.journal_timer.stop()
+                document = self.document_tabs.current_document()
+                self.autosave.discard_journal(document.path, document.journal_id)
                 self.file_path = file_path
                 self.file_name = os.path.basename(file_path)
+                self.editor.document().setModified(False)
                 self.is_unsaved = False
                 self.update_title_callback() # Update the main window title
-                self._show_message_box("Save As", f"File saved as '{self.file_name}' successfully.", QMessageBox.Information)
-                
-                # Update the file system model to the directory of the new file
-                dir_path = os.path.dirname(file_path)
-                self.model.setRootPath(dir_path)
-                self.tree_view.setRootIndex(self.model.index(dir_path))
-                self.tree_view.expandAll()
+                self.parent.statusBar().showMessage(f"Saved as '{self.file_name}'", 3000)
                 
-                # Select the saved file in the tree view
-                index = self.model.index(file_path)
-                self.tree_view.setCurrentIndex(index)
+                self.editor.set_project_folder(os.path.dirname(file_path), file_path)
+                self._show_in_tree(file_path)
 
             except IOError as e:
                 self._show_message_box("Error", f"Could not save file as: {e}", QMessageBox.Critical)
@@ -297,90 +339,235 @@ class FileManager:
     def build_code1(self):
         """
         Builds the current C++ file using g++ compiler.
-        Shows build output in the build output area.
+        The compiler runs in the background and its output is streamed into the build output area.
         """
-        if not self.file_path:
-            self._show_message_box("Error", "No file is currently open to build.", QMessageBox.Warning)
+        self._start_build()
+
+    def _start_build(self, after_build=None, source_path=None):
+        """
+        Starts a background build of source_path (the open file by default).
+        after_build is called with the BuildResult once the build succeeds.
+        """
+        if self.build_engine.is_running() or self._waiting_build is not None:
+            self.parent.bottom_tabs.append_build_output("A build is already running. Cancel it first.")
             return
 
-        # Check if the file has unsaved changes
-        if self.is_unsaved:
-            reply = self._show_message_box(
-                "Unsaved Changes",
-                "The file has unsaved changes. Save before building?",
-                QMessageBox.Question,
-                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
-            )
-            
-            if reply == QMessageBox.Save:
-                self.save_note()
-            elif reply == QMessageBox.Cancel:
-                return  # User cancelled the build
+        if source_path is None:
+            if not self.file_path:
+                self._show_message_box("Error", "No file is currently open to build.", QMessageBox.Warning)
+                return
 
+            # Check if the file has unsaved changes
+            if self.is_unsaved:
+                reply = self._show_message_box(
+                    "Unsaved Changes",
+                    "The file has unsaved changes. Save before building?",
+                    QMessageBox.Question,
+                    QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
+                )
+                
+                if reply == QMessageBox.Save:
+                    self.save_note()
+                elif reply == QMessageBox.Cancel:
+                    return  # User cancelled the build
+
+            source_path = self.file_path
+            self.parent.bottom_tabs.build_output.clear()
+            if self._pending_saves:
+                # The compiler reads the file from disk, so the build starts once the save has landed
+                self._waiting_build = (after_build, source_path)
+                self.parent.bottom_tabs.append_build_output("Waiting for the file to be saved...")
+                return
+
+        self._run_build(after_build, source_path)
+
+    def _run_build(self, after_build, source_path):
         # Get the file directory and base name without extension
-        file_dir = os.path.dirname(self.file_path)
-        file_base = os.path.splitext(os.path.basename(self.file_path))[0]
+        file_dir = os.path.dirname(source_path)
+        file_base = os.path.splitext(os.path.basename(source_path))[0]
         output_path = os.path.join(file_dir, file_base)
 
-        # Prepare the build command
-        build_cmd = f"g++ \"{self.file_path}\" -o \"{output_path}\""
+        self.after_build = after_build
+        self.build_engine.start(source_path, output_path)
 
-        try:
-            # Execute the build command
-            process = subprocess.Popen(
-                build_cmd,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
-            )
-            stdout, stderr = process.communicate()
-
-            # Display build output
-            output_text = f"> {build_cmd}\n\n"
-            if stdout:
-                output_text += f"Output:\n{stdout}\n"
-            if stderr:
-                output_text += f"Errors:\n{stderr}\n"
-
-            # Check if build was successful
-            if process.returncode == 0:
-                output_text += "\nBuild successful!\n"
-                output_text += f"Executable created: {output_path}"
-                # CORRECTED: Access build_output through self.parent.bottom_tabs
-                self.parent.bottom_tabs.build_output.setPlainText(output_text)
+    def on_save_finished(self, save_id, succeeded):
+        """Called by MainWindow for every finished background save; starts a build that waited for it."""
+        self._pending_saves.discard(save_id)
+        if self._waiting_build is None:
+            return
+        if not succeeded:
+            self._waiting_build = None
+            self.parent.bottom_tabs.append_build_output("Build cancelled: the file could not be saved.")
+        elif not self._pending_saves:
+            after_build, source_path = self._waiting_build
+            self._waiting_build = None
+            self._run_build(after_build, source_path)
+
+    def cancel_build(self):
+        """Stops the running build, if there is one."""
+        if self._waiting_build is not None:
+            self._waiting_build = None
+            self.parent.bottom_tabs.append_build_output("Build cancelled.")
+        if self.build_engine.is_running():
+            self.after_build = None
+            self.build_engine.cancel()
+
+    def _on_build_started(self, command):
+        self.parent.bottom_tabs.append_build_output(f"> {command}\n")
+
+    def _on_build_output(self, line, is_error):
+        self.parent.bottom_tabs.append_build_output(line)
+
+    def _on_build_finished(self, result):
+        """Slot receiving the BuildResult from the build engine."""
+        self.last_build_result = result
+        bottom_tabs = self.parent.bottom_tabs
+        bottom_tabs.append_build_output("")
+        bottom_tabs.append_build_output(result.summary())
+        if result.success:
+            bottom_tabs.append_build_output(f"Executable created: {result.artifact_path}")
+
+        after_build = self.after_build
+        self.after_build = None
+        if after_build:
+            if result.success:
+                after_build(result)
             else:
-                output_text += "\nBuild failed!"
-                # CORRECTED: Access build_output through self.parent.bottom_tabs
-                self.parent.bottom_tabs.build_output.setPlainText(output_text)
+                bottom_tabs.append_build_output("\nRun aborted: Build failed.")
 
-        except Exception as e:
-            error_msg = f"Error during build: {str(e)}"
-            # CORRECTED: Access build_output through self.parent.bottom_tabs
-            self.parent.bottom_tabs.build_output.setPlainText(error_msg)
+    def build_and_run(self):
+        self._start_build(lambda result: self._run_executable(result.artifact_path))
 
+    def _project_folder(self):
+        """The folder shown in the tree view, falling back to the open file's folder."""
+        folder = self.model.file_path(self.tree_view.rootIndex())
+        if folder and os.path.isdir(folder):
+            return folder
+        if self.file_path:
+            return os.path.dirname(self.file_path)
+        return os.getcwd()
 
+    def run_tests(self):
+        """
+        Builds the current file and runs it against every input/output pair in the
+        project folder in parallel, filling the Tests tab with per-test verdicts.
+        """
+        if self.test_thread is not None and self.test_thread.isRunning():
+            self.parent.bottom_tabs.append_build_output("Tests are already running.")
+            return
+        self._start_build(self._run_tests_with)
+
+    def _run_tests_with(self, build_result):
+        bottom_tabs = self.parent.bottom_tabs
+        folder = self._project_folder()
+        cases = find_test_cases(folder)
+        if not cases:
+            bottom_tabs.append_build_output(f"\nNo test files (*.in/*.out or input*/output*) found in {folder}.")
+            return
 
-    def build_and_run(self):
-        self.build_code1()
+        bottom_tabs.reset_tests(cases)
+        bottom_tabs.setCurrentWidget(bottom_tabs.tests_widget)
+
+        # Results are delivered to BottomTabsWidget slots so they run on the GUI thread
+        self.test_thread = TestRunnerThread(build_result.artifact_path, cases, RunLimits.load_for_project(folder))
+        self.test_thread.test_finished.connect(bottom_tabs.show_test_result)
+        self.test_thread.all_finished.connect(bottom_tabs.show_tests_summary)
+        bottom_tabs.tests_summary.setText(f"Running {len(cases)} test(s) on {self.test_thread.workers} worker(s)...")
+        self.test_thread.start()
+
+    def _find_stress_source(self, folder, names, title):
+        """Looks for one of the conventional file names, asking the user if none exists."""
+        for name in names:
+            path = os.path.join(folder, name)
+            if os.path.isfile(path):
+                return path
+        file_path, _ = QFileDialog.getOpenFileName(self.parent, title, folder, "C++ Files (*.cpp)")
+        return file_path
+
+    def stress_test(self):
+        """
+        Compiles the current solution, a generator and a brute-force solution, then
+        compares the solution against the brute force on generated inputs on all cores.
+        """
+        if self.stress_thread is not None and self.stress_thread.isRunning():
+            self.parent.bottom_tabs.append_build_output("A stress test is already running.")
+            return
+        if not self.file_path:
+            self._show_message_box("Error", "No file is currently open to stress test.", QMessageBox.Warning)
+            return
 
-        # Check if build was successful (from build_code1's output)
-        output_text = self.parent.bottom_tabs.build_output.toPlainText()
-        if "Build successful!" not in output_text:
-            self.parent.bottom_tabs.build_output.append("\nRun aborted: Build failed.")
+        folder = os.path.dirname(self.file_path)
+        generator_path = self._find_stress_source(folder, GENERATOR_NAMES, "Select Test Generator")
+        if not generator_path:
+            return
+        brute_path = self._find_stress_source(folder, BRUTE_NAMES, "Select Brute-Force Solution")
+        if not brute_path:
             return
 
-        # Get executable path (without .exe extension, as cmd handles it implicitly sometimes)
-        # This `file_dir` should be the directory where your .cpp, .in, and .out files are located.
-        file_dir = os.path.dirname(self.file_path)
-        file_base = os.path.splitext(os.path.basename(self.file_path))[0]
-        executable_name = file_base # The name of the executable (e.g., "my_program")
+        # Build the solution, then the generator, then the brute force, each through the build engine
+        self._start_build(lambda solution: self._start_build(
+            lambda generator: self._start_build(
+                lambda brute: self._run_stress(generator, brute, solution),
+                source_path=brute_path),
+            source_path=generator_path))
+
+    def _run_stress(self, generator_result, brute_result, solution_result):
+        bottom_tabs = self.parent.bottom_tabs
+        bottom_tabs.stress_log.clear()
+        bottom_tabs.setCurrentWidget(bottom_tabs.stress_widget)
+
+        self.stress_thread = StressThread(
+            generator_result.artifact_path,
+            brute_result.artifact_path,
+            solution_result.artifact_path,
+            os.path.dirname(solution_result.source_path),
+            RunLimits.load_for_project(self._project_folder()),
+        )
+        self.stress_thread.progress.connect(bottom_tabs.show_stress_progress)
+        self.stress_thread.failure_found.connect(bottom_tabs.show_stress_failure)
+        self.stress_thread.error_occurred.connect(bottom_tabs.show_stress_error)
+        self.stress_thread.stress_finished.connect(bottom_tabs.show_stress_finished)
+        bottom_tabs.stress_log.append(
+            f"Stress testing {os.path.basename(solution_result.source_path)} against "
+            f"{os.path.basename(brute_result.source_path)} on {self.stress_thread.workers} worker(s)..."
+        )
+        bottom_tabs.stop_stress_button.setEnabled(True)
+        self.stress_thread.start()
+
+    def stop_stress_test(self):
+        if self.stress_thread is not None:
+            self.stress_thread.stop()
+
+    def _run_executable(self, executable_path):
+        if os.name == "nt":
+            self._run_in_console(executable_path)
+        else:
+            self._run_in_ide(executable_path)
 
-        # --- Let's add some print statements here to confirm the paths Python sees ---
-        print(f"DEBUG: self.file_path is: {self.file_path}")
-        print(f"DEBUG: Calculated file_dir (project folder) is: {file_dir}")
-        print(f"DEBUG: Executable name is: {executable_name}")
-        # --- End DEBUG prints ---
+    def _run_in_ide(self, executable_path):
+        """
+        Runs the program under the project's limits, feeding it <name>.in if that file exists,
+        and shows its output and resource usage in the build output.
+        """
+        if self.run_thread is not None and self.run_thread.isRunning():
+            self.parent.bottom_tabs.append_build_output("The program is still running.")
+            return
+        file_dir = os.path.dirname(executable_path)
+        input_path = os.path.splitext(executable_path)[0] + ".in"
+        if not os.path.isfile(input_path):
+            input_path = None
+        limits = RunLimits.load_for_project(self._project_folder())
+
+        redirect = f" < {os.path.basename(input_path)}" if input_path else ""
+        self.parent.bottom_tabs.append_build_output(f"\n> {os.path.basename(executable_path)}{redirect}")
+        self.run_thread = ProgramRunThread([executable_path], file_dir, limits, input_path)
+        self.run_thread.run_finished.connect(self.parent.bottom_tabs.show_program_run)
+        self.run_thread.start()
+
+    def _run_in_console(self, executable_path):
+        # This `file_dir` should be the directory where your .cpp, .in, and .out files are located.
+        file_dir = os.path.dirname(executable_path)
+        executable_name = os.path.basename(executable_path) # The name of the executable (e.g., "my_program")
 
         try:
             # Create a temporary batch file
@@ -401,9 +588,6 @@ class FileManager:
                 temp_bat.write(batch_content)
                 temp_bat_path = temp_bat.name
 
-            print(f"DEBUG: Temporary batch file created at: {temp_bat_path}")
-            print(f"DEBUG: Batch content will be:\n{batch_content}")
-
             # Run the batch file in a new console window
             subprocess.Popen(
                 ['cmd', '/c', 'start', temp_bat_path],
@@ -412,12 +596,65 @@ class FileManager:
 
         except Exception as e:
             error_msg = f"Error running program: {str(e)}"
-            self.parent.bottom_tabs.build_output.append(error_msg)
+            self.parent.bottom_tabs.append_build_output(error_msg)
 
     def mark_unsaved(self):
+        # Highlighting a freshly shown document reports textChanged too; only edits set the modified flag
+        if not self.editor.document().isModified():
+            return
         if not self.is_unsaved: 
             self.is_unsaved = True
             self.update_title_callback() 
+        # Not restarted on every keystroke, so a snapshot is taken while typing goes on
+        if not self.journal_timer.isActive():
+            self.journal_timer.start()
+
+    def write_journal(self, document=None):
+        """Queues a recovery snapshot of a tab's document (the current one by default) if it has unsaved changes."""
+        self.journal_timer.stop()
+        document = document or self.document_tabs.current_document()
+        if document.is_unsaved:
+            self.autosave.journal(document.path, document.name, document.text(), document.journal_id)
+
+    def _on_document_deactivated(self, document):
+        # The pending snapshot belongs to the tab being left
+        if self.journal_timer.isActive():
+            self.write_journal(document)
+
+    def _on_document_activated(self, document):
+        self.update_title_callback()
+        if document.path:
+            self._show_in_tree(document.path)
+
+    def _show_in_tree(self, file_path):
+        """
+        Selects a file in the tree view. The root only changes when the file is outside
+        the folder shown, and only the folders leading to the file are expanded.
+        """
+        if self.model.root is None or not is_inside(file_path, self.model.root):
+            self.tree_view.setRootIndex(self.model.set_root_path(os.path.dirname(file_path)))
+        index = self.model.index_for_path(file_path)
+        if index.isValid():
+            self.tree_view.setCurrentIndex(index)
+            self.tree_view.scrollTo(index) # Expands its parent folders
+
+    def close_tab(self, index):
+        """Closes a tab, asking to save it first if it has unsaved changes."""
+        document = self.document_tabs.tabData(index)
+        if document.is_unsaved:
+            self.document_tabs.activate(document) # The prompt and the save work on the current tab
+            if not self._prompt_save_if_unsaved():
+                return
+        self.document_tabs.remove(document)
+
+    def shutdown(self):
+        """Closes the viewers, writes the last snapshot and waits for pending writes before the window closes."""
+        for viewer in list(self.viewers):
+            viewer.close() # They are separate windows and would keep the application running
+        if self.journal_timer.isActive():
+            self.write_journal()
+        self.autosave.stop()
+        self.autosave.wait(5000)
 
     def get_filename_and_status(self):
         return self.file_name, self.is_unsaved
@@ -0,0 +1,348 @@
+import mmap
+import operator
+import os
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, count, islice
+from PySide6.QtCore import QThread, Qt, Signal
+from PySide6.QtGui import QColor, QFontDatabase, QPainter
+from PySide6.QtWidgets import (
+    QAbstractScrollArea, QHBoxLayout, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget
+)
+
+from execution import format_memory
+
+# Test data (and anything else this big) opens in the viewer instead of the editor
+DATA_EXTENSIONS = (".in", ".out", ".ans", ".ok", ".txt")
+DATA_VIEWER_BYTES = 2 * 1024 * 1024
+VIEWER_BYTES = 32 * 1024 * 1024
+
+INDEX_STEP = 64                  # The start offset of every 64th line is kept in memory
+INDEX_CHUNK_BYTES = 1024 * 1024  # Bytes scanned per step of the index thread
+SEARCH_CHUNK_BYTES = 16 * 1024 * 1024 # Bytes searched between two progress reports (and stop checks)
+MAX_LINE_CHARS = 4000            # Longer lines are cut off when displayed
+
+
+def should_use_viewer(file_path):
+    """True if a file is too large to load into the editor."""
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return False
+    if os.path.splitext(file_path)[1].lower() in DATA_EXTENSIONS:
+        return size >= DATA_VIEWER_BYTES
+    return size >= VIEWER_BYTES
+
+
+class MappedFile:
+    """
+    A read-only memory-mapped file with a sparse line index. Lines between two
+    indexed ones are found with mmap.find, so the index stays small even for
+    files with hundreds of millions of lines.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb")
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.checkpoints = array('Q', [0]) # Start offset of lines 0, INDEX_STEP, 2*INDEX_STEP, ...
+        self.line_count = 0                # Lines indexed so far
+        self.index_complete = self.size == 0
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self._file.close()
+
+    def line_offset(self, line):
+        """Byte offset where a line starts, or None if it isn't indexed yet."""
+        checkpoint = line // INDEX_STEP
+        if line >= self.line_count or checkpoint >= len(self.checkpoints):
+            return None
+        offset = self.checkpoints[checkpoint]
+        for _ in range(line % INDEX_STEP):
+            offset = self.mm.find(b'\n', offset) + 1
+        return offset
+
+    def read_lines(self, first, limit):
+        """Returns up to `limit` decoded lines starting at line `first`."""
+        offset = self.line_offset(first)
+        if offset is None:
+            return []
+        lines = []
+        for _ in range(min(limit, self.line_count - first)):
+            end = self.mm.find(b'\n', offset)
+            if end < 0:
+                end = self.size
+            text = self.mm[offset:min(end, offset + MAX_LINE_CHARS * 4)].decode(errors="replace")
+            lines.append(text[:MAX_LINE_CHARS].rstrip("\r"))
+            offset = end + 1
+        return lines
+
+    def line_of_offset(self, offset):
+        """Line number containing a byte offset. Needs the complete index."""
+        checkpoint = bisect_right(self.checkpoints, offset) - 1
+        start = self.checkpoints[checkpoint]
+        return checkpoint * INDEX_STEP + self.mm[start:offset].count(b'\n')
+
+
+class LineIndexThread(QThread):
+    """Scans a MappedFile in chunks and fills in its line index."""
+    progress = Signal(int, float)  # Lines indexed, fraction of the file scanned
+    index_finished = Signal(int)   # Total number of lines
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def run(self):
+        source = self.source
+        newlines = 0
+        position = 0
+        while position < source.size:
+            if self._stopped:
+                return
+            parts = source.mm[position:position + INDEX_CHUNK_BYTES].split(b'\n')
+            found = len(parts) - 1
+            # Start offsets of the lines after each newline, computed without a Python-level loop
+            starts = map(operator.add, accumulate(map(len, islice(parts, found))), count(position + 1))
+            source.checkpoints.extend(islice(starts, (-newlines - 1) % INDEX_STEP, None, INDEX_STEP))
+            newlines += found
+            position += INDEX_CHUNK_BYTES
+            source.line_count = newlines
+            self.progress.emit(newlines, min(1.0, position / source.size))
+
+        # A last line without a trailing newline still counts
+        if source.size and source.mm[source.size - 1:source.size] != b'\n':
+            newlines += 1
+        source.line_count = newlines
+        source.index_complete = True
+        self.index_finished.emit(newlines)
+
+
+class SearchThread(QThread):
+    """
+    Finds the next occurrence of a byte string in a MappedFile, wrapping around to the
+    start. The file is searched in chunks, so a search through gigabytes can be stopped.
+    """
+    progress = Signal(float)         # Fraction of the file searched
+    search_finished = Signal(int)    # Byte offset of the match, -1 if there is none
+
+    def __init__(self, source, needle, start_offset):
+        super().__init__()
+        self.source = source
+        self.needle = needle
+        self.start_offset = start_offset
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def run(self):
+        size = self.source.size
+        overlap = len(self.needle) - 1 # A match may straddle two chunks
+        searched = 0
+        for first, last in ((self.start_offset, size), (0, min(size, self.start_offset + overlap))):
+            position = first
+            while position < last:
+                if self._stopped:
+                    return
+                end = min(last, position + SEARCH_CHUNK_BYTES)
+                offset = self.source.mm.find(self.needle, position, min(last, end + overlap))
+                if offset >= 0:
+                    self.search_finished.emit(offset)
+                    return
+                searched += end - position
+                position = end
+                self.progress.emit(min(1.0, searched / size))
+        self.search_finished.emit(-1)
+
+
+class LineView(QAbstractScrollArea):
+    """Paints only the lines in the viewport; the vertical scroll bar counts lines."""
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.current_line = None # Line marked by Go to line or a search match
+        self.match = None        # (line, column, length) of the search match
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def visible_line_count(self):
+        return max(1, self.viewport().height() // self.fontMetrics().lineSpacing())
+
+    def update_scroll_range(self):
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.source.line_count - self.visible_line_count()))
+        vertical.setPageStep(self.visible_line_count())
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, MAX_LINE_CHARS * self.fontMetrics().horizontalAdvance('0') - self.viewport().width()))
+        horizontal.setPageStep(self.viewport().width())
+        self.viewport().update()
+
+    def show_line(self, line):
+        self.current_line = line
+        # Keep a few lines of context above the target
+        self.verticalScrollBar().setValue(max(0, line - self.visible_line_count() // 3))
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scroll_range()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        metrics = self.fontMetrics()
+        line_height = metrics.lineSpacing()
+        char_width = metrics.horizontalAdvance('0')
+        first = self.verticalScrollBar().value()
+        gutter = char_width * (len(str(max(1, self.source.line_count))) + 2)
+        x_offset = gutter - self.horizontalScrollBar().value()
+        palette = self.palette()
+
+        for row, text in enumerate(self.source.read_lines(first, self.visible_line_count() + 1)):
+            line = first + row
+            top = row * line_height
+            if line == self.current_line:
+                painter.fillRect(0, top, self.viewport().width(), line_height, palette.alternateBase())
+            if self.match is not None and self.match[0] == line:
+                _, column, length = self.match
+                painter.fillRect(x_offset + metrics.horizontalAdvance(text[:column]), top,
+                                 metrics.horizontalAdvance(text[column:column + length]), line_height,
+                                 palette.highlight())
+            painter.setPen(palette.text().color())
+            painter.drawText(x_offset, top + metrics.ascent(), text)
+            # Line numbers are drawn last so long lines scroll underneath them
+            painter.fillRect(0, top, gutter - char_width // 2, line_height, palette.window())
+            painter.setPen(QColor("#858585"))
+            painter.drawText(0, top, gutter - char_width, line_height, Qt.AlignRight, str(line + 1))
+
+
+class LargeFileViewer(QWidget):
+    """
+    Read-only window for files too large for the editor, typically generated test
+    data. Nothing is loaded into a QTextDocument: the file is memory-mapped and
+    only the visible lines are decoded.
+    """
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.source = MappedFile(file_path)
+        self.setWindowTitle(f"{os.path.basename(file_path)} ({format_memory(self.source.size)}) - FeatherIDE Viewer")
+        self.resize(900, 650)
+        self._match_offset = -1 # Byte offset of the last search match
+        self.search_thread = None
+
+        self.status_label = QLabel("Indexing lines...")
+        self.goto_input = QLineEdit()
+        self.goto_input.setPlaceholderText("Go to line")
+        self.goto_input.setFixedWidth(110)
+        self.goto_input.returnPressed.connect(self.go_to_line)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search")
+        self.search_input.returnPressed.connect(self.find_next)
+        self.search_input.textChanged.connect(self._reset_search)
+        self.find_button = QPushButton("Find Next")
+        self.find_button.clicked.connect(self.find_next)
+        self.find_button.setEnabled(False)
+
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(self.status_label, 1)
+        toolbar.addWidget(self.goto_input)
+        toolbar.addWidget(self.search_input)
+        toolbar.addWidget(self.find_button)
+
+        self.line_view = LineView(self.source)
+        layout = QVBoxLayout(self)
+        layout.addLayout(toolbar)
+        layout.addWidget(self.line_view)
+
+        self.index_thread = LineIndexThread(self.source)
+        self.index_thread.progress.connect(self._on_index_progress)
+        self.index_thread.index_finished.connect(self._on_index_finished)
+        self.index_thread.start()
+
+    def _on_index_progress(self, lines, fraction):
+        self.status_label.setText(f"Indexing lines... {fraction:.0%} ({lines:,} lines so far)")
+        self.line_view.update_scroll_range()
+
+    def _on_index_finished(self, lines):
+        self.status_label.setText(f"{lines:,} lines, {format_memory(self.source.size)}")
+        self.find_button.setEnabled(True)
+        self.line_view.update_scroll_range()
+
+    def go_to_line(self):
+        try:
+            line = int(self.goto_input.text().replace(",", "")) - 1
+        except ValueError:
+            return
+        if self.source.line_count == 0:
+            return
+        self.line_view.show_line(min(max(line, 0), self.source.line_count - 1))
+
+    def _reset_search(self):
+        self._match_offset = -1
+        if self.search_thread is not None:
+            self._stop_search() # It was looking for the old text
+            self.status_label.setText("Search stopped")
+
+    def find_next(self):
+        """
+        Searches for the next occurrence of the search text after the previous match, in
+        the background. While a search runs, the button stops it instead.
+        """
+        if self.search_thread is not None:
+            self._stop_search()
+            self.status_label.setText("Search stopped")
+            return
+        text = self.search_input.text()
+        if not text or not self.source.index_complete or self.source.mm is None:
+            return
+        self.search_thread = SearchThread(self.source, text.encode(), self._match_offset + 1)
+        self.search_thread.progress.connect(
+            lambda fraction: self.status_label.setText(f"Searching... {fraction:.0%}"))
+        self.search_thread.search_finished.connect(self._on_search_finished)
+        self.find_button.setText("Stop")
+        self.search_thread.start()
+
+    def _stop_search(self):
+        self.search_thread.stop()
+        self.search_thread.wait()
+        self.search_thread = None
+        self.find_button.setText("Find Next")
+
+    def _on_search_finished(self, offset):
+        if self.search_thread is None or self.sender() is not self.search_thread:
+            return # Stopped meanwhile
+        self.search_thread.wait()
+        self.search_thread = None
+        self.find_button.setText("Find Next")
+        text = self.search_input.text()
+        if offset < 0:
+            self.status_label.setText(f"'{text}' not found")
+            self.line_view.match = None
+            self.line_view.viewport().update()
+            return
+        wrapped = offset <= self._match_offset
+        self._match_offset = offset
+
+        line = self.source.line_of_offset(offset)
+        line_start = self.source.line_offset(line)
+        column = len(self.source.mm[line_start:offset].decode(errors="replace"))
+        self.line_view.match = (line, column, len(text))
+        self.line_view.show_line(line)
+        self.status_label.setText(f"Line {line + 1:,}, column {column + 1}" + (" (wrapped)" if wrapped else ""))
+
+    def closeEvent(self, event):
+        if self.search_thread is not None:
+            self._stop_search()
+        self.index_thread.stop()
+        self.index_thread.wait()
+        self.source.close()
+        super().closeEvent(event)
@@ -0,0 +1,128 @@
+import json
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# Stages of one keystroke, in the order they happen:
+#   edit        keyPressEvent minus the highlighting and completion it triggered: text insertion,
+#               layout and every contentsChange/textChanged slot (unsaved flag, title, identifier index)
+#   highlight   highlightBlock calls made while the key was handled
+#   completion  filling and showing the completion popup
+#   queued      from the end of keyPressEvent until the editor starts painting
+#   paint       the editor's paintEvent
+#   total       key press to the end of the paint
+STAGES = ("edit", "highlight", "completion", "queued", "paint", "total")
+WINDOW = 500           # Keystrokes kept for the rolling percentiles
+SUMMARY_INTERVAL = 0.5 # Seconds between two stats_changed signals
+PAINT_TIMEOUT_MS = 250 # A key not painted within this changed nothing visible and isn't sampled
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class KeystrokeLatencyProbe(QObject):
+    """
+    Measures each keystroke from keyPressEvent to the repaint that shows it, split
+    into STAGES. The editor and the highlighter call the hooks below while the probe
+    is attached. Keys pressed before the previous one was painted show up in the same
+    frame: each is sampled from its own key press, and all but one are counted as
+    coalesced. A key that is not painted within PAINT_TIMEOUT_MS (an arrow key that
+    doesn't scroll, say) is counted as unpainted and left out of the percentiles.
+    """
+    stats_changed = Signal(str) # Short p50/p99 summary for the status bar, throttled
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.samples = deque(maxlen=WINDOW) # Dicts of stage -> milliseconds, oldest first
+        self.coalesced = 0
+        self.unpainted = 0
+        self._current = None   # Stage times of the key being handled, plus its "start" and "end"
+        self._pending = []     # Those of handled keys waiting for their paint
+        self._paint_start = None
+        self._last_summary = 0.0
+        self._expiry_timer = QTimer(self)
+        self._expiry_timer.setSingleShot(True)
+        self._expiry_timer.setInterval(PAINT_TIMEOUT_MS)
+        self._expiry_timer.timeout.connect(self._expire_pending)
+
+    # --- hooks ---
+
+    def key_started(self):
+        self._expire_pending()
+        self._current = {"highlight": 0.0, "completion": 0.0, "start": time.perf_counter()}
+
+    def key_finished(self):
+        current = self._current
+        if current is None:
+            return
+        current["end"] = time.perf_counter()
+        current["edit"] = max(0.0, current["end"] - current["start"] - current["highlight"] - current["completion"])
+        self._pending.append(current)
+        self._current = None
+        self._expiry_timer.start()
+
+    def add_highlight(self, seconds):
+        if self._current is not None:
+            self._current["highlight"] += seconds
+
+    def add_completion(self, seconds):
+        if self._current is not None:
+            self._current["completion"] += seconds
+
+    def paint_started(self):
+        self._paint_start = time.perf_counter() if self._pending else None
+
+    def paint_finished(self):
+        if self._paint_start is None or not self._pending:
+            return
+        now = time.perf_counter()
+        for pending in self._pending:
+            pending["queued"] = self._paint_start - pending["end"]
+            pending["paint"] = now - self._paint_start
+            pending["total"] = now - pending["start"]
+            self.samples.append({stage: pending[stage] * 1000 for stage in STAGES})
+        self.coalesced += len(self._pending) - 1
+        self._pending = []
+        self._paint_start = None
+        self._expiry_timer.stop()
+        if now - self._last_summary >= SUMMARY_INTERVAL:
+            self._last_summary = now
+            self.stats_changed.emit(self.summary())
+
+    def _expire_pending(self):
+        """Drops the handled keys that have waited longer than PAINT_TIMEOUT_MS for a paint."""
+        oldest = time.perf_counter() - PAINT_TIMEOUT_MS / 1000
+        waiting = [pending for pending in self._pending if pending["end"] >= oldest]
+        self.unpainted += len(self._pending) - len(waiting)
+        self._pending = waiting
+        if waiting:
+            self._expiry_timer.start()
+
+    # --- results ---
+
+    def percentiles(self, stage):
+        """(p50, p99) of a stage over the rolling window, in milliseconds."""
+        ordered = sorted(sample[stage] for sample in self.samples)
+        if not ordered:
+            return 0.0, 0.0
+        return percentile(ordered, 0.5), percentile(ordered, 0.99)
+
+    def summary(self):
+        p50, p99 = self.percentiles("total")
+        # The slowest stage at p99 is the one worth looking at
+        worst = max(STAGES[:-1], key=lambda stage: self.percentiles(stage)[1])
+        return f"Keystroke p50 {p50:.1f} ms, p99 {p99:.1f} ms (p99 mostly {worst})"
+
+    def export(self, path):
+        """Writes the per-stage percentiles and every sample in the window as JSON."""
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "keystrokes": len(self.samples),
+            "coalesced": self.coalesced,
+            "unpainted": self.unpainted,
+            "stages": {stage: dict(zip(("p50", "p99"), self.percentiles(stage))) for stage in STAGES},
+            "samples": list(self.samples),
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
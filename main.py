@@ -1,13 +1,13 @@
 import sys
 import os
-import json
+import time
 
-from PySide6.QtCore import QCoreApplication, QRect, Qt, QMetaObject
+from PySide6.QtCore import QCoreApplication, QRect, Qt, QMetaObject, QTimer
 from PySide6.QtGui import QAction, QIcon
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QMenuBar, QMenu, QStatusBar,
-    QTreeView, QTextEdit, QSplitter, QVBoxLayout, QFileSystemModel, QFileDialog,
-    QMessageBox, QTabWidget, QLineEdit, QPushButton, QHBoxLayout
+    QTreeView, QTextEdit, QSplitter, QVBoxLayout, QFileDialog,
+    QMessageBox, QTabWidget, QLineEdit, QPushButton, QHBoxLayout, QLabel
 )
 from file_manager import FileManager
 from ui_mainwindow import Ui_MainWindow
@@ -17,13 +17,17 @@ from bottom_tabs import BottomTabsWidget
 from UIs.Disable import Ui_FormDisable
 from UIs.Enable import Ui_FormEnable
 
-from ai_config import OllamaThread
+from ai_config import AiResponseCache, AiWorker, Conversation
 
 from themes import apply_custom_theme1, apply_custom_theme2, apply_custom_theme3, apply_custom_theme4
 
-from syntax_highlighter import CppSyntaxHighlighter
+from document_tabs import DocumentTabs
+from project_tree import ProjectTreeModel
 
-from auto_close import CustomTextEdit
+from auto_close import CustomPlainTextEdit
+from latency_probe import KeystrokeLatencyProbe
+from settings import Settings
+from autosave import discard_journal_file, find_recovery_entries
 class MainWindow(QMainWindow):
 
     def __init__(self):
@@ -33,22 +37,8 @@ class MainWindow(QMainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
 
-        appdata_path = os.getenv('APPDATA')
-        folder_path = os.path.join(appdata_path, "FeatherIDE")
-        os.makedirs(folder_path, exist_ok=True)
-        
-
-
-        self.json_file_path = os.path.join(folder_path, "comp.json")
-
-        # Initialize data if the file doesn't exist yet
-        if not os.path.exists(self.json_file_path) or os.path.getsize(self.json_file_path) == 0:
-            data = {"password": "", "comp": 0}
-            with open(self.json_file_path, "w") as f:
-                json.dump(data, f)
-            print("JSON file initialized with default data.")
-        else:
-            print("JSON file already exists and is not empty.")
+        # Read once; competition mode and AI checks are answered from memory
+        self.settings = Settings(parent=self)
 
         # === Custom layout using splitters ===
         # Vertical splitter to separate editor/tree from bottom tabs
@@ -58,26 +48,35 @@ class MainWindow(QMainWindow):
 
         # Tree view for file system navigation
         self.tree_view = QTreeView()
-        self.model = QFileSystemModel()
+        # Build outputs, .git and the test data of folders full of generated tests are left out
+        self.model = ProjectTreeModel(self.settings.get("tree_ignore_patterns"), self.settings.get("tree_max_test_files"),
+                                      parent=self)
         # Set the root path to the current working directory for initial display
 
         #self.model.setRootPath(os.path.abspath(os.getcwd())) 
         self.tree_view.setModel(self.model)
-        self.tree_view.setRootIndex(self.model.index(os.path.abspath(os.getcwd())))
+        self.tree_view.setRootIndex(self.model.index_for_path(os.path.abspath(os.getcwd())))
         horizontal_splitter.addWidget(self.tree_view)
         # Hide unnecessary columns in the tree view
         self.tree_view.hideColumn(2)  # Hide "File Type"
         self.tree_view.hideColumn(3)  # Hide "Last Modified"
 
         # Code editor area
-        self.editor = CustomTextEdit()
+        self.editor = CustomPlainTextEdit()
 
         self.editor.setPlaceholderText("Start coding here...")
 
-        
-        self.highlighter = CppSyntaxHighlighter(self.editor.document())
-
-        horizontal_splitter.addWidget(self.editor)
+        # One tab per open file above the editor; each keeps its own document and highlighter
+        self.document_tabs = DocumentTabs(self.editor, self.settings.get("editor_memory_mb"))
+        self.settings.changed.connect(self._handle_setting_changed)
+        editor_area = QWidget()
+        editor_layout = QVBoxLayout(editor_area)
+        editor_layout.setContentsMargins(0, 0, 0, 0)
+        editor_layout.setSpacing(0)
+        editor_layout.addWidget(self.document_tabs)
+        editor_layout.addWidget(self.editor)
+
+        horizontal_splitter.addWidget(editor_area)
         # Set stretch factors for horizontal splitter: tree view takes 1 part, editor takes 3 parts
         horizontal_splitter.setStretchFactor(0, 1)
         horizontal_splitter.setStretchFactor(1, 3)
@@ -115,6 +114,20 @@ class MainWindow(QMainWindow):
         help_action.triggered.connect(self.show_help_dialog)
         help_menu.addAction(help_action)
 
+        # Keystroke latency probe; its rolling p50/p99 is shown in the status bar while enabled
+        help_menu.addSeparator()
+        latency_action = QAction("Measure Keystroke Latency", self)
+        latency_action.setCheckable(True)
+        latency_action.toggled.connect(self.toggle_latency_probe)
+        help_menu.addAction(latency_action)
+        export_latency_action = QAction("Export Keystroke Latency...", self)
+        export_latency_action.triggered.connect(self.export_keystroke_latency)
+        help_menu.addAction(export_latency_action)
+        self.latency_probe = None
+        self.latency_label = QLabel()
+        self.latency_label.hide()
+        self.ui.statusbar.addPermanentWidget(self.latency_label)
+
         
 
         # Assemble into vertical splitter: horizontal splitter (tree+editor) on top, bottom_tabs at bottom
@@ -143,9 +156,13 @@ class MainWindow(QMainWindow):
         self.ui.actionDelete.setShortcut("Del")
         self.ui.actionBuild.setShortcut("F7") # Shortcut for Build
         self.ui.actionBuildAndRun.setShortcut("Ctrl+F5") # Shortcut for Build and Run
+        self.ui.actionCancelBuild.setShortcut("Ctrl+Break") # Shortcut for Cancel Build
+        self.ui.actionRunTests.setShortcut("F8") # Shortcut for Run Tests
+        self.ui.actionStressTest.setShortcut("Ctrl+F8") # Shortcut for Stress Test
 
         # Initialize FileManager, passing necessary UI components and the update_window_title callback
-        self.file_manager = FileManager(self, self.editor, self.model, self.tree_view, self.update_window_title)
+        self.file_manager = FileManager(self, self.editor, self.model, self.tree_view, self.update_window_title,
+                                        self.document_tabs)
 
         # Connect UI actions to FileManager methods
         self.ui.actionNewProject.triggered.connect(self.file_manager.new_project) 
@@ -154,6 +171,11 @@ class MainWindow(QMainWindow):
         self.ui.actionSave.triggered.connect(self.file_manager.save_note)
         self.ui.actionSave_As.triggered.connect(self.file_manager.save_as_note)
 
+        # Background saves report back to MainWindow slots so they run on the GUI thread
+        self.file_manager.autosave.save_finished.connect(self._handle_save_finished)
+        self.file_manager.autosave.save_failed.connect(self._handle_save_failed)
+        self.file_manager.autosave.start()
+
         # Connect template actions
         self.ui.actionLoadTemplate.triggered.connect(self.file_manager.load_template) 
         self.ui.actionSaveTemplate.triggered.connect(self.file_manager.save_template) 
@@ -161,6 +183,10 @@ class MainWindow(QMainWindow):
         # Connect build actions to new methods in MainWindow
         self.ui.actionBuild.triggered.connect(self.file_manager.build_code1)
         self.ui.actionBuildAndRun.triggered.connect(self.file_manager.build_and_run)
+        self.ui.actionCancelBuild.triggered.connect(self.file_manager.cancel_build)
+        self.ui.actionRunTests.triggered.connect(self.file_manager.run_tests)
+        self.ui.actionStressTest.triggered.connect(self.file_manager.stress_test)
+        self.bottom_tabs.stop_stress_button.clicked.connect(self.file_manager.stop_stress_test)
 
         # Connect competition actions (you'll need to define these methods in FileManager or MainWindow)
         self.ui.actionEnableCompetition.triggered.connect(self.enable_competition_mode)
@@ -170,17 +196,37 @@ class MainWindow(QMainWindow):
         self.bottom_tabs.send_chat_button.clicked.connect(self.send_ai_message)
         self.bottom_tabs.chat_input.returnPressed.connect(self.send_ai_message)
 
+        # One AI worker for the whole session; questions queue up while an answer streams
+        self.ai_worker = AiWorker(cache=AiResponseCache(), parent=self)
+        self.ai_worker.request_started.connect(self._handle_ai_started)
+        self.ai_worker.partial_response.connect(self._handle_ai_partial)
+        self.ai_worker.response_ready.connect(self._handle_ai_response)
+        self.ai_worker.stats_ready.connect(self._handle_ai_stats)
+        self.ai_worker.error_occurred.connect(self._handle_ai_error)
+        self.ai_worker.request_cancelled.connect(self._handle_ai_cancelled)
+        self.ai_worker.queue_changed.connect(self._handle_ai_queue)
+        self.bottom_tabs.stop_ai_button.clicked.connect(self.ai_worker.cancel_current)
+        self.bottom_tabs.new_chat_button.clicked.connect(self.new_ai_conversation)
+        self.ai_conversation = Conversation(self.settings.get("ai_context_tokens")) # Earlier questions and answers sent as context
+        self._ai_answer_id = None # Request whose answer is being streamed into the chat
+        self.ai_worker.start()
+
         # Connect text editor changes to mark the file as unsaved
         self.editor.textChanged.connect(self.file_manager.mark_unsaved)
 
         # Connect tree view item clicks to open files
         self.tree_view.clicked.connect(self.file_manager.open_file_from_tree_view)
+        self.tree_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tree_view.customContextMenuRequested.connect(self.file_manager.show_tree_menu)
 
         # Set the initial window title
         self.update_window_title()
 
         self.setWindowIcon(QIcon("Resources/feather.ico"))
 
+        # Once the window is up, offer the work a crashed session left unsaved
+        QTimer.singleShot(0, self.offer_recovery)
+
     def wheelEvent(self, event):
         # Check if Ctrl key is pressed and user is scrolling
         if event.modifiers() == Qt.ControlModifier:
@@ -202,47 +248,108 @@ class MainWindow(QMainWindow):
         super().wheelEvent(event)
         
     def update_window_title(self):
-        print("DEBUG: Entering update_window_title")
         file_name, is_unsaved = self.file_manager.get_filename_and_status()
-        print(f"DEBUG: file_name={file_name}, is_unsaved={is_unsaved}")
         if is_unsaved:
             title = f"{file_name}* - FeatherIDE"
         else:
             title = f"{file_name} - FeatherIDE"
-        print(f"DEBUG: Setting title to: {title}")
         self.setWindowTitle(title)
-        print("DEBUG: Exiting update_window_title")
+        self.document_tabs.refresh_tab(self.document_tabs.current_document())
+
+    @property
+    def highlighter(self):
+        """Highlighter of the document in the current tab."""
+        return self.document_tabs.current_document().highlighter
+
+    def _handle_setting_changed(self, key):
+        if key == "editor_memory_mb":
+            self.document_tabs.set_memory_budget(self.settings.get("editor_memory_mb"))
+        elif key in ("tree_ignore_patterns", "tree_max_test_files"):
+            self.model.set_ignore(self.settings.get("tree_ignore_patterns"), self.settings.get("tree_max_test_files"))
+
+    def _handle_save_finished(self, save_id, path, written):
+        self.file_manager.on_save_finished(save_id, True)
+        name = os.path.basename(path)
+        self.statusBar().showMessage(f"Saved '{name}'" if written else f"'{name}' is unchanged on disk", 3000)
+
+    def _handle_save_failed(self, save_id, path, error_message):
+        self.file_manager.on_save_finished(save_id, False)
+        document = self.document_tabs.find(path)
+        if document is not None:
+            document.is_unsaved = True # The changes are still only in the editor
+            self.update_window_title()
+        QMessageBox.critical(self, "Error", f"Could not save file: {error_message}")
+
+    def offer_recovery(self):
+        """Asks whether to restore the unsaved work left behind by a previous session, one tab per file."""
+        entries = find_recovery_entries(self.file_manager.autosave.recovery_dir)
+        if not entries:
+            return
+        titles = ", ".join(f"'{entry.title}'" for entry in entries)
+        when = time.strftime("%H:%M:%S on %d %b", time.localtime(entries[0].saved_at))
+        reply = QMessageBox.question(
+            self, "Recover Unsaved Work",
+            f"FeatherIDE closed with unsaved changes to {titles} (last snapshot at {when}).\n"
+            "Restore them?",
+            QMessageBox.Yes | QMessageBox.Discard, QMessageBox.Yes)
+        if reply != QMessageBox.Yes:
+            for entry in entries:
+                discard_journal_file(entry.journal_path)
+            return
+        file_manager = self.file_manager
+        for entry in reversed(entries): # The newest ends up in the current tab
+            if entry.path and os.path.isfile(entry.path):
+                file_manager._load_file_into_editor(entry.path)
+                self.editor.setPlainText(entry.text)
+            else:
+                # Restored under its old name (or as untitled); saving it writes the file again
+                document = self.document_tabs.open_document(entry.path or None, entry.title, entry.text)
+                if entry.document_id:
+                    document.journal_id = entry.document_id # Keeps rewriting the same journal
+            self.editor.document().setModified(True)
+            file_manager.mark_unsaved() # Shows the asterisk; the same journal is rewritten from the editor shortly
+
+    def toggle_latency_probe(self, enabled):
+        """Attaches a KeystrokeLatencyProbe to the editor and its highlighter, or detaches it."""
+        if enabled:
+            self.latency_probe = KeystrokeLatencyProbe(self)
+            self.latency_probe.stats_changed.connect(self.latency_label.setText)
+            self.latency_label.setText("Keystroke latency: type to measure")
+            self.latency_label.show()
+        else:
+            self.latency_label.hide()
+        self.editor.latency_probe = self.latency_probe if enabled else None
+        self.highlighter.latency_probe = self.latency_probe if enabled else None
+
+    def export_keystroke_latency(self):
+        if self.latency_probe is None or not self.latency_probe.samples:
+            QMessageBox.information(self, "Keystroke Latency",
+                                    "Enable Help > Measure Keystroke Latency and type for a while first.")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Keystroke Latency", "keystroke_latency.json",
+                                              "JSON Files (*.json)")
+        if not path:
+            return
+        try:
+            self.latency_probe.export(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not write {path}: {e}")
 
     def save_password_and_enable(self):
         password = self.form.textEdit.toPlainText()
-
-        data = {
-                "password": password,
-                "comp": 1  # or some other flag you want to save
-        }
-        
-        # Write to a JSON file
-        with open(self.json_file_path, "w") as f:
-            json.dump(data, f)
+        self.settings.update({"password": password, "comp": 1})
+        self.settings.flush() # Competition mode must survive a crash right after enabling it
         
         self.form_widget.close()
+        self.ai_worker.cancel_all() # No AI answers during a competition
         QMessageBox.information(self, "Competition Mode", "Competition mode is ENABLED!")
 
 
     def enter_password(self):
-        try:
-            with open(self.json_file_path, "r") as f:
-                data = json.load(f)
-        except:
-            return
         password = self.form.textEdit.toPlainText()
-        if password == data.get("password",0):
-            data = {
-                    "password": "",
-                    "comp": 0  # or some other flag you want to save
-            }
-            with open(self.json_file_path, "w") as f:
-                json.dump(data, f)
+        if password == self.settings.get("password"):
+            self.settings.update({"password": "", "comp": 0})
+            self.settings.flush()
 
             self.form_widget.close()    
             QMessageBox.information(self, "Competition Mode", "Competition mode is DISABLED!")
@@ -250,12 +357,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "Incorrect password.")
 
     def enable_competition_mode(self):
-        try:
-            with open(self.json_file_path, "r") as f:
-                data = json.load(f)
-        except:
-            return
-        if  data.get("comp",0) == 0:  # If competition mode is currently DISABLED
+        if self.settings.get("comp") == 0:  # If competition mode is currently DISABLED
             self.form_widget = QWidget()
             self.form = Ui_FormEnable()
             self.form.setupUi(self.form_widget)
@@ -266,12 +368,7 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Competition Mode", "Competition mode is already ENABLED!")
 
     def disable_competition_mode(self):
-        try:
-            with open(self.json_file_path, "r") as f:
-                data = json.load(f)
-        except:
-            return
-        if  data.get("comp",0) == 1:
+        if self.settings.get("comp") == 1:
             self.form_widget = QWidget()
             self.form = Ui_FormDisable()
             self.form.setupUi(self.form_widget)
@@ -282,45 +379,64 @@ class MainWindow(QMainWindow):
 
 
     def send_ai_message(self):
-        try:
-            with open(self.json_file_path, "r") as f:
-                data = json.load(f)
-        except:
-            return
-        if  data.get("comp",0) == 0:
+        if self.settings.get("comp") == 0:
             user_message = self.bottom_tabs.chat_input.text()
             if not user_message:
                 return
 
             self.bottom_tabs.chat_display.append(f"<b>You:</b> {user_message}")
             self.bottom_tabs.chat_input.clear()
-            
-
-            self.bottom_tabs.send_chat_button.setEnabled(False)
-            self.bottom_tabs.chat_input.setEnabled(False)
-            self.bottom_tabs.chat_display.append("<i>AI is thinking...</i>")
-
-
-            self.ollama_thread = OllamaThread(prompt=user_message, model_name="openchat")
-            self.ollama_thread.response_ready.connect(self._handle_ai_response)
-            self.ollama_thread.error_occurred.connect(self._handle_ai_error)
-            self.ollama_thread.finished.connect(self._enable_chat_controls) # Re-enable controls when thread finishes
-            self.ollama_thread.start() # Start the thread
-
-    def _handle_ai_response(self, response_text):
-        """Slot to receive AI response from OllamaThread."""
-        self.bottom_tabs.chat_display.append(f"<b>AI:</b> {response_text}")
 
-    def _handle_ai_error(self, error_message):
-        """Slot to receive error messages from OllamaThread."""
+            if self.ai_worker.is_busy():
+                self.bottom_tabs.chat_display.append("<i>Queued; it will be answered after the current reply.</i>")
+            self.ai_worker.submit(user_message, model_name=self.settings.get("ai_model"),
+                                  use_cache=self.bottom_tabs.ai_cache_checkbox.isChecked(),
+                                  conversation=self.ai_conversation)
+
+    def new_ai_conversation(self):
+        """Starts over without context; answers still streaming belong to the old conversation."""
+        self.ai_conversation = Conversation(self.settings.get("ai_context_tokens"))
+        self.bottom_tabs.chat_display.append("<i style='color: gray;'>New conversation started.</i>")
+
+    def _handle_ai_started(self, request_id):
+        """Slot called when the AI worker starts answering a request."""
+        self.bottom_tabs.chat_display.append("<i>AI is thinking...</i>")
+
+    def _handle_ai_partial(self, request_id, text):
+        """Slot to receive the next streamed piece of the AI response."""
+        if self._ai_answer_id != request_id:
+            self._ai_answer_id = request_id
+            self.bottom_tabs.start_ai_answer()
+        self.bottom_tabs.append_ai_text(text)
+
+    def _handle_ai_response(self, request_id, response_text):
+        """Slot to receive the complete AI response from the AI worker."""
+        if self._ai_answer_id != request_id:
+            # Nothing was streamed (e.g. an empty answer)
+            self.bottom_tabs.chat_display.append(f"<b>AI:</b> {response_text}")
+
+    def _handle_ai_queue(self, waiting):
+        # Signals from the worker thread can arrive after newer submits, so ask for the current count
+        self.bottom_tabs.show_ai_queue(self.ai_worker.queued_count())
+
+    def _handle_ai_stats(self, request_id, stats):
+        self.bottom_tabs.show_ai_stats(stats)
+
+    def _handle_ai_cancelled(self, request_id):
+        self.bottom_tabs.chat_display.append("<i style='color: gray;'>AI answer cancelled.</i>")
+
+    def _handle_ai_error(self, request_id, error_message):
+        """Slot to receive error messages from the AI worker."""
         self.bottom_tabs.chat_display.append(f"<i style='color: red;'>AI Error: {error_message}</i>")
         QMessageBox.critical(self, "AI Chat Error", error_message)
 
-    def _enable_chat_controls(self):
-        """Re-enables chat input and send button."""
-        self.bottom_tabs.send_chat_button.setEnabled(True)
-        self.bottom_tabs.chat_input.setEnabled(True)
-        self.bottom_tabs.chat_input.setFocus() # Put focus back to input field
+    def closeEvent(self, event):
+        self.editor.completion_stats.save()
+        self.settings.flush()
+        self.ai_worker.stop()
+        self.ai_worker.wait(2000)
+        self.file_manager.shutdown()
+        super().closeEvent(event)
 
     def show_about_dialog(self):
         from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel
@@ -355,9 +471,17 @@ class MainWindow(QMainWindow):
             "- Ctrl+O: Open File\n"
             "- F7: Build Code\n"
             "- Ctrl+F5: Build and Run\n"
-            "- Use the AI Chat tab to ask coding questions\n"
+            "- Ctrl+Break: Cancel a running build\n"
+            "- F8: Run the solution against all .in/.out tests in the project folder\n"
+            "- Ctrl+F8: Stress test against brute.cpp using inputs from gen.cpp\n"
+            "- Time, memory and output limits for runs can be set per project in .featheride.json\n"
+            "- Use the AI Chat tab to ask coding questions; you can send follow-ups while an answer streams, Stop cancels it\n"
             "- Use the Notes tab to write temporary notes\n"
             "- Use Templates to save a starting code for future projects\n"
+            "- Every opened file gets its own tab and keeps its edits, undo history and highlighting\n"
+            "- The project tree hides .git and build outputs, and lists only the first 100 test files of a folder;\n"
+            "  right-click the folder to list the rest, or change tree_ignore_patterns and tree_max_test_files in settings.json\n"
+            "- Unsaved changes are snapshotted every couple of seconds and offered back after a crash\n"
             "- Enable Competition Mode to restrict actions"
         )
 
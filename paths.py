@@ -0,0 +1,14 @@
+import os
+from PySide6.QtCore import QStandardPaths
+
+
+def app_data_dir(*names):
+    """
+    Per-user FeatherIDE folder, or a path inside it: %APPDATA%\\FeatherIDE on Windows,
+    ~/.config/FeatherIDE on Linux. Settings, recovery journals, completion stats and
+    the AI answer cache all live here.
+    """
+    base = os.getenv('APPDATA') or QStandardPaths.writableLocation(QStandardPaths.GenericConfigLocation)
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "FeatherIDE", *names)
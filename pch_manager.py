@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from PySide6.QtCore import QObject, QProcess, Signal
+
+from compile_cache import cache_root, compiler_version
+
+SYSTEM_INCLUDE_RE = re.compile(r'^\s*#\s*include\s*<[^>]+>\s*(//.*)?$')
+
+
+def detect_prologue(source_text):
+    """
+    Returns the leading block of system #include lines of a source file.
+    Scanning stops at the first line that is not a system include, a blank line
+    or a // comment, so macros defined before the includes are never skipped.
+    """
+    includes = []
+    for line in source_text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("//"):
+            continue
+        if SYSTEM_INCLUDE_RE.match(line):
+            includes.append(stripped.split("//")[0].strip())
+            continue
+        break
+    return "\n".join(includes)
+
+
+class PchEntry:
+    """
+    A precompiled header for one include prologue, compiler and flag set.
+    """
+    def __init__(self, directory, prologue, config):
+        self.directory = directory # Cache folder holding the header, the .gch and timings
+        self.prologue = prologue   # The #include lines that were precompiled
+        self.config = config       # Compiler version and flags the .gch was built with
+        self.header_path = os.path.join(directory, "prologue.h")
+        self.gch_path = self.header_path + ".gch"
+        self.failed_marker = os.path.join(directory, "failed")
+
+    def is_ready(self):
+        return os.path.isfile(self.gch_path)
+
+
+class PchManager(QObject):
+    """
+    Builds and reuses GCC precompiled headers for the include prologue that most
+    competitive-programming sources start with. The first build of a prologue runs
+    without a PCH and measures its compile time; the .gch is then generated in the
+    background and passed through -include on later builds.
+    """
+    message = Signal(str) # Status lines for the build output
+
+    def __init__(self, pch_dir=None, parent=None):
+        super().__init__(parent)
+        self.pch_dir = pch_dir or os.path.join(cache_root(), "pch")
+        self._process = None
+        self._building_entry = None
+        self._build_start = 0.0
+
+    def entry_for(self, source_path, compiler, flags):
+        """Returns the PchEntry for a source file, or None if it has no include prologue."""
+        try:
+            with open(source_path, "r", errors="replace") as f:
+                prologue = detect_prologue(f.read())
+        except OSError:
+            return None
+        if not prologue:
+            return None
+
+        # One folder per prologue; the config file decides whether its .gch is still valid
+        prologue_hash = hashlib.sha256(prologue.encode()).hexdigest()[:24]
+        config = compiler_version(compiler) + "\n" + " ".join(flags)
+        entry = PchEntry(os.path.join(self.pch_dir, prologue_hash), prologue, config)
+        self._invalidate_if_stale(entry)
+        return entry
+
+    def _invalidate_if_stale(self, entry):
+        config_path = os.path.join(entry.directory, "config.txt")
+        try:
+            with open(config_path, "r") as f:
+                stored_config = f.read()
+        except OSError:
+            stored_config = None
+        if stored_config is not None and stored_config != entry.config:
+            # Compiler or flags changed: the old .gch and its timings no longer apply
+            shutil.rmtree(entry.directory, ignore_errors=True)
+            self.message.emit("Precompiled header invalidated (compiler or flags changed).")
+
+    def flags_for(self, entry):
+        """Extra compiler flags that make g++ use the entry's .gch, or [] if it isn't built yet."""
+        if entry is None or not entry.is_ready() or self.is_building(entry):
+            return []
+        return ["-include", entry.header_path, "-Winvalid-pch"]
+
+    def is_building(self, entry=None):
+        if self._process is None:
+            return False
+        return entry is None or self._building_entry.directory == entry.directory
+
+    def _load_timings(self, entry):
+        try:
+            with open(os.path.join(entry.directory, "timings.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record_build(self, entry, duration, used_pch):
+        """
+        Stores the compile time of a successful build and returns a line comparing
+        builds with and without the precompiled header (or None if nothing to compare).
+        """
+        timings = self._load_timings(entry)
+        timings["with_pch" if used_pch else "without_pch"] = duration
+        try:
+            os.makedirs(entry.directory, exist_ok=True)
+            with open(os.path.join(entry.directory, "timings.json"), "w") as f:
+                json.dump(timings, f)
+        except OSError:
+            pass
+
+        if used_pch and "without_pch" in timings:
+            return (f"Precompiled header used: {duration:.2f} s "
+                    f"(without PCH: {timings['without_pch']:.2f} s)")
+        if used_pch:
+            return f"Precompiled header used: {duration:.2f} s"
+        return None
+
+    def build(self, entry, compiler, flags):
+        """Generates the entry's .gch in a background process."""
+        if entry is None or entry.is_ready() or self._process is not None:
+            return
+        if os.path.exists(entry.failed_marker):
+            return # Already failed with this compiler and flags; don't retry on every build
+        try:
+            os.makedirs(entry.directory, exist_ok=True)
+            with open(entry.header_path, "w") as f:
+                f.write(entry.prologue + "\n")
+            with open(os.path.join(entry.directory, "config.txt"), "w") as f:
+                f.write(entry.config)
+        except OSError as e:
+            self.message.emit(f"Could not prepare precompiled header: {e}")
+            return
+
+        self._building_entry = entry
+        self._process = QProcess(self)
+        self._process.setProcessChannelMode(QProcess.MergedChannels)
+        self._process.finished.connect(self._on_finished)
+        self._process.errorOccurred.connect(self._on_error)
+        self.message.emit("Building precompiled header for the include prologue in the background...")
+        self._build_start = time.perf_counter()
+        # Written to a temporary name so a half-built .gch is never picked up
+        self._process.start(compiler, list(flags) + ["-x", "c++-header", entry.header_path, "-o", entry.gch_path + ".tmp"])
+
+    def _on_error(self, error):
+        if error == QProcess.FailedToStart and self._process is not None:
+            self._finish(False)
+
+    def _on_finished(self, exit_code, exit_status):
+        self._finish(exit_status == QProcess.NormalExit and exit_code == 0)
+
+    def _finish(self, ok):
+        if self._process is None:
+            return
+        process = self._process
+        entry = self._building_entry
+        output = bytes(process.readAll()).decode(errors="replace").strip()
+        self._process = None
+        self._building_entry = None
+        process.deleteLater()
+
+        duration = time.perf_counter() - self._build_start
+        if ok:
+            try:
+                os.replace(entry.gch_path + ".tmp", entry.gch_path)
+                self.message.emit(f"Precompiled header ready ({duration:.2f} s); later builds will use it.")
+                return
+            except OSError:
+                pass
+        try:
+            open(entry.failed_marker, "w").close()
+        except OSError:
+            pass
+        self.message.emit("Precompiled header build failed; builds continue without it.")
+        if output:
+            self.message.emit(output)
@@ -0,0 +1,185 @@
+import os
+import re
+from fnmatch import translate
+from PySide6.QtCore import QSortFilterProxyModel, Qt
+from PySide6.QtWidgets import QFileSystemModel
+
+from test_runner import EXPECTED_EXTENSIONS, natural_key
+
+# Names hidden from the project tree: version control, editor folders and build outputs.
+# Hidden folders are never listed, so they are never watched either.
+DEFAULT_IGNORE_PATTERNS = [
+    ".git", ".svn", ".hg", ".vs", ".vscode", ".idea", "__pycache__",
+    "build", "cmake-build-*", "*.o", "*.obj", "*.exe", "*.ilk", "*.pdb", "*.gch", "*.pch", "*.dSYM",
+]
+DEFAULT_MAX_TEST_FILES = 100 # Folders with more test data files than this only list the first ones
+
+SOURCE_EXTENSIONS = (".cpp", ".cc", ".cxx", ".c") # A file named like one of these minus the extension is its executable
+HEADER_EXTENSIONS = (".h", ".hpp", ".hh")
+TEST_DATA_EXTENSIONS = (".in",) + EXPECTED_EXTENSIONS
+TEST_DATA_PREFIX_RE = re.compile(r"^(?:input|output)", re.IGNORECASE)
+
+
+def is_test_data(name):
+    """Input and expected output files, as find_test_cases pairs them. Sources such as input_gen.cpp are not."""
+    lower = name.lower()
+    if lower.endswith(TEST_DATA_EXTENSIONS):
+        return True
+    return TEST_DATA_PREFIX_RE.match(name) is not None and not lower.endswith(SOURCE_EXTENSIONS + HEADER_EXTENSIONS)
+
+
+def is_build_output(sibling_names, name):
+    """The executable g++ writes next to a source on Linux and macOS: the source's name without extension."""
+    return "." not in name and any(name + ext in sibling_names for ext in SOURCE_EXTENSIONS)
+
+
+def is_inside(path, folder):
+    try:
+        return os.path.commonpath([os.path.abspath(path), os.path.abspath(folder)]) == os.path.abspath(folder)
+    except ValueError:
+        return False # Different drives
+
+
+class ProjectTreeModel(QSortFilterProxyModel):
+    """
+    The file system as shown in the project tree. Names matching the ignore patterns and
+    compiled solutions are left out. A folder holding more than max_test_files test data
+    files lists only the first max_test_files of them, its name says how many more there
+    are, and reveal_test_files lists them all. Folders are only listed (and watched) once
+    they are expanded.
+    """
+    def __init__(self, ignore_patterns=DEFAULT_IGNORE_PATTERNS, max_test_files=DEFAULT_MAX_TEST_FILES,
+                 parent=None):
+        super().__init__(parent)
+        self.files = QFileSystemModel(self)
+        self.files.setOption(QFileSystemModel.DontUseCustomDirectoryIcons) # Saves a shell lookup per folder on Windows
+        self.root = None                 # Folder shown as the root once set_root_path was called
+        self._ignore_re = None
+        self.max_test_files = max_test_files
+        self._names = {}                 # Folder path -> names listed in it so far
+        self._test_files = {}            # Folder path -> test data files listed in it so far
+        self._shown_test_files = {}      # Folder path -> the test data files listed while it is over the limit
+        self._revealed = set()           # Folders whose test data files are all listed anyway
+        self._refilter = False           # A change since the last filter pass hides or shows other rows
+        self.set_ignore(ignore_patterns, max_test_files)
+        # Connected before the proxy's own handlers, so the names are known when new rows are filtered
+        self.files.rowsInserted.connect(self._on_rows_inserted)
+        self.files.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        self.setSourceModel(self.files)
+        self.files.rowsInserted.connect(self._refilter_if_needed)
+        self.files.rowsRemoved.connect(self._refilter_if_needed)
+        self.files.directoryLoaded.connect(self._on_directory_loaded)
+
+    def set_ignore(self, ignore_patterns, max_test_files):
+        """Changes what is hidden; the tree is filtered again."""
+        patterns = "|".join(translate(pattern) for pattern in ignore_patterns)
+        self._ignore_re = re.compile(patterns) if patterns else None
+        self.max_test_files = max_test_files
+        for folder in list(self._names):
+            self._choose_shown_test_files(folder)
+        self.invalidateFilter()
+
+    def hidden_test_files(self, folder):
+        """How many test data files of a folder are not listed."""
+        if folder in self._revealed:
+            return 0
+        return max(0, self._test_files.get(folder, 0) - len(self._shown_test_files.get(folder, ())))
+
+    def reveal_test_files(self, folder):
+        """Lists every test data file of a folder, however many there are."""
+        self._revealed.add(folder)
+        self.invalidateFilter()
+
+    # --- QFileSystemModel-like access by path ---
+
+    def set_root_path(self, path):
+        """Starts listing (and watching) path; returns its index to pass to QTreeView.setRootIndex."""
+        self.root = path
+        return self.mapFromSource(self.files.setRootPath(path))
+
+    def index_for_path(self, path):
+        return self.mapFromSource(self.files.index(path))
+
+    def file_path(self, index):
+        return self.files.filePath(self.mapToSource(index))
+
+    # --- filtering ---
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        index = self.files.index(source_row, 0, source_parent)
+        name = self.files.fileName(index)
+        if not name:
+            return True
+        if self._ignore_re is not None and self._ignore_re.match(name):
+            return False
+        if is_test_data(name):
+            folder = self.files.filePath(source_parent)
+            if self._test_files.get(folder, 0) <= self.max_test_files or folder in self._revealed:
+                return True
+            return name in self._shown_test_files.get(folder, ())
+        if "." not in name and not self.files.isDir(index):
+            return not is_build_output(self._names.get(self.files.filePath(source_parent), ()), name)
+        return True
+
+    def data(self, index, role=Qt.DisplayRole):
+        value = super().data(index, role)
+        if role == Qt.DisplayRole and index.column() == 0:
+            hidden = self.hidden_test_files(self.file_path(index))
+            if hidden:
+                value = f"{value} ({hidden:,} more test files)"
+        return value
+
+    def _choose_shown_test_files(self, folder):
+        """Picks the test data files a folder over the limit still lists: the first ones by name."""
+        names = self._names.get(folder, ())
+        if self._test_files.get(folder, 0) > self.max_test_files:
+            tests = sorted((name for name in names if is_test_data(name)), key=natural_key)
+            self._shown_test_files[folder] = set(tests[:self.max_test_files])
+        else:
+            self._shown_test_files.pop(folder, None)
+
+    def _row_names(self, parent, first, last):
+        return [self.files.fileName(self.files.index(row, 0, parent)) for row in range(first, last + 1)]
+
+    def _on_rows_inserted(self, parent, first, last):
+        folder = self.files.filePath(parent)
+        names = self._names.setdefault(folder, set())
+        added = self._row_names(parent, first, last)
+        for name in added:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in SOURCE_EXTENSIONS and stem in names:
+                self._refilter = True # The executable listed before its source is hidden now
+        names.update(added)
+        before = self._test_files.get(folder, 0)
+        after = before + sum(1 for name in added if is_test_data(name))
+        self._test_files[folder] = after
+        if before <= self.max_test_files < after:
+            # The files listed before the folder crossed the limit are hidden now
+            self._choose_shown_test_files(folder)
+            self._refilter = True
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        # The names are gone once the rows are removed, so count them now
+        folder = self.files.filePath(parent)
+        names = self._names.setdefault(folder, set())
+        removed = self._row_names(parent, first, last)
+        names.difference_update(removed)
+        if any(os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS for name in removed):
+            self._refilter = True # Its executable may be shown again
+        before = self._test_files.get(folder, 0)
+        after = max(0, before - sum(1 for name in removed if is_test_data(name)))
+        self._test_files[folder] = after
+        if after <= self.max_test_files < before:
+            self._choose_shown_test_files(folder)
+            self._refilter = True
+
+    def _refilter_if_needed(self):
+        if self._refilter:
+            self._refilter = False
+            self.invalidateFilter()
+
+    def _on_directory_loaded(self, folder):
+        # Rows arrive in batches; with all of them known, the first ones by name can be picked
+        if self._test_files.get(folder, 0) > self.max_test_files:
+            self._choose_shown_test_files(folder)
+            self.invalidateFilter()
@@ -0,0 +1,139 @@
+import json
+import os
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+from ai_config import DEFAULT_CONTEXT_TOKENS
+from document_tabs import DEFAULT_MEMORY_MB
+from paths import app_data_dir
+from project_tree import DEFAULT_IGNORE_PATTERNS, DEFAULT_MAX_TEST_FILES
+
+SETTINGS_FILE = "settings.json"
+LEGACY_FILE = "comp.json" # Competition mode state written by older versions
+WRITE_DELAY_MS = 200      # Changes made within this time are written together
+
+DEFAULTS = {
+    "comp": 0,              # 1 while competition mode is enabled
+    "password": "",         # Password that disables competition mode again
+    "ai_model": "openchat", # Ollama model the AI chat asks
+    "ai_context_tokens": DEFAULT_CONTEXT_TOKENS, # Budget for earlier chat messages sent as context
+    "editor_memory_mb": DEFAULT_MEMORY_MB,       # Open tabs beyond this are unloaded, least recently used first
+    "tree_ignore_patterns": DEFAULT_IGNORE_PATTERNS, # Names the project tree leaves out
+    "tree_max_test_files": DEFAULT_MAX_TEST_FILES,   # Folders with more test data files don't list them
+}
+
+
+def is_valid(key, value):
+    """Whether value has the type of the key's default; a hand-edited file may hold anything."""
+    default = DEFAULTS.get(key)
+    if default is None:
+        return True # Not one of ours; kept as it is
+    if isinstance(default, int):
+        return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+    if isinstance(default, list):
+        return isinstance(value, list) and all(isinstance(item, str) for item in value)
+    return isinstance(value, type(default))
+
+
+class Settings(QObject):
+    """
+    Settings loaded once and served from memory. set() only updates memory and
+    schedules a write; writes are coalesced and atomic (temp file + rename). The
+    file is watched, so edits made outside the IDE are picked up as well.
+    """
+    changed = Signal(str) # Key whose value changed, by set() or by an external edit
+
+    def __init__(self, path=None, parent=None):
+        super().__init__(parent)
+        self.path = path or app_data_dir(SETTINGS_FILE)
+        self._values = dict(DEFAULTS)
+        self._written_stamp = None # (mtime, size) of our own last write, so its change event is ignored
+        self._dirty = False        # Changed in memory since the last write
+        self._write_timer = QTimer(self)
+        self._write_timer.setSingleShot(True)
+        self._write_timer.setInterval(WRITE_DELAY_MS)
+        self._write_timer.timeout.connect(self.flush)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._load()
+        self._watch()
+
+    def _read_file(self, path):
+        """The valid settings in a file; values of the wrong type are left out, so their defaults apply."""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        return {key: value for key, value in data.items() if is_valid(key, value)}
+
+    def _load(self):
+        data = self._read_file(self.path)
+        if data is None:
+            # First start with this version: carry over the competition mode state, and write
+            # the file right away so there is one to edit (and to watch)
+            data = self._read_file(os.path.join(os.path.dirname(self.path), LEGACY_FILE))
+            if data is not None:
+                self._values.update(data)
+            self._dirty = not os.path.exists(self.path)
+            self.flush()
+            return
+        self._values.update(data)
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch(self):
+        # Renaming a new file into place drops the old one from the watcher
+        if os.path.exists(self.path) and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+
+    def get(self, key, default=None):
+        return self._values.get(key, DEFAULTS.get(key, default))
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def update(self, values):
+        """Changes several settings at once; they are written to disk shortly after."""
+        changed = [key for key, value in values.items() if self._values.get(key) != value]
+        self._values.update(values)
+        if changed:
+            self._dirty = True
+            self._write_timer.start()
+        for key in changed:
+            self.changed.emit(key)
+
+    def flush(self):
+        """Writes pending changes now."""
+        self._write_timer.stop()
+        if not self._dirty:
+            return
+        temp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, "w") as f:
+                json.dump(self._values, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError:
+            return # Kept in memory; the next change tries again
+        self._dirty = False
+        self._written_stamp = self._stamp()
+        self._watch()
+
+    def _on_file_changed(self, path):
+        self._watch()
+        if self._stamp() == self._written_stamp:
+            return # Our own write
+        data = self._read_file(self.path)
+        if data is None:
+            return # Deleted or half-written by another program; keep the values we have
+        changed = [key for key, value in data.items() if self._values.get(key) != value]
+        self._values.update(data)
+        for key in changed:
+            self.changed.emit(key)
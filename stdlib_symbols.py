@@ -0,0 +1,124 @@
+import os
+import re
+
+from completion_index import MAX_CANDIDATES, prefix_matches
+
+SYMBOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Resources", "stdlib_symbols.txt")
+DECLARATION_WINDOW_CHARS = 64 * 1024 # How far back from the cursor a variable's declaration is looked for
+
+CONTEXT_CHARS = 200                  # Text in front of the word looked at by completion_context
+
+# What the cursor is on: "name.", "name->" or "scope::" right before the word being typed
+MEMBER_CONTEXT_RE = re.compile(r"([A-Za-z_]\w*)\s*(?:\[[^\[\]]*\]\s*)*(?:\.|->)\s*$")
+SCOPE_CONTEXT_RE = re.compile(r"([A-Za-z_]\w*)\s*(?:<[^<>]*>)?\s*::\s*$")
+STATEMENT_DELIMITERS = ";{}()"       # The statement a name appears in starts after the last of these
+
+
+def completion_context(text_before_word):
+    """
+    Classifies the text in front of the word being completed. Returns ("member", variable)
+    after '.' or '->', ("scope", name) after '::', otherwise ("plain", None).
+    """
+    # The regular expressions are anchored at the end; a plain suffix check rules most words out first
+    text = text_before_word[-CONTEXT_CHARS:].rstrip()
+    if text.endswith((".", "->")):
+        match = MEMBER_CONTEXT_RE.search(text)
+        if match:
+            return "member", match.group(1)
+    elif text.endswith("::"):
+        match = SCOPE_CONTEXT_RE.search(text)
+        if match:
+            return "scope", match.group(1)
+    return "plain", None
+
+
+class StdlibSymbols:
+    """
+    Names from libstdc++ and the compiler builtins, read from Resources/stdlib_symbols.txt
+    the first time a completion needs them, so startup doesn't pay for it.
+    """
+    def __init__(self, path=SYMBOLS_PATH):
+        self.path = path
+        self._sections = None      # Section key -> sorted (name.lower(), name); filled by _load
+        self._objects = {}         # Predefined variable (cin, cout) -> its type
+        self._declaration_re = None
+
+    def _load(self):
+        sections = {}
+        current = []
+        object_type = None # Set inside an [objects T] section
+        try:
+            with open(self.path, "r") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            lines = [] # Completion still works from the project's own identifiers
+        for line in lines:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("["):
+                kind, *names = line.strip("[]").split()
+                if kind == "objects":
+                    current = []
+                    object_type = names[0]
+                    continue
+                object_type = None
+                current = []
+                for name in names or [""]:
+                    sections.setdefault((kind, name), current)
+                continue
+            if object_type is not None:
+                self._objects.update((name, object_type) for name in line.split())
+            else:
+                current.extend(line.split())
+
+        self._sections = {key: sorted({(name.lower(), name) for name in names}) for key, names in sections.items()}
+        all_members = set()
+        for (kind, _), entries in self._sections.items():
+            if kind == "members":
+                all_members.update(entries)
+        self._sections[("members", "")] = sorted(all_members)
+        # One alternation of every type whose members are known, longest first so "multimap" beats "map".
+        # It must start the statement, up to qualifiers: "const vector<int>& a", "map<int, int> m, n"
+        types = sorted((name for kind, name in self._sections if kind == "members" and name), key=len, reverse=True)
+        self._declaration_re = re.compile(r"\s*(?:(?:const|static|constexpr)\s+)*(?:std::)?(" +
+                                          "|".join(map(re.escape, types)) + r")\b")
+
+    def _section(self, kind, name=""):
+        if self._sections is None:
+            self._load()
+        return self._sections.get((kind, name), [])
+
+    def names(self, prefix, limit=MAX_CANDIDATES):
+        """std:: names and compiler builtins, for completion outside any '.' or '::' context."""
+        return sorted(set(prefix_matches(self._section("std"), prefix, limit)) |
+                      set(prefix_matches(self._section("global"), prefix, limit)), key=str.lower)[:limit]
+
+    def scope_members(self, scope, prefix, limit=MAX_CANDIDATES):
+        """Names after scope::, e.g. std:: or numeric_limits<int>::."""
+        if scope == "std":
+            return prefix_matches(self._section("std"), prefix, limit)
+        return prefix_matches(self._section("scope", scope), prefix, limit)
+
+    def members(self, type_name, prefix, limit=MAX_CANDIDATES):
+        """Member functions of a type; every known member if type_name is None."""
+        return prefix_matches(self._section("members", type_name or ""), prefix, limit)
+
+    def declared_type(self, variable, source):
+        """
+        The standard type a variable was declared with, found by looking back through
+        the source before the cursor; None if it isn't one of the known types.
+        """
+        if self._sections is None:
+            self._load()
+        if variable in self._objects:
+            return self._objects[variable]
+        # Look at the statements the name appears in, nearest first, for one that starts with a type
+        source = source[-DECLARATION_WINDOW_CHARS:]
+        uses = [match.start() for match in re.finditer(r"\b" + re.escape(variable) + r"\b", source)]
+        for position in reversed(uses):
+            start = max(source.rfind(delimiter, 0, position) for delimiter in STATEMENT_DELIMITERS) + 1
+            match = self._declaration_re.match(source, start, position)
+            if match:
+                return match.group(1)
+        return None
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QThread, Signal
+
+from execution import RunLimits, format_usage, run_program
+from test_runner import judge
+
+DEFAULT_ITERATIONS = 10000
+
+# File names looked up in the project folder before asking the user
+GENERATOR_NAMES = ("gen.cpp", "generator.cpp", "gen_test.cpp")
+BRUTE_NAMES = ("brute.cpp", "naive.cpp", "slow.cpp", "bf.cpp")
+
+
+class StressFailure:
+    def __init__(self, seed, input_data, expected, actual, verdict, detail, usage=""):
+        self.seed = seed             # Generator seed that produced the failing input
+        self.input_data = input_data # Generated input, as bytes
+        self.expected = expected     # Brute-force output
+        self.actual = actual         # Solution output
+        self.verdict = verdict       # Any non-AC verdict from test_runner.judge
+        self.detail = detail
+        self.usage = usage           # Resource summary of the failing solution run
+        self.saved_input_path = None # Set once the input has been written to the project folder
+
+
+class StressThread(QThread):
+    """
+    Runs generator -> brute -> solution iterations on all cores until the solution
+    disagrees with the brute force, the iteration budget runs out or stop() is called.
+    The generator receives the seed as its only command-line argument.
+    """
+    progress = Signal(int, float)          # Iterations done, iterations per second
+    failure_found = Signal(object)         # StressFailure
+    error_occurred = Signal(str)           # Generator or brute force misbehaved
+    stress_finished = Signal(int, float)   # Iterations done, wall-clock seconds
+
+    def __init__(self, generator, brute, solution, cwd, iterations=DEFAULT_ITERATIONS,
+                 limits=None, workers=None):
+        super().__init__()
+        self.generator = generator
+        self.brute = brute
+        self.solution = solution
+        self.cwd = cwd
+        self.iterations = iterations
+        self.limits = limits or RunLimits()
+        self.workers = workers or os.cpu_count() or 1
+
+        self._lock = threading.Lock()
+        self._next_seed = 1
+        self._done = 0
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def _take_seed(self):
+        with self._lock:
+            if self._stopped or self._next_seed > self.iterations:
+                return None
+            seed = self._next_seed
+            self._next_seed += 1
+            return seed
+
+    def _run_iteration(self, seed):
+        generated = run_program([self.generator, str(seed)], self.cwd, self.limits)
+        if generated.error is not None or generated.timed_out or generated.returncode != 0:
+            return f"Generator failed on seed {seed}."
+        input_data = generated.stdout
+
+        reference = run_program([self.brute], self.cwd, self.limits.scaled(10), input_data=input_data)
+        if reference.error is not None or reference.timed_out or reference.returncode != 0:
+            return f"Brute force failed on seed {seed}."
+
+        outcome = run_program([self.solution], self.cwd, self.limits, input_data=input_data)
+        verdict, _, detail = judge(outcome, reference.stdout, self.limits)
+        if verdict != "AC":
+            return StressFailure(seed, input_data, reference.stdout, outcome.stdout, verdict, detail,
+                                 format_usage(outcome))
+        return None
+
+    def _worker(self):
+        while True:
+            seed = self._take_seed()
+            if seed is None:
+                return
+            problem = self._run_iteration(seed)
+            with self._lock:
+                if self._stopped:
+                    return
+                if problem is not None:
+                    self._stopped = True
+                    if isinstance(problem, StressFailure):
+                        self._save_failure(problem)
+                        self.failure_found.emit(problem)
+                    else:
+                        self.error_occurred.emit(problem)
+                    return
+                self._done += 1
+
+    def _save_failure(self, failure):
+        """Writes the failing input (and the brute-force answer) next to the solution."""
+        input_path = os.path.join(self.cwd, "stress_failing.in")
+        try:
+            with open(input_path, "wb") as f:
+                f.write(failure.input_data)
+            with open(os.path.join(self.cwd, "stress_failing.out"), "wb") as f:
+                f.write(failure.expected)
+            failure.saved_input_path = input_path
+        except OSError:
+            pass
+
+    def run(self):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._worker) for _ in range(self.workers)]
+            # Report progress a few times per second while the workers run
+            while not all(future.done() for future in futures):
+                time.sleep(0.25)
+                elapsed = time.perf_counter() - start
+                self.progress.emit(self._done, self._done / elapsed if elapsed > 0 else 0.0)
+        self.stress_finished.emit(self._done, time.perf_counter() - start)
@@ -1,13 +1,51 @@
+import re
+import time
+from PySide6.QtCore import QEvent, QPoint, QTimer
 from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QFont, QColor
-from PySide6.QtCore import QRegularExpression
+from PySide6.QtWidgets import QPlainTextEdit
+
+# Block states carried from one block to the next
+STATE_NORMAL = 0
+STATE_COMMENT = 1      # Inside a /* ... */ comment
+STATE_RAW_STRING = 16  # Inside a raw string; STATE_RAW_STRING + n identifies its delimiter
+PROVISIONAL_FLAG = 1 << 20     # Highlighted out of order because it was visible; the state may be wrong
+STATE_PENDING = 1 << 21        # Not highlighted yet; filled in by an idle-time slice
+
+# Documents with at least this many blocks are highlighted lazily
+LAZY_THRESHOLD_BLOCKS = 3000
+# Time spent highlighting per idle-time slice, in seconds
+SLICE_SECONDS = 0.015
+
 
 class CppSyntaxHighlighter(QSyntaxHighlighter):
+    """
+    Single-pass C++ highlighter. Each block is scanned left to right with one
+    tokenizer, so every character gets exactly one format and strings, comments
+    and preprocessor lines take precedence over the tokens that appear inside them.
+
+    Large documents are highlighted lazily: blocks in the viewport (see watch_viewport)
+    are done right away, the rest in short slices whenever the event loop is idle.
+    Blocks are always finished top to bottom, so comment and raw-string state carries
+    across blocks exactly as in a full pass.
+    """
 
     def __init__(self, document):
         super().__init__(document)
         self._setup_formats()
         self._setup_rules()
-        
+
+        self._editor = None           # Editor whose viewport is highlighted first
+        self._lazy_enabled = False    # Only for plain-text editors, see watch_viewport
+        self._visible_first = 0       # Block numbers currently on screen
+        self._visible_last = -1
+        self._slice_deadline = 0.0    # Blocks are highlighted in order until this perf_counter() time
+        self._pending_from = None     # Lowest block number deferred since the last slice
+        self._slice_timer = QTimer(self)
+        self._slice_timer.setSingleShot(True)
+        self._slice_timer.setInterval(0)
+        self._slice_timer.timeout.connect(self._highlight_next_slice)
+        self.latency_probe = None     # KeystrokeLatencyProbe told how long each block took
+
     def _setup_formats(self):
         """Initialize all text formats with their styles"""
         self.formats = {
@@ -21,10 +59,10 @@ class CppSyntaxHighlighter(QSyntaxHighlighter):
             'function': self._create_format("#DCDCAA"),
             'class': self._create_format("#4EC9B0", bold=True),
         }
-        
+
         # Special format for multi-line comments
         self.multi_line_comment_format = self._create_format("#6A9955")
-        
+
     def _create_format(self, color, bold=False):
         """Helper to create a text format"""
         fmt = QTextCharFormat()
@@ -32,13 +70,11 @@ class CppSyntaxHighlighter(QSyntaxHighlighter):
         if bold:
             fmt.setFontWeight(QFont.Bold)
         return fmt
-    
+
     def _setup_rules(self):
-        """Initialize all syntax highlighting rules"""
-        self.highlighting_rules = []
-        
+        """Initialize the keyword tables and the tokenizer"""
         # Keywords (C++11 through C++20)
-        keywords = [
+        self.keywords = frozenset([
             # Core language keywords
             'alignas', 'alignof', 'and', 'and_eq', 'asm', 'auto', 'bitand', 'bitor',
             'bool', 'break', 'case', 'catch', 'char', 'char8_t', 'char16_t', 'char32_t',
@@ -53,100 +89,233 @@ class CppSyntaxHighlighter(QSyntaxHighlighter):
             'switch', 'template', 'this', 'thread_local', 'throw', 'true', 'try',
             'typedef', 'typeid', 'typename', 'union', 'unsigned', 'using', 'virtual',
             'void', 'volatile', 'wchar_t', 'while', 'xor', 'xor_eq',
-            
+
             # Common macros/aliases
             'NULL', 'override', 'final', 'noexcept'
-        ]
-        self._add_rule(r'\b(?:' + '|'.join(keywords) + r')\b', 'keyword')
-        
+        ])
+
         # Standard types
-        types = [
+        self.types = frozenset([
             'int8_t', 'int16_t', 'int32_t', 'int64_t',
             'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t',
             'size_t', 'ssize_t', 'ptrdiff_t', 'intptr_t', 'uintptr_t',
             'string', 'wstring', 'u16string', 'u32string',
             'vector', 'map', 'unordered_map', 'set', 'unordered_set',
             'shared_ptr', 'unique_ptr', 'weak_ptr', 'function'
-        ]
-        self._add_rule(r'\b(?:' + '|'.join(types) + r')\b', 'type')
-        
-        # Preprocessor directives
-        self._add_rule(r'#\s*\w+', 'preprocessor')
-        self._add_rule(r'#include\s*<[^>]*>', 'preprocessor')
-        self._add_rule(r'#include\s*"[^"]*"', 'preprocessor')
-        self._add_rule(r'#(if|elif|else|endif|define|undef|pragma|error|warning)\b', 'preprocessor')
-        
-        # Strings and characters (with escape sequence support)
-        self._add_rule(r'"(?:\\.|[^"\\])*"', 'string')  # Double quotes
-        self._add_rule(r"'(?:\\.|[^'\\])'", 'char')     # Single quotes
-        
-        # Numbers (decimal, hex, binary, octal, floats)
-        self._add_rule(r'\b\d+(?:\.\d*)?(?:[eE][+-]?\d+)?[fFlL]?\b', 'number')  # Decimal
-        self._add_rule(r'\b0[xX][0-9a-fA-F]+(?:[uU]?[lL]{0,2}|[lL]{0,2}[uU]?)\b', 'number')  # Hex
-        self._add_rule(r'\b0[bB][01]+(?:[uU]?[lL]{0,2}|[lL]{0,2}[uU]?)\b', 'number')  # Binary
-        self._add_rule(r'\b0[oO]?[0-7]+(?:[uU]?[lL]{0,2}|[lL]{0,2}[uU]?)\b', 'number')  # Octal
-        
-        # Single-line comments
-        self._add_rule(r'//.*$', 'comment')
-        
-        # Functions (identifier followed by parenthesis)
-        self._add_rule(r'\b[a-zA-Z_]\w*(?=\s*\()', 'function')
-        
-        # Class names (PascalCase convention)
-        self._add_rule(r'\b[A-Z][a-zA-Z0-9_]*\b', 'class')
-        
-        # Setup multi-line comment patterns
-        self.comment_start = QRegularExpression(r'/\*')
-        self.comment_end = QRegularExpression(r'\*/')
-    
-    def _add_rule(self, pattern, format_name):
-        """Add a highlighting rule"""
-        regex = QRegularExpression(pattern)
-        self.highlighting_rules.append((regex, self.formats[format_name]))
-    
+        ])
+
+        # One alternation for every token kind; the first alternative that matches wins,
+        # so literals with encoding prefixes are tried before plain identifiers
+        self.token_pattern = re.compile(r'''
+            (?P<line_comment>//)
+          | (?P<block_comment>/\*)
+          | (?P<raw_string>(?:u8|u|U|L)?R"(?P<delimiter>[^()\\\s"]{0,16})\()
+          | (?P<string>(?:u8|u|U|L)?"(?:\\.|[^"\\])*"?)
+          | (?P<char>(?:u8|u|U|L)?'(?:\\.|[^'\\])*'?)
+          | (?P<number>\.?\d(?:[eEpP][+-]|[\w.'])*)
+          | (?P<identifier>[A-Za-z_]\w*)
+        ''', re.VERBOSE)
+        self.directive_pattern = re.compile(r'\s*#\s*(\w*)')
+        self.include_target_pattern = re.compile(r'\s*(?:<[^>]*>?|"[^"]*"?)')
+        self.call_pattern = re.compile(r'\s*\(')
+        self.comment_end = '*/'
+
+        # Raw-string delimiters seen so far; the index is encoded in the block state
+        self.raw_delimiters = []
+
+    def _raw_state(self, delimiter):
+        if delimiter not in self.raw_delimiters:
+            self.raw_delimiters.append(delimiter)
+        return STATE_RAW_STRING + self.raw_delimiters.index(delimiter)
+
+    def watch_viewport(self, editor):
+        """
+        Highlights the blocks visible in the editor first when the document is large.
+        Only QPlainTextEdit gets lazy highlighting: QTextEdit relayouts the whole document
+        for every block whose formats change, so there it would cost more than it saves.
+        """
+        self._editor = editor
+        self._lazy_enabled = isinstance(editor, QPlainTextEdit)
+        editor.verticalScrollBar().valueChanged.connect(self._on_viewport_changed)
+        editor.viewport().installEventFilter(self)
+        self._update_visible_range()
+
+    def unwatch_viewport(self):
+        """Stops following the editor, e.g. when it switches to another document."""
+        if self._editor is None:
+            return
+        self._editor.verticalScrollBar().valueChanged.disconnect(self._on_viewport_changed)
+        self._editor.viewport().removeEventFilter(self)
+        self._editor = None
+        # Nothing is on screen now; pending blocks are still finished in idle-time slices
+        self._visible_first, self._visible_last = 0, -1
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Resize:
+            self._on_viewport_changed()
+        return False
+
+    def _update_visible_range(self):
+        viewport = self._editor.viewport()
+        self._visible_first = self._editor.cursorForPosition(QPoint(0, 0)).blockNumber()
+        self._visible_last = self._editor.cursorForPosition(QPoint(0, viewport.height() - 1)).blockNumber()
+
+    def _on_viewport_changed(self):
+        if not self._is_lazy():
+            return
+        self._update_visible_range()
+        # Highlighting one pending block cascades through the rest of the visible ones
+        block = self.document().findBlockByNumber(self._visible_first)
+        while block.isValid() and block.blockNumber() <= self._visible_last:
+            if block.userState() == STATE_PENDING:
+                self.rehighlightBlock(block)
+            block = block.next()
+
+    def _is_lazy(self):
+        return self._lazy_enabled and self.document().blockCount() >= LAZY_THRESHOLD_BLOCKS
+
+    def _defer(self, block_number):
+        if self._pending_from is None or block_number < self._pending_from:
+            self._pending_from = block_number
+        if not self._slice_timer.isActive():
+            self._slice_timer.start()
+
+    def _highlight_next_slice(self):
+        """Highlights unfinished blocks in document order for up to SLICE_SECONDS."""
+        self._slice_deadline = time.perf_counter() + SLICE_SECONDS
+        start = self._pending_from
+        self._pending_from = None
+        if start is None:
+            return
+        # Block numbers shift while the user edits, so look around the remembered one
+        block = self.document().findBlockByNumber(min(start, self.document().blockCount() - 1))
+        while block.previous().isValid() and block.previous().userState() >= PROVISIONAL_FLAG:
+            block = block.previous()
+        while block.isValid() and block.userState() < PROVISIONAL_FLAG:
+            block = block.next()
+        if block.isValid():
+            # Deferring again at the end of the slice schedules the next one
+            self.rehighlightBlock(block)
+
     def highlightBlock(self, text):
-        """Apply syntax highlighting to the current text block"""
-        # Apply simple rules first
-        for pattern, fmt in self.highlighting_rules:
-            matches = pattern.globalMatch(text)
-            while matches.hasNext():
-                match = matches.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
-        
-        # Handle multi-line comments
-        self._highlight_multiline_comments(text)
-    
-    def _highlight_multiline_comments(self, text):
-        """Special handling for multi-line comments"""
-        # Initialize block state
-        self.setCurrentBlockState(0)
-        
-        # Check if previous block was in a comment
+        """Apply syntax highlighting to the current text block, deferring it if the document is large"""
+        if self.latency_probe is not None:
+            start = time.perf_counter()
+            self._highlight_block(text)
+            self.latency_probe.add_highlight(time.perf_counter() - start)
+        else:
+            self._highlight_block(text)
+
+    def _highlight_block(self, text):
         prev_state = self.previousBlockState()
-        
-        # Find the start index
-        start_idx = 0
-        if prev_state != 1:
-            start_match = self.comment_start.match(text)
-            start_idx = start_match.capturedStart() if start_match.hasMatch() else -1
-        
-        # While we have comment starts in this block
-        while start_idx >= 0:
-            # Look for the end of the comment
-            end_match = self.comment_end.match(text, start_idx + 2)
-            
-            if end_match.hasMatch():
-                # Comment ends in this block
-                comment_length = end_match.capturedEnd() - start_idx
-                self.setCurrentBlockState(0)
+        provisional = False
+        if self._is_lazy():
+            block_number = self.currentBlock().blockNumber()
+            visible = self._visible_first <= block_number <= self._visible_last
+            settled = prev_state < PROVISIONAL_FLAG
+            if not visible and (not settled or time.perf_counter() > self._slice_deadline):
+                self.setCurrentBlockState(STATE_PENDING)
+                self._defer(block_number)
+                return
+            # Visible blocks are highlighted even if the blocks above aren't done yet
+            provisional = not settled
+        if prev_state >= PROVISIONAL_FLAG:
+            # Assume the state left by the previous block; the in-order pass corrects it later
+            prev_state = STATE_NORMAL if prev_state == STATE_PENDING else prev_state & ~PROVISIONAL_FLAG
+
+        self._highlight_text(text, prev_state)
+        if provisional:
+            self._defer(self.currentBlock().blockNumber())
+            self.setCurrentBlockState(self.currentBlockState() | PROVISIONAL_FLAG)
+
+    def _highlight_text(self, text, prev_state):
+        """Formats one block in a single pass, starting in the state left by the previous block"""
+        self.setCurrentBlockState(STATE_NORMAL)
+        pos = self._continue_previous_block(text, prev_state)
+        if pos is None:
+            return
+        length = len(text)
+
+        # Preprocessor directive at the start of the line
+        if pos == 0:
+            directive = self.directive_pattern.match(text)
+            if directive:
+                self.setFormat(directive.start(), directive.end() - directive.start(), self.formats['preprocessor'])
+                pos = directive.end()
+                if directive.group(1) == 'include':
+                    target = self.include_target_pattern.match(text, pos)
+                    if target:
+                        self.setFormat(target.start(), target.end() - target.start(), self.formats['preprocessor'])
+                        pos = target.end()
+
+        formats = self.formats
+        search = self.token_pattern.search
+        while pos < length:
+            match = search(text, pos)
+            if match is None:
+                break
+            kind = match.lastgroup
+            start = match.start()
+            end = match.end()
+
+            if kind == 'line_comment':
+                self.setFormat(start, length - start, formats['comment'])
+                break
+            elif kind == 'block_comment':
+                close = text.find(self.comment_end, end)
+                if close < 0:
+                    self.setFormat(start, length - start, self.multi_line_comment_format)
+                    self.setCurrentBlockState(STATE_COMMENT)
+                    break
+                end = close + 2
+                self.setFormat(start, end - start, self.multi_line_comment_format)
+            elif kind == 'raw_string':
+                delimiter = match.group('delimiter')
+                terminator = ')' + delimiter + '"'
+                close = text.find(terminator, end)
+                if close < 0:
+                    self.setFormat(start, length - start, formats['string'])
+                    self.setCurrentBlockState(self._raw_state(delimiter))
+                    break
+                end = close + len(terminator)
+                self.setFormat(start, end - start, formats['string'])
+            elif kind == 'identifier':
+                word = match.group(kind)
+                if word in self.keywords:
+                    self.setFormat(start, end - start, formats['keyword'])
+                elif word in self.types:
+                    self.setFormat(start, end - start, formats['type'])
+                elif self.call_pattern.match(text, end):
+                    self.setFormat(start, end - start, formats['function'])
+                elif word[0].isupper():
+                    self.setFormat(start, end - start, formats['class'])
             else:
-                # Comment continues to next block
-                comment_length = len(text) - start_idx
-                self.setCurrentBlockState(1)
-            
-            # Apply the comment format
-            self.setFormat(start_idx, comment_length, self.multi_line_comment_format)
-            
-            # Look for next comment start
-            next_match = self.comment_start.match(text, start_idx + comment_length)
-            start_idx = next_match.capturedStart() if next_match.hasMatch() else -1
\ No newline at end of file
+                # string, char or number
+                self.setFormat(start, end - start, formats[kind])
+            pos = end
+
+    def _continue_previous_block(self, text, prev_state):
+        """
+        Finishes a comment or raw string left open by the previous block.
+        Returns the position where normal scanning resumes, or None if the whole block is consumed.
+        """
+        if prev_state == STATE_COMMENT:
+            close = text.find(self.comment_end)
+            if close < 0:
+                self.setFormat(0, len(text), self.multi_line_comment_format)
+                self.setCurrentBlockState(STATE_COMMENT)
+                return None
+            self.setFormat(0, close + 2, self.multi_line_comment_format)
+            return close + 2
+        if prev_state >= STATE_RAW_STRING:
+            delimiter = self.raw_delimiters[prev_state - STATE_RAW_STRING]
+            terminator = ')' + delimiter + '"'
+            close = text.find(terminator)
+            if close < 0:
+                self.setFormat(0, len(text), self.formats['string'])
+                self.setCurrentBlockState(prev_state)
+                return None
+            end = close + len(terminator)
+            self.setFormat(0, end, self.formats['string'])
+            return end
+        return 0
@@ -0,0 +1,144 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PySide6.QtCore import QThread, Signal
+
+from execution import RunLimits, run_program
+
+# Extensions accepted for the expected output of a <name>.in file, in order of preference
+EXPECTED_EXTENSIONS = (".out", ".ans", ".ok")
+INPUT_PREFIX_RE = re.compile(r'^input', re.IGNORECASE)
+
+
+class TestCase:
+    def __init__(self, name, input_path, expected_path):
+        self.name = name                   # Display name, e.g. "01" or "input03.txt"
+        self.input_path = input_path       # File fed to the program's stdin
+        self.expected_path = expected_path # File holding the expected stdout
+
+
+class TestResult:
+    def __init__(self, case, verdict, duration, detail="", outcome=None):
+        self.case = case         # The TestCase that was run
+        self.verdict = verdict   # "AC", "WA", "TLE", "MLE", "OLE" or "RE"
+        self.duration = duration # Wall-clock seconds
+        self.detail = detail     # Short explanation shown next to the verdict
+        self.outcome = outcome   # RunOutcome with CPU time and peak memory, if the program ran
+
+
+def natural_key(text):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', text)]
+
+
+def find_test_cases(folder):
+    """
+    Finds input/expected-output pairs in a folder.
+    Supports <name>.in with <name>.out/.ans/.ok, and input<suffix> with output<suffix>.
+    """
+    try:
+        names = set(os.listdir(folder))
+    except OSError:
+        return []
+
+    cases = []
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        expected = None
+        if ext.lower() == ".in":
+            for expected_ext in EXPECTED_EXTENSIONS:
+                if stem + expected_ext in names:
+                    expected = stem + expected_ext
+                    break
+            display_name = stem
+        elif INPUT_PREFIX_RE.match(name):
+            candidate = INPUT_PREFIX_RE.sub("output", name, count=1)
+            if candidate in names:
+                expected = candidate
+            elif candidate.capitalize() in names:
+                expected = candidate.capitalize()
+            display_name = name
+        if expected:
+            cases.append(TestCase(display_name, os.path.join(folder, name), os.path.join(folder, expected)))
+
+    cases.sort(key=lambda case: natural_key(case.name))
+    return cases
+
+
+def outputs_match(actual, expected):
+    """Judge-style comparison: tokens must match, whitespace differences are ignored."""
+    return actual.split() == expected.split()
+
+
+def run_test_case(executable, case, limits):
+    """Runs the executable on one test case and returns its TestResult."""
+    try:
+        with open(case.expected_path, "rb") as f:
+            expected = f.read()
+    except OSError as e:
+        return TestResult(case, "RE", 0.0, f"Could not read expected output: {e}")
+
+    outcome = run_program([executable], os.path.dirname(case.input_path), limits, input_path=case.input_path)
+    return TestResult(case, *judge(outcome, expected, limits), outcome=outcome)
+
+
+def judge(outcome, expected, limits):
+    """Turns a RunOutcome into a (verdict, duration, detail) tuple."""
+    if outcome.error is not None:
+        return "RE", outcome.duration, f"Could not run: {outcome.error}"
+    over_cpu = outcome.cpu_time is not None and limits.time_limit and outcome.cpu_time > limits.time_limit
+    if over_cpu or outcome.timed_out:
+        # The kernel stops CPU-bound programs a hair before the limit, so allow some slack
+        if outcome.cpu_time is not None and limits.time_limit and outcome.cpu_time >= limits.time_limit * 0.9:
+            return "TLE", outcome.duration, f"CPU time limit of {limits.time_limit:.2f} s exceeded"
+        if limits.wall_limit is None:
+            return "TLE", outcome.duration, "Wall-clock limit exceeded"
+        return "TLE", outcome.duration, f"Wall-clock limit of {limits.wall_limit:.2f} s exceeded"
+    if outcome.output_exceeded:
+        return "OLE", outcome.duration, f"Output limit of {limits.output_limit_mb} MB exceeded"
+    if outcome.memory_exceeded:
+        return "MLE", outcome.duration, f"Memory limit of {limits.memory_limit_mb} MB exceeded"
+    if outcome.returncode != 0:
+        return "RE", outcome.duration, outcome.exit_description()
+    if outputs_match(outcome.stdout, expected):
+        return "AC", outcome.duration, ""
+    return "WA", outcome.duration, "Output differs from expected"
+
+
+class TestRunnerThread(QThread):
+    """
+    Runs every test case concurrently on a pool sized to the CPU count.
+    Results are emitted as soon as each test finishes.
+    """
+    test_finished = Signal(object)  # TestResult
+    all_finished = Signal(list, float) # All TestResults in test-case order, total wall-clock seconds
+
+    def __init__(self, executable, cases, limits=None, workers=None):
+        super().__init__()
+        self.executable = executable
+        self.cases = cases
+        self.limits = limits or RunLimits()
+        self.workers = workers or os.cpu_count() or 1
+        self._stopped = False
+
+    def stop(self):
+        """Skips tests that haven't started yet; running ones finish or time out."""
+        self._stopped = True
+
+    def _run_one(self, case):
+        if self._stopped:
+            return None
+        return run_test_case(self.executable, case, self.limits)
+
+    def run(self):
+        start = time.perf_counter()
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_one, case): case for case in self.cases}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is not None:
+                    results[futures[future].name] = result
+                    self.test_finished.emit(result)
+        ordered = [results[case.name] for case in self.cases if case.name in results]
+        self.all_finished.emit(ordered, time.perf_counter() - start)
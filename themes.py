@@ -70,7 +70,7 @@ def apply_custom_theme1(app: QApplication):
     }
     /* --- End QHeaderView Styling --- */
 
-    QTextEdit {
+    QTextEdit, QPlainTextEdit {
         background-color: #222222; /* Even darker for editor */
         color: #f0f0f0;
         border: 1px solid #444444;
@@ -230,7 +230,7 @@ def apply_custom_theme2(app: QApplication):
     }
     /* --- End QHeaderView Styling --- */
 
-    QTextEdit {
+    QTextEdit, QPlainTextEdit {
         background-color: #ffffff; /* White for editor */
         color: #222222;
         border: 1px solid #e0e0e0;
@@ -386,7 +386,7 @@ def apply_custom_theme3(app: QApplication):
     }
     /* --- End QHeaderView Styling --- */
 
-    QTextEdit {
+    QTextEdit, QPlainTextEdit {
         background-color: #1a1a2a; /* Darker blue for editor */
         color: #e0e0f0;
         border: 1px solid #3a3a5e;
@@ -542,7 +542,7 @@ def apply_custom_theme4(app: QApplication):
     }
     /* --- End QHeaderView Styling --- */
 
-    QTextEdit {
+    QTextEdit, QPlainTextEdit {
         background-color: #313f36; /* Darker green for editor */
         color: #e0e6db;
         border: 1px solid #5e7362;
@@ -50,6 +50,12 @@ class Ui_MainWindow(object):
         self.actionBuild.setObjectName(u"actionBuild")
         self.actionBuildAndRun = QAction(MainWindow)
         self.actionBuildAndRun.setObjectName(u"actionBuildAndRun")
+        self.actionCancelBuild = QAction(MainWindow)
+        self.actionCancelBuild.setObjectName(u"actionCancelBuild")
+        self.actionRunTests = QAction(MainWindow)
+        self.actionRunTests.setObjectName(u"actionRunTests")
+        self.actionStressTest = QAction(MainWindow)
+        self.actionStressTest.setObjectName(u"actionStressTest")
 
         # Competition actions
         self.actionEnableCompetition = QAction(MainWindow)
@@ -112,6 +118,9 @@ class Ui_MainWindow(object):
         # Add actions to Build menu
         self.menuBuild.addAction(self.actionBuild)
         self.menuBuild.addAction(self.actionBuildAndRun)
+        self.menuBuild.addAction(self.actionRunTests)
+        self.menuBuild.addAction(self.actionStressTest)
+        self.menuBuild.addAction(self.actionCancelBuild)
         
         # Add actions to Competition menu
         self.menuCompetition.addAction(self.actionEnableCompetition)
@@ -144,6 +153,9 @@ class Ui_MainWindow(object):
         # Build action texts
         self.actionBuild.setText(QCoreApplication.translate("MainWindow", u"Build", None))
         self.actionBuildAndRun.setText(QCoreApplication.translate("MainWindow", u"Build and Run", None))
+        self.actionCancelBuild.setText(QCoreApplication.translate("MainWindow", u"Cancel Build", None))
+        self.actionRunTests.setText(QCoreApplication.translate("MainWindow", u"Run Tests", None))
+        self.actionStressTest.setText(QCoreApplication.translate("MainWindow", u"Stress Test", None))
 
         # Competition action texts
         self.actionEnableCompetition.setText(QCoreApplication.translate("MainWindow", u"Enable", None))